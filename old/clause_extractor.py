@@ -8,7 +8,7 @@ MODEL_NAME = "qwen3:8b"
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extracts all text from a PDF file."""
     print(f"📄 Processing PDF file: {pdf_path}")
-    text = ""
+    parts = []
     try:
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
@@ -17,10 +17,10 @@ def extract_text_from_pdf(pdf_path: str) -> str:
                 page_text = page.extract_text()
                 if page_text:
                     # Add page markers to help the model understand the document structure
-                    text += f"\n--- START OF PAGE {i + 1} ---\n"
-                    text += page_text
+                    parts.append(f"\n--- START OF PAGE {i + 1} ---\n")
+                    parts.append(page_text)
         print("✅ Text extraction complete.")
-        return text
+        return "".join(parts)
     except Exception as e:
         print(f"❌ Error extracting PDF text: {e}")
         return ""
@@ -0,0 +1,3 @@
+"""
+Benchmarking tools for the YAML Prompt Engine (offline Ollama stand-in and benchmark suite)
+"""
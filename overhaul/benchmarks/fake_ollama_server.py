@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Offline Ollama stand-in for deterministic pipeline benchmarks.
+Speaks /api/chat and /api/generate (streaming and non-streaming) and replays canned
+responses matched by prompt hash, step name or prompt substring.
+
+Usage:
+    python -m benchmarks.fake_ollama_server --fixtures benchmarks/fixtures/responses.json \
+        --prompts-dir prompts --latency 0.2 --tokens-per-second 40 --error-rate 0.05
+Then point the engine at it with OLLAMA_HOST=http://127.0.0.1:11435
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import yaml
+
+# Whitespace-preserving pieces streamed one per chunk, like model tokens
+_TOKEN_PIECE = re.compile(r"\s*\S{1,6}|\s+")
+
+class CannedResponses:
+    """Resolve a prompt to a canned response by prompt hash, step name or substring"""
+
+    def __init__(self, fixtures: Dict[str, Any], prompts_dir: Optional[str] = None):
+        self.by_hash: Dict[str, Dict[str, Any]] = {}
+        self.by_step: Dict[str, Dict[str, Any]] = {}
+        self.by_substring: List[Tuple[str, Dict[str, Any]]] = []
+        self.default = fixtures.get('default', {'response': '{"message": "no canned response"}'})
+
+        for entry in fixtures.get('responses', []):
+            if 'prompt_sha256' in entry:
+                self.by_hash[entry['prompt_sha256']] = entry
+            elif 'step' in entry:
+                self.by_step[entry['step']] = entry
+            elif 'contains' in entry:
+                self.by_substring.append((entry['contains'], entry))
+
+        # Steps are recognised by the literal text their prompt template starts with
+        self.step_prefixes: List[Tuple[str, str]] = []
+        if prompts_dir:
+            for yaml_file in sorted(Path(prompts_dir).glob('*.yaml')):
+                with open(yaml_file, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f) or {}
+                for step in config.get('processing_steps', []):
+                    prefix = re.split(r'\{\{|\{%', step.get('prompt_template', ''), maxsplit=1)[0].strip()
+                    if prefix:
+                        self.step_prefixes.append((prefix[:200], step['name']))
+        # Longest prefix first so that more specific templates win
+        self.step_prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+    @classmethod
+    def from_file(cls, path: Optional[str], prompts_dir: Optional[str] = None) -> 'CannedResponses':
+        fixtures = {}
+        if path:
+            with open(path, 'r', encoding='utf-8') as f:
+                fixtures = json.load(f)
+        return cls(fixtures, prompts_dir)
+
+    def step_for(self, prompt: str) -> Optional[str]:
+        stripped = prompt.strip()
+        for prefix, step_name in self.step_prefixes:
+            if stripped.startswith(prefix):
+                return step_name
+        return None
+
+    def resolve(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Return (match kind, fixture entry) for a prompt"""
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        if prompt_hash in self.by_hash:
+            return 'hash', self.by_hash[prompt_hash]
+
+        step_name = self.step_for(prompt)
+        if step_name in self.by_step:
+            return 'step', self.by_step[step_name]
+
+        for substring, entry in self.by_substring:
+            if substring in prompt:
+                return 'contains', entry
+
+        return 'default', self.default
+
+class FakeOllamaServer:
+    """Threaded HTTP server replaying canned responses with configurable timing and failures"""
+
+    def __init__(self,
+                 responses: CannedResponses,
+                 host: str = "127.0.0.1",
+                 port: int = 11435,
+                 latency: float = 0.0,
+                 tokens_per_second: Optional[float] = None,
+                 error_rate: float = 0.0,
+                 seed: Optional[int] = None,
+                 model: str = "qwen2.5-coder:7b"):
+        self.responses = responses
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.model = model
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'errors_injected': 0, 'streamed': 0, 'cancelled': 0, 'matches': {}}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the base URL to use as OLLAMA_HOST"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _record(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _record_match(self, match: str):
+        with self._lock:
+            self.stats['matches'][match] = self.stats['matches'].get(match, 0) + 1
+
+    def _should_fail(self, entry: Dict[str, Any]) -> bool:
+        rate = entry.get('error_rate', self.error_rate)
+        with self._lock:
+            return rate > 0 and self.random.random() < rate
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path in ('/', ''):
+                    body = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == '/api/version':
+                    self._send_json(200, {'version': '0.0.0-fake'})
+                elif self.path == '/api/tags':
+                    self._send_json(200, {'models': [{'name': server.model, 'model': server.model}]})
+                else:
+                    self._send_json(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if self.path not in ('/api/chat', '/api/generate'):
+                    self._send_json(404, {'error': 'not found'})
+                    return
+
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                server._record('requests')
+
+                is_chat = self.path == '/api/chat'
+                if is_chat:
+                    messages = request.get('messages') or []
+                    prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+                else:
+                    prompt = request.get('prompt', '')
+
+                match, entry = server.responses.resolve(prompt)
+                server._record_match(match)
+
+                if server._should_fail(entry):
+                    server._record('errors_injected')
+                    self._send_json(entry.get('error_status', 500), {'error': 'injected failure'})
+                    return
+
+                text = entry.get('response', '')
+                if not isinstance(text, str):
+                    text = json.dumps(text, indent=2)
+
+                pieces = _TOKEN_PIECE.findall(text)
+                num_predict = (request.get('options') or {}).get('num_predict')
+                if isinstance(num_predict, int) and num_predict > 0:
+                    pieces = pieces[:num_predict]
+
+                latency = entry.get('latency', server.latency)
+                tokens_per_second = entry.get('tokens_per_second', server.tokens_per_second)
+                token_delay = 1.0 / tokens_per_second if tokens_per_second else 0.0
+                model = request.get('model') or server.model
+                started = time.perf_counter()
+
+                if request.get('stream', True):
+                    self._stream(pieces, is_chat, model, latency, token_delay, started, len(prompt))
+                else:
+                    time.sleep(latency + token_delay * len(pieces))
+                    payload = self._message(''.join(pieces), is_chat, model)
+                    payload.update(self._final_stats(len(pieces), started, len(prompt)))
+                    self._send_json(200, payload)
+
+            def _stream(self, pieces, is_chat, model, latency, token_delay, started, prompt_chars):
+                server._record('streamed')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def write_line(payload):
+                    line = json.dumps(payload).encode('utf-8') + b"\n"
+                    self.wfile.write(f"{len(line):X}\r\n".encode('ascii') + line + b"\r\n")
+                    self.wfile.flush()
+
+                try:
+                    time.sleep(latency)
+                    for piece in pieces:
+                        if token_delay:
+                            time.sleep(token_delay)
+                        write_line(self._message(piece, is_chat, model))
+                    final = self._message('', is_chat, model)
+                    final.update(self._final_stats(len(pieces), started, prompt_chars))
+                    write_line(final)
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled generation (e.g. early stop on a complete JSON document)
+                    server._record('cancelled')
+                    self.close_connection = True
+
+            @staticmethod
+            def _message(content: str, is_chat: bool, model: str) -> Dict[str, Any]:
+                payload = {
+                    'model': model,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'done': False
+                }
+                if is_chat:
+                    payload['message'] = {'role': 'assistant', 'content': content}
+                else:
+                    payload['response'] = content
+                return payload
+
+            @staticmethod
+            def _final_stats(eval_count: int, started: float, prompt_chars: int) -> Dict[str, Any]:
+                elapsed_ns = int((time.perf_counter() - started) * 1e9)
+                return {
+                    'done': True,
+                    'done_reason': 'stop',
+                    'total_duration': elapsed_ns,
+                    'eval_duration': elapsed_ns,
+                    'prompt_eval_count': prompt_chars // 4,
+                    'eval_count': eval_count
+                }
+
+        return Handler
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline Ollama stand-in for benchmarks")
+    parser.add_argument('--fixtures', default=str(Path(__file__).parent / 'fixtures' / 'responses.json'),
+                        help="JSON file with canned responses")
+    parser.add_argument('--prompts-dir', default='prompts', help="YAML prompts used to recognise step names")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=None, help="Generation speed (default: instant)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible error injection")
+    args = parser.parse_args(argv)
+
+    responses = CannedResponses.from_file(args.fixtures, args.prompts_dir if Path(args.prompts_dir).exists() else None)
+    server = FakeOllamaServer(
+        responses,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+
+    print(f"🧪 Fake Ollama listening on {server.url} "
+          f"({len(responses.by_step)} step, {len(responses.by_hash)} hash, {len(responses.by_substring)} substring fixtures)")
+    print(f"   export OLLAMA_HOST={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️ Stopped. Stats: {json.dumps(server.stats)}")
+    finally:
+        server.httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the prompt engine's own overhead.
+Runs every prompt in prompts/ against the matching files in examples/ with an
+in-process fake LLM, and reports per-stage wall time, peak memory and throughput.
+With --http the LLM calls instead go over real HTTP to the fake Ollama server, through
+the engine's pooled ollama/httpx client (optionally with simulated generation speed).
+Cases run round-robin, and regressions are judged on each stage's fastest warm run, timed
+without memory tracing.
+
+Usage (from the overhaul directory):
+    python -m benchmarks.run_benchmarks --iterations 5 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --http --latency 0.2 --tokens-per-second 40
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import yaml
+
+from core.prompt_engine import PromptEngine
+from core.llm_processor import LLMProcessor
+from benchmarks.fake_ollama_server import CannedResponses, FakeOllamaServer, _TOKEN_PIECE
+
+STAGES = ['load_config', 'validate', 'inputs', 'databases', 'pipeline', 'outputs', 'total']
+
+class InProcessOllamaClient:
+    """Minimal stand-in for ollama.AsyncClient that answers from canned responses instantly"""
+
+    def __init__(self, responses: CannedResponses):
+        self.responses = responses
+
+    async def chat(self, model: str = '', messages=None, options=None, format=None, stream: bool = False, **kwargs):
+        prompt = next((m.get('content', '') for m in reversed(messages or []) if m.get('role') == 'user'), '')
+        _, entry = self.responses.resolve(prompt)
+        text = entry.get('response', '')
+        if not isinstance(text, str):
+            text = json.dumps(text, indent=2)
+
+        if not stream:
+            return {'message': {'role': 'assistant', 'content': text}, 'done': True}
+
+        async def pieces():
+            tokens = _TOKEN_PIECE.findall(text)
+            for piece in tokens:
+                yield {'message': {'role': 'assistant', 'content': piece}, 'done': False}
+            yield {'message': {'role': 'assistant', 'content': ''}, 'done': True, 'eval_count': len(tokens)}
+
+        return pieces()
+
+    async def close(self):
+        pass
+
+class FakeLLMProcessor(LLMProcessor):
+    """LLMProcessor whose client is an in-process fake, so the real extraction/validation code runs"""
+
+    def __init__(self, responses: CannedResponses, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = responses
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = InProcessOllamaClient(self.responses)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+def discover_cases(prompts_dir: Path, examples_dir: Path) -> List[Dict[str, Any]]:
+    """Pair each prompt with every example file its first file input accepts"""
+    cases = []
+    examples = sorted(p for p in examples_dir.iterdir() if p.suffix.lower() in ('.txt', '.pdf'))
+
+    for prompt_file in sorted(prompts_dir.glob('*.yaml')):
+        with open(prompt_file, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+        file_inputs = [i for i in config.get('inputs', []) if i.get('type') == 'file']
+        if not file_inputs:
+            continue
+        formats = [fmt.lower().lstrip('.') for fmt in file_inputs[0].get('formats', ['txt'])]
+
+        for example in examples:
+            if example.suffix.lower().lstrip('.') not in formats:
+                continue
+            inputs = {}
+            for spec in config.get('inputs', []):
+                inputs[spec['name']] = str(example) if spec.get('type') == 'file' else spec.get('default', '')
+            cases.append({
+                'name': f"{prompt_file.stem}/{example.name}",
+                'prompt_file': str(prompt_file),
+                'inputs': inputs,
+                'input_bytes': example.stat().st_size
+            })
+
+    return cases
+
+def run_case(case: Dict[str, Any],
+             responses: CannedResponses,
+             outputs_dir: str,
+             llm_host: Optional[str] = None,
+             trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Run one prompt/example pair once and collect timings (over HTTP when llm_host is set).
+    With trace_memory, also peak memory; tracing slows allocation-heavy code several times over,
+    so timed runs leave it off.
+    """
+    engine = PromptEngine(outputs_dir=outputs_dir, enable_llm_cache=False, enable_extraction_cache=False)
+    max_concurrency = engine.llm_processor.max_concurrency
+    engine.llm_processor = (LLMProcessor(host=llm_host, max_concurrency=max_concurrency) if llm_host
+                            else FakeLLMProcessor(responses, max_concurrency=max_concurrency))
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = asyncio.run(engine.run_prompt(case['prompt_file'], inputs=case['inputs']))
+    total = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings = dict(result.get('stage_timings') or engine.last_stage_timings)
+    timings['total'] = total
+
+    extraction_us = sum(
+        step.get('json_extraction', {}).get('elapsed_us', 0)
+        for step in (result.get('pipeline_results') or {}).values()
+        if isinstance(step, dict)
+    )
+
+    return {
+        'success': bool(result.get('success')),
+        'error': result.get('error'),
+        'timings': timings,
+        'json_extraction_us': extraction_us,
+        'peak_memory_bytes': peak
+    }
+
+def summarize(case: Dict[str, Any], runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce repeated runs to the fastest warm time per stage (the first run is reported separately as cold).
+    Scheduler and GC noise only ever add time, so the minimum is the stable estimate of what the code
+    costs and what compare() gates on; the median is kept alongside for reading.
+    """
+    warm = runs[1:] or runs
+    stages = {
+        stage: min(run['timings'].get(stage, 0.0) for run in warm)
+        for stage in STAGES
+    }
+    medians = {
+        stage: statistics.median(run['timings'].get(stage, 0.0) for run in warm)
+        for stage in STAGES
+    }
+    return {
+        'success': all(run['success'] for run in runs),
+        'errors': sorted({run['error'] for run in runs if run['error']}),
+        'iterations': len(runs),
+        'cold_total_s': runs[0]['timings']['total'],
+        'stages_s': stages,
+        'stages_median_s': medians,
+        'json_extraction_us': min(run['json_extraction_us'] for run in warm),
+        'peak_memory_bytes': max(run['peak_memory_bytes'] for run in runs if run['peak_memory_bytes'] is not None),
+        'input_bytes': case['input_bytes'],
+        'throughput_bytes_per_s': case['input_bytes'] / stages['total'] if stages['total'] else None
+    }
+
+def compare(report: Dict[str, Any],
+            baseline: Dict[str, Any],
+            threshold: float,
+            min_delta: float,
+            min_memory_delta: int = 256 * 1024) -> List[str]:
+    """
+    List stages that got slower than baseline by more than threshold (and min_delta seconds), likewise peak
+    memory (by more than threshold and min_memory_delta bytes)
+    """
+    regressions = []
+    if report.get('transport', 'in-process') != baseline.get('transport', 'in-process'):
+        return [f"transport differs from baseline ({report.get('transport')} vs {baseline.get('transport', 'in-process')})"]
+    for name, current in report['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous:
+            continue
+        for stage in STAGES:
+            old = previous['stages_s'].get(stage)
+            new = current['stages_s'].get(stage)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append(f"{name} [{stage}]: {old * 1000:.1f}ms -> {new * 1000:.1f}ms (+{(new / old - 1) * 100:.0f}%)"
+                                   if old else f"{name} [{stage}]: 0ms -> {new * 1000:.1f}ms")
+
+        old_mem = previous.get('peak_memory_bytes')
+        new_mem = current.get('peak_memory_bytes')
+        if old_mem and new_mem and new_mem > old_mem * (1 + threshold) and new_mem - old_mem > min_memory_delta:
+            regressions.append(f"{name} [peak memory]: {old_mem / 1e6:.1f}MB -> {new_mem / 1e6:.1f}MB")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the prompt engine with a fake LLM")
+    parser.add_argument('--prompts-dir', default='prompts')
+    parser.add_argument('--examples-dir', default='examples')
+    parser.add_argument('--fixtures', default=str(Path(__file__).parent / 'fixtures' / 'responses.json'))
+    parser.add_argument('--iterations', type=int, default=9)
+    parser.add_argument('--filter', default=None, help="Only run cases whose name contains this text")
+    parser.add_argument('--output', default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', default=None, help="Compare against this stored report")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed relative slowdown per stage")
+    parser.add_argument('--min-delta', type=float, default=0.005, help="Ignore slowdowns smaller than this (seconds)")
+    parser.add_argument('--min-memory-delta', type=int, default=256 * 1024,
+                        help="Ignore peak memory growth smaller than this (bytes)")
+    parser.add_argument('--save-baseline', default=None, help="Store this run as the new baseline")
+    parser.add_argument('--verbose', action='store_true', help="Show engine output")
+    parser.add_argument('--http', action='store_true', help="Call the LLM over HTTP through the fake Ollama server")
+    parser.add_argument('--latency', type=float, default=0.0, help="With --http: seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=None, help="With --http: generation speed")
+    args = parser.parse_args(argv)
+
+    responses = CannedResponses.from_file(args.fixtures, args.prompts_dir)
+    cases = discover_cases(Path(args.prompts_dir), Path(args.examples_dir))
+    if args.filter:
+        cases = [case for case in cases if args.filter in case['name']]
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': args.iterations,
+        'transport': 'http' if args.http else 'in-process',
+        'cases': {}
+    }
+
+    server = None
+    if args.http:
+        server = FakeOllamaServer(responses, port=0, latency=args.latency, tokens_per_second=args.tokens_per_second)
+        print(f"🧪 Fake Ollama listening on {server.start()}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as outputs_dir:
+        runs = {case['name']: [] for case in cases}
+        # Round-robin over the cases, so each case's runs are spread over the whole session and a slow
+        # stretch of the machine cannot cover all of them
+        for iteration in range(max(1, args.iterations)):
+            print(f"⏱️ Iteration {iteration + 1}/{max(1, args.iterations)}", file=sys.stderr)
+            for case in cases:
+                quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+                with quiet:
+                    # Peak memory comes from the cold run, which is not part of the warm timings
+                    runs[case['name']].append(run_case(case, responses, outputs_dir, server.url if server else None,
+                                                       trace_memory=iteration == 0))
+
+        for case in cases:
+            summary = summarize(case, runs[case['name']])
+            report['cases'][case['name']] = summary
+            status = "✅" if summary['success'] else f"❌ {summary['errors']}"
+            print(f"⏱️ {case['name']}: total {summary['stages_s']['total'] * 1000:.1f}ms, "
+                  f"peak {summary['peak_memory_bytes'] / 1e6:.1f}MB {status}", file=sys.stderr)
+
+    if server is not None:
+        server.stop()
+        report['server'] = server.stats
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    else:
+        print(output)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(output, encoding='utf-8')
+        print(f"💾 Baseline saved to {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta, args.min_memory_delta)
+        if regressions:
+            print("❌ Performance regressions:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions beyond {args.threshold * 100:.0f}% of baseline", file=sys.stderr)
+
+    return 0 if all(case['success'] for case in report['cases'].values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,15 @@ from .database_autodiscovery import DatabaseAutoDiscovery, SmartDatabaseWrapper
 from .function_registry import DatabaseFunctionRegistry
 from .template_analyzer import TemplateAnalyzer
 from .file_processor import FileProcessor
+from .clause_segmenter import ClauseTree
+from .clause_relevance import ClauseRelevance
+from .document_windows import DocumentWindower
 from .llm_processor import LLMProcessor
+from .llm_cache import LLMResponseCache
+from .extraction_cache import ExtractionCache
+from .connection_pool import SQLiteConnectionPool
+from .catalog_snapshot import CatalogSnapshot
+from .compliance_engine import ComplianceEngine
 
 __all__ = [
     'PromptEngine',
@@ -17,5 +25,13 @@ __all__ = [
     'DatabaseFunctionRegistry',
     'TemplateAnalyzer',
     'FileProcessor',
-    'LLMProcessor'
+    'ClauseTree',
+    'ClauseRelevance',
+    'DocumentWindower',
+    'LLMProcessor',
+    'LLMResponseCache',
+    'ExtractionCache',
+    'SQLiteConnectionPool',
+    'CatalogSnapshot',
+    'ComplianceEngine'
 ]
\ No newline at end of file
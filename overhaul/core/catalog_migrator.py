@@ -0,0 +1,274 @@
+# core/catalog_migrator.py
+"""
+Rebuild a catalog database (e.g. databases/meters.db) with a primary key on the main table,
+declared foreign keys and indexes on the child tables, lookup indexes for templates and an
+FTS5 full-text index (kept current by triggers) for databases.<name>.fulltext(), and the
+MeterSpecs table of parsed numeric specs behind databases.<name>.filter().
+
+The repository ships the catalog unmigrated; run the migration once after checkout (the code
+falls back to in-memory search and spec parsing until then).
+
+Usage (from the overhaul directory):
+    python -m core.catalog_migrator databases/meters.db
+    python -m core.catalog_migrator databases/meters.db --check
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .connection_pool import SQLiteConnectionPool, list_user_tables
+from .fulltext_index import FULLTEXT_TABLE, fts5_available, install_fulltext, missing_fulltext
+from .spec_parser import SPEC_TABLE, install_spec_table, spec_table_status
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+class CatalogMigrator:
+    """Add keys, foreign keys and indexes to a catalog database without changing its data"""
+
+    def __init__(self,
+                 db_path: str,
+                 main_table: str = 'Meters',
+                 primary_key: str = 'id',
+                 fk_column: str = 'meter_id',
+                 lookup_columns: Tuple[str, ...] = ('model_name', 'series_name', 'device_short_name'),
+                 fulltext: bool = True):
+        self.db_path = db_path
+        self.main_table = main_table
+        self.primary_key = primary_key
+        self.fk_column = fk_column
+        self.lookup_columns = lookup_columns
+        self.fulltext = fulltext and main_table == 'Meters' and fts5_available()
+
+    def _open_read_only(self) -> sqlite3.Connection:
+        """Open the catalog without creating it, so a mistyped path is an error instead of an empty database"""
+        if not os.path.isfile(self.db_path):
+            raise FileNotFoundError(f"Catalog database not found: {self.db_path}")
+        return sqlite3.connect(Path(self.db_path).resolve().as_uri() + '?mode=ro', uri=True)
+
+    def _columns(self, conn: sqlite3.Connection, table: str) -> List[Dict[str, Any]]:
+        return [
+            {'name': row[1], 'type': row[2], 'notnull': row[3], 'default': row[4], 'pk': row[5]}
+            for row in conn.execute(f"PRAGMA table_info({_quote(table)})")
+        ]
+
+    def _tables(self, conn: sqlite3.Connection) -> List[str]:
+        return sorted(list_user_tables(conn))
+
+    def _child_tables(self, conn: sqlite3.Connection) -> List[str]:
+        return [
+            table for table in self._tables(conn)
+            if table != self.main_table and any(c['name'] == self.fk_column for c in self._columns(conn, table))
+        ]
+
+    def _index_plan(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """Index name -> CREATE INDEX statement for every index the catalog should have"""
+        plan = {}
+        main_columns = {c['name'] for c in self._columns(conn, self.main_table)}
+        main = _quote(self.main_table)
+
+        # The rowid (INTEGER PRIMARY KEY) is stored in every index, so these cover id lookups by name
+        if 'model_name' in self.lookup_columns and 'model_name' in main_columns:
+            plan[f"idx_{self.main_table.lower()}_model_name"] = f"ON {main}(model_name)"
+        if 'series_name' in self.lookup_columns and 'series_name' in main_columns:
+            # series_name + model_name covers the series summary (GROUP BY series, list models)
+            extra = ', model_name' if 'model_name' in main_columns else ''
+            plan[f"idx_{self.main_table.lower()}_series_name"] = f"ON {main}(series_name{extra})"
+        for column in self.lookup_columns:
+            if column not in ('model_name', 'series_name') and column in main_columns:
+                plan[f"idx_{self.main_table.lower()}_{column.lower()}"] = f"ON {main}({_quote(column)})"
+
+        for table in self._child_tables(conn):
+            plan[f"idx_{table.lower()}_{self.fk_column}"] = f"ON {_quote(table)}({_quote(self.fk_column)})"
+
+        return {name: f"CREATE INDEX IF NOT EXISTS {_quote(name)} {target}" for name, target in plan.items()}
+
+    def pending_changes(self, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+        """Describe what a migration would change (empty when the catalog is up to date)"""
+        own = conn is None
+        conn = conn or self._open_read_only()
+        try:
+            if self.main_table not in self._tables(conn):
+                raise ValueError(f"Main table {self.main_table} not found in {self.db_path}")
+
+            changes = []
+            main_pk = [c for c in self._columns(conn, self.main_table) if c['pk']]
+            if [c['name'] for c in main_pk] != [self.primary_key] or main_pk[0]['type'].upper() != 'INTEGER':
+                changes.append(f"{self.main_table}.{self.primary_key} -> INTEGER PRIMARY KEY")
+
+            for table in self._child_tables(conn):
+                fks = conn.execute(f"PRAGMA foreign_key_list({_quote(table)})").fetchall()
+                if not any(fk[2] == self.main_table and fk[3] == self.fk_column for fk in fks):
+                    changes.append(f"{table}.{self.fk_column} -> REFERENCES {self.main_table}({self.primary_key})")
+
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+            changes.extend(f"create index {name}" for name in self._index_plan(conn) if name not in existing)
+
+            if self.fulltext:
+                changes.extend(f"create full-text {name}" for name in missing_fulltext(conn))
+
+            if self.main_table == 'Meters':
+                status = spec_table_status(conn)
+                if status:
+                    changes.append(f"rebuild {SPEC_TABLE} ({status})")
+
+            if not conn.execute("SELECT name FROM sqlite_master WHERE name='sqlite_stat1'").fetchone():
+                changes.append("ANALYZE")
+            return changes
+        finally:
+            if own:
+                conn.close()
+
+    def _row_counts(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+                for table in self._tables(conn)}
+
+    def _rebuild_table(self, conn: sqlite3.Connection, table: str, make_primary: bool):
+        """Recreate a table with the same columns plus the primary key or foreign key constraint"""
+        definitions = []
+        for column in self._columns(conn, table):
+            definition = _quote(column['name'])
+            if make_primary and column['name'] == self.primary_key:
+                definition += " INTEGER PRIMARY KEY"
+            else:
+                if column['type']:
+                    definition += f" {column['type']}"
+                if column['notnull']:
+                    definition += " NOT NULL"
+                if column['default'] is not None:
+                    definition += f" DEFAULT {column['default']}"
+                if not make_primary and column['name'] == self.fk_column:
+                    definition += (f" REFERENCES {_quote(self.main_table)}({_quote(self.primary_key)})"
+                                   f" ON DELETE CASCADE")
+            definitions.append(definition)
+
+        names = ', '.join(_quote(c['name']) for c in self._columns(conn, table))
+        staging = _quote(f"{table}__migrating")
+        # Indexes and triggers are dropped with the table (e.g. full-text or spec triggers from an
+        # earlier migration); recreate them on the rebuilt table
+        attached = [row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL "
+            "ORDER BY type = 'trigger'", (table,)
+        )]
+        conn.execute(f"DROP TABLE IF EXISTS {staging}")
+        conn.execute(f"CREATE TABLE {staging} (\n\t" + ',\n\t'.join(definitions) + "\n)")
+        conn.execute(f"INSERT INTO {staging} ({names}) SELECT {names} FROM {_quote(table)}")
+        conn.execute(f"DROP TABLE {_quote(table)}")
+        # Triggers on other tables may name this one; without legacy mode the rename rejects them
+        # while the table is briefly missing
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        try:
+            conn.execute(f"ALTER TABLE {staging} RENAME TO {_quote(table)}")
+        finally:
+            conn.execute("PRAGMA legacy_alter_table = OFF")
+        for statement in attached:
+            conn.execute(statement)
+
+    def migrate(self, backup: bool = True) -> Dict[str, Any]:
+        """Rebuild the catalog in a copy, verify it, then swap it into place"""
+        changes = self.pending_changes()
+        if not changes:
+            print(f"✅ {os.path.basename(self.db_path)} is already migrated")
+            return {'migrated': False, 'changes': []}
+
+        print(f"🔧 Migrating {os.path.basename(self.db_path)}: {len(changes)} changes")
+        work_path = f"{self.db_path}.migrating"
+        shutil.copyfile(self.db_path, work_path)
+
+        try:
+            conn = sqlite3.connect(work_path, isolation_level=None)
+            try:
+                before = self._row_counts(conn)
+
+                ids = conn.execute(
+                    f"SELECT COUNT(*), COUNT(DISTINCT {_quote(self.primary_key)}), "
+                    f"SUM({_quote(self.primary_key)} IS NULL) FROM {_quote(self.main_table)}"
+                ).fetchone()
+                if ids[0] != ids[1] or ids[2]:
+                    raise ValueError(f"{self.main_table}.{self.primary_key} has duplicate or NULL values")
+
+                conn.execute("PRAGMA foreign_keys = OFF")
+                conn.execute("BEGIN")
+                main_pk = [c['name'] for c in self._columns(conn, self.main_table) if c['pk']]
+                if main_pk != [self.primary_key]:
+                    self._rebuild_table(conn, self.main_table, make_primary=True)
+                for table in self._child_tables(conn):
+                    fks = conn.execute(f"PRAGMA foreign_key_list({_quote(table)})").fetchall()
+                    if not any(fk[2] == self.main_table for fk in fks):
+                        self._rebuild_table(conn, table, make_primary=False)
+                parsed = install_spec_table(conn) if self.main_table == 'Meters' else None
+                for statement in self._index_plan(conn).values():
+                    conn.execute(statement)
+                indexed = install_fulltext(conn) if self.fulltext else None
+                conn.execute("COMMIT")
+
+                conn.execute("ANALYZE")
+                after = self._row_counts(conn)
+                orphans = conn.execute("PRAGMA foreign_key_check").fetchall()
+                integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+                conn.execute("VACUUM")
+
+                # Derived tables are rebuilt from the catalog, so only source tables must keep their rows
+                lost = {t: (count, after.get(t)) for t, count in before.items()
+                        if t != SPEC_TABLE and after.get(t) != count}
+                if lost:
+                    raise ValueError(f"Row counts changed during migration: {lost}")
+                if integrity != 'ok':
+                    raise ValueError(f"Integrity check failed: {integrity}")
+                if parsed is not None and parsed != after[self.main_table]:
+                    raise ValueError(f"{SPEC_TABLE} parsed {parsed} of {after[self.main_table]} rows")
+                if indexed is not None and indexed != after[self.main_table]:
+                    raise ValueError(f"{FULLTEXT_TABLE} indexed {indexed} of {after[self.main_table]} rows")
+                remaining = self.pending_changes(conn)
+                if remaining:
+                    raise ValueError(f"Migration incomplete: {remaining}")
+            finally:
+                conn.close()
+
+            # Pooled read-only connections still point at the old file
+            SQLiteConnectionPool.close_all(self.db_path)
+            if backup:
+                shutil.copyfile(self.db_path, f"{self.db_path}.bak")
+            os.replace(work_path, self.db_path)
+        except Exception:
+            if os.path.exists(work_path):
+                os.remove(work_path)
+            raise
+
+        if orphans:
+            print(f"⚠️ {len(orphans)} child rows reference a missing {self.main_table}.{self.primary_key}")
+        print(f"✅ Migrated {len(after)} tables, row counts verified ({sum(after.values())} rows)")
+        return {'migrated': True, 'changes': changes, 'row_counts': after, 'orphans': len(orphans)}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Add keys, foreign keys and indexes to a catalog database")
+    parser.add_argument('db_path')
+    parser.add_argument('--main-table', default='Meters')
+    parser.add_argument('--fk-column', default='meter_id')
+    parser.add_argument('--check', action='store_true', help="Only list pending changes")
+    parser.add_argument('--no-backup', action='store_true', help="Do not keep a .bak copy of the original")
+    parser.add_argument('--no-fulltext', action='store_true', help="Do not build the FTS5 search index")
+    args = parser.parse_args(argv)
+
+    migrator = CatalogMigrator(args.db_path, main_table=args.main_table, fk_column=args.fk_column,
+                               fulltext=not args.no_fulltext)
+    try:
+        if args.check:
+            changes = migrator.pending_changes()
+            for change in changes:
+                print(f"  - {change}")
+            print("✅ Up to date" if not changes else f"🔧 {len(changes)} pending changes")
+            return 1 if changes else 0
+        migrator.migrate(backup=not args.no_backup)
+        return 0
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
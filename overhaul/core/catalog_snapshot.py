@@ -0,0 +1,294 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from .connection_pool import SQLiteConnectionPool, list_user_tables
+
+@lru_cache(maxsize=256)
+def _like_pattern(pattern: str) -> 're.Pattern':
+    """Compile a SQL LIKE pattern (% and _ wildcards, ASCII-only case folding like SQLite)"""
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.ASCII | re.DOTALL)
+
+def sql_like(value: Any, pattern: str) -> bool:
+    """Evaluate `value LIKE pattern` the way SQLite does (NULL never matches)"""
+    if value is None:
+        return False
+    return _like_pattern(pattern).fullmatch(value if isinstance(value, str) else str(value)) is not None
+
+def sql_equals(value: Any, param: Any) -> bool:
+    """Evaluate `value = param` for a TEXT-affinity column (NULL never matches)"""
+    if value is None or param is None:
+        return False
+    if value == param:
+        return True
+    # SQLite converts a numeric parameter to text when comparing against a text column
+    return isinstance(value, str) and not isinstance(param, str) and value == str(param)
+
+@lru_cache(maxsize=64)
+def _resolved(db_path: str) -> str:
+    return str(Path(db_path).resolve())
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+class CatalogSnapshot:
+    """Immutable in-memory copy of a catalog database, stored as one array per column"""
+
+    _shared: Dict[str, 'CatalogSnapshot'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self,
+                 db_path: str,
+                 main_table: str,
+                 primary_key: str,
+                 relations: List[Dict[str, str]]):
+        self.db_path = _resolved(db_path)
+        self.main_table = main_table
+        self.primary_key = primary_key
+        self.relations = relations
+        self.columns: Dict[str, Tuple[str, ...]] = {}
+        self.data: Dict[str, Tuple[Tuple[Any, ...], ...]] = {}
+        self.row_counts: Dict[str, int] = {}
+        self.load_ms = 0.0
+        self._indexes: Dict[Tuple[str, str], Dict[Any, Tuple[int, ...]]] = {}
+        self._derived: Dict[str, Any] = {}
+        # Guards the watch connection and the lazily built indexes and derived objects
+        self._lock = threading.RLock()
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._file_state = None
+
+    @classmethod
+    def shared(cls,
+               db_path: str,
+               main_table: str,
+               primary_key: str,
+               relations: List[Dict[str, str]]) -> 'CatalogSnapshot':
+        """Get the process-wide snapshot of a database, reloading it if the file changed"""
+        key = _resolved(db_path)
+        with cls._shared_lock:
+            snapshot = cls._shared.get(key)
+            if (snapshot is not None
+                    and snapshot.main_table == main_table
+                    and snapshot.relations == relations
+                    and not snapshot.is_stale()):
+                return snapshot
+
+            if snapshot is not None and snapshot.file_changed():
+                # Pooled connections still read the file they opened, which a replaced catalog
+                # (e.g. the migrator's os.replace) no longer is
+                SQLiteConnectionPool.close_all(key)
+
+            fresh = cls(db_path, main_table, primary_key, relations)
+            fresh.load()
+            if snapshot is not None:
+                print(f"🔄 Catalog changed, reloaded snapshot of {os.path.basename(db_path)}")
+                snapshot.close()
+            cls._shared[key] = fresh
+            return fresh
+
+    def _current_file_state(self) -> Tuple[int, int, int, int]:
+        stat = os.stat(self.db_path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def file_changed(self) -> bool:
+        """True when the database file was rewritten or replaced (or is gone) since the load"""
+        try:
+            return self._current_file_state() != self._file_state
+        except OSError:
+            return True
+
+    def load(self):
+        """Read every table into column arrays inside a single read transaction"""
+        started = time.perf_counter()
+
+        # A dedicated connection sees data_version change whenever any other connection commits
+        self._watch = sqlite3.connect(Path(self.db_path).as_uri() + '?mode=ro', uri=True, check_same_thread=False)
+        self._data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        self._file_state = self._current_file_state()
+
+        pool = SQLiteConnectionPool.for_database(self.db_path)
+        with pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                tables = list_user_tables(conn)
+                for table in tables:
+                    columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+                    order = self.primary_key if table == self.main_table and self.primary_key in columns else 'rowid'
+                    try:
+                        rows = conn.execute(f'SELECT * FROM "{table}" ORDER BY {order}').fetchall()
+                    except sqlite3.OperationalError:
+                        # WITHOUT ROWID tables have no rowid to order by
+                        rows = conn.execute(f'SELECT * FROM "{table}"').fetchall()
+
+                    self.columns[table] = tuple(_intern(c) for c in columns)
+                    self.data[table] = tuple(
+                        tuple(_intern(row[i]) for row in rows) for i in range(len(columns))
+                    )
+                    self.row_counts[table] = len(rows)
+            finally:
+                conn.execute("COMMIT")
+
+        self.load_ms = (time.perf_counter() - started) * 1000
+        print(f"📸 Loaded catalog snapshot of {os.path.basename(self.db_path)}: "
+              f"{sum(self.row_counts.values())} rows in {self.load_ms:.1f}ms")
+
+    def is_stale(self) -> bool:
+        """True once the database file was replaced or another connection committed a change"""
+        try:
+            if self.file_changed():
+                return True
+            with self._lock:
+                return self._watch.execute("PRAGMA data_version").fetchone()[0] != self._data_version
+        except Exception:
+            return True
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
+
+    def _row(self, table: str, index: int) -> Dict[str, Any]:
+        return {name: column[index] for name, column in zip(self.columns[table], self.data[table])}
+
+    def _index(self, table: str, column: str) -> Dict[Any, Tuple[int, ...]]:
+        """Row positions by column value, built on first use"""
+        key = (table, column)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    positions: Dict[Any, List[int]] = {}
+                    values = self.data[table][self.columns[table].index(column)]
+                    for position, value in enumerate(values):
+                        positions.setdefault(value, []).append(position)
+                    index = {value: tuple(found) for value, found in positions.items()}
+                    self._indexes[key] = index
+        return index
+
+    def derived(self, name: str, build: Callable[[], Any]) -> Any:
+        """Object computed from this snapshot's data, built on first use and shared by every wrapper until a reload"""
+        if name not in self._derived:
+            with self._lock:
+                # Built once even when several threads ask at the same time
+                if name not in self._derived:
+                    self._derived[name] = build()
+        return self._derived[name]
+
+    def has_table(self, table: str) -> bool:
+        return table in self.columns
+
+    def rows(self, table: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All rows of a table (fresh dicts, safe to modify)"""
+        count = self.row_counts.get(table, 0)
+        return [self._row(table, i) for i in range(count if limit is None else min(limit, count))]
+
+    def where(self, table: str, criteria: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows matching every criterion: '=' by default, LIKE for string values containing %"""
+        if table not in self.columns:
+            return []
+
+        candidates: Optional[List[int]] = None
+        filters = []
+        for column, value in criteria.items():
+            if column not in self.columns[table]:
+                continue
+            if isinstance(value, str) and '%' in value:
+                filters.append((self.columns[table].index(column), value))
+            elif isinstance(value, str) or value is None:
+                # Exact string match: answer from the column index
+                matches = self._index(table, column).get(value, ()) if value is not None else ()
+                if candidates is None:
+                    candidates = list(matches)
+                else:
+                    keep = set(matches)
+                    candidates = [i for i in candidates if i in keep]
+            else:
+                filters.append((self.columns[table].index(column), value))
+
+        positions = range(self.row_counts[table]) if candidates is None else sorted(candidates)
+        results = []
+        data = self.data[table]
+        for position in positions:
+            if all(sql_like(data[c][position], v) if isinstance(v, str) else sql_equals(data[c][position], v)
+                   for c, v in filters):
+                results.append(self._row(table, position))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def specifications(self, models: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Main rows keyed by model name with '<table>_data' lists of related rows attached"""
+        table = self.main_table
+        if table not in self.columns or 'model_name' not in self.columns[table]:
+            return {}
+
+        by_model = self._index(table, 'model_name')
+        wanted = list(dict.fromkeys(m for m in models if m)) if models is not None else [
+            m for m in dict.fromkeys(self.data[table][self.columns[table].index('model_name')]) if m is not None
+        ]
+
+        specifications = {}
+        for model in wanted:
+            positions = by_model.get(model)
+            if positions:
+                # Keep the first match per model, like the old LIMIT 1 lookup
+                specifications[model] = self._with_related(positions[0])
+        return specifications
+
+    def _with_related(self, position: int) -> Dict[str, Any]:
+        row = self._row(self.main_table, position)
+        for rel in self.relations:
+            if rel['table'] not in self.columns or rel['parent_column'] not in row:
+                continue
+            parent_id = row[rel['parent_column']]
+            if parent_id is None:
+                continue
+            children = self._index(rel['table'], rel['column']).get(parent_id)
+            if children:
+                row[f"{rel['table'].lower()}_data"] = [self._row(rel['table'], i) for i in children]
+        return row
+
+    def series_summary(self) -> List[Dict[str, Any]]:
+        """Series with model counts and a comma-separated model list (ordered like SQLite's ORDER BY)"""
+        table = self.main_table
+        if table not in self.columns or 'series_name' not in self.columns[table]:
+            return []
+
+        models = self.data[table][self.columns[table].index('model_name')] if 'model_name' in self.columns[table] else None
+        summary = []
+        for series, positions in self._index(table, 'series_name').items():
+            names = [models[i] for i in positions if models[i] is not None] if models else []
+            summary.append({
+                'series_name': series,
+                'model_count': len(positions),
+                'sample_models': ', '.join(sorted(str(n) for n in names)) if names else None
+            })
+        # NULL sorts first, then numbers before text, like SQLite
+        summary.sort(key=lambda s: (s['series_name'] is not None,
+                                    isinstance(s['series_name'], str),
+                                    s['series_name'] if s['series_name'] is not None else 0))
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.db_path,
+            'tables': len(self.columns),
+            'rows': sum(self.row_counts.values()),
+            'load_ms': round(self.load_ms, 2)
+        }
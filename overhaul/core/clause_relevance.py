@@ -0,0 +1,210 @@
+import math
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+
+from .clause_segmenter import ClauseTree
+from .connection_pool import list_user_tables
+
+# Catalog feature tables (table, text column) whose wording makes up the domain vocabulary
+VOCABULARY_SOURCES: List[Tuple[str, str]] = [
+    ('Measurements', 'measurement_type'),
+    ('PowerQualityAnalysis', 'analysis_feature'),
+    ('CommunicationProtocols', 'protocol'),
+    ('Certifications', 'certification'),
+    ('AccuracyClasses', 'accuracy_class'),
+    ('MeasurementAccuracy', 'parameter'),
+    ('InputsOutputs', 'description'),
+    ('DataRecordings', 'recording_type'),
+    ('DeviceApplications', 'application'),
+]
+
+# Words the feature tables and column names use as glue or identifiers rather than as features
+_STOP_WORDS = {
+    'and', 'or', 'the', 'of', 'to', 'at', 'in', 'on', 'by', 'for', 'per', 'with', 'without', 'via', 'over',
+    'up', 'no', 'not', 'all', 'each', 'any', 'as', 'an', 'is', 'be', 'from', 'into', 'only', 'available',
+    'conforming', 'including', 'based', 'type', 'total', 'value', 'last', 'present',
+    'id', 'name', 'serie', 'model', 'blurb', 'product', 'device', 'short', 'column', 'st', 'nd', 'rd', 'th',
+}
+
+# Standards bodies: a number right after one of these is a standard ('IEC 62053'), others are noise
+_STANDARD_BODIES = {'iec', 'en', 'ieee', 'ul', 'ansi', 'csa', 'c', 'bs', 'din'}
+
+# Letters, numbers and class suffixes split apart, so 'IEC62053-22' and 'IEC 62053-22' give the same terms
+_TOKEN = re.compile(r'\d+(?:\.\d+)?s?(?![a-z\d])|[a-z]+')
+
+# Text outside numbered clauses (a preamble, or a document without numbering) is scored in blocks of this many lines
+_BLOCK_LINES = 12
+
+# Share of its siblings' average relevance a clause inherits
+_SIBLING_WEIGHT = 0.5
+
+def _stem(token: str) -> str:
+    """Plural to singular, so 'harmonics' matches 'harmonic' and 'classes' matches 'class'"""
+    if len(token) <= 3 or token[0].isdigit() or not token.endswith('s') or token.endswith(('ss', 'us', 'is')):
+        return token
+    if token.endswith(('sses', 'xes', 'ches', 'shes')):
+        return token[:-2]
+    return token[:-1]
+
+# Lower-to-upper case boundary inside an identifier ('AccuracyClasses')
+_CAMEL = re.compile(r'(?<=[a-z])(?=[A-Z])')
+
+def tokenize(text: str) -> List[str]:
+    # Split identifiers ('AccuracyClasses', 'operating_temp') into words first
+    text = _CAMEL.sub(' ', text or '').lower().replace('_', ' ')
+    return [_stem(token) for token in _TOKEN.findall(text)]
+
+def _terms(text: str) -> List[str]:
+    """Vocabulary terms in catalog text: words, standard numbers ('IEC 62053' -> 62053) and S classes (0.2s)"""
+    tokens = tokenize(text)
+    terms = []
+    for previous, token in zip([''] + tokens, tokens):
+        if token[0].isdigit():
+            if token.endswith('s') or (previous in _STANDARD_BODIES and len(token.replace('.', '')) >= 3):
+                terms.append(token)
+        elif len(token) >= 2 and token not in _STOP_WORDS:
+            terms.append(token)
+    return terms
+
+def build_vocabulary(conn: sqlite3.Connection, main_table: str) -> Dict[str, int]:
+    """
+    Domain term -> number of catalog rows using it, from whichever feature tables exist, plus the
+    names of those tables, the main table and their columns (display, memory, humidity, ...) for spec attributes
+    """
+    tables = set(list_user_tables(conn))
+    vocabulary: Counter = Counter()
+    sources = [table for table, _ in VOCABULARY_SOURCES if table in tables] + ([main_table] if main_table in tables else [])
+    for table in sources:
+        names = [table] + [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+        vocabulary.update({term for name in names for term in _terms(name)})
+
+    for table, column in VOCABULARY_SOURCES:
+        if table not in tables:
+            continue
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        if column not in columns:
+            continue
+        for (text,) in conn.execute(f'SELECT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL'):
+            vocabulary.update(set(_terms(str(text))))
+    return dict(vocabulary)
+
+def _blocks(lines: List[str], label: str, page: Optional[int] = None) -> List[Dict[str, Any]]:
+    units = []
+    for start in range(0, len(lines), _BLOCK_LINES):
+        text = "\n".join(lines[start:start + _BLOCK_LINES]).strip()
+        if text:
+            units.append({'clause_id': f"{label} {start + 1}-{min(start + _BLOCK_LINES, len(lines))}",
+                          'text': text, 'page': page, 'parent': None})
+    return units
+
+def document_units(document: Any) -> List[Dict[str, Any]]:
+    """
+    Scorable pieces of a document: each numbered clause with its list items folded in ('parent' is
+    the index of its enclosing clause). Text outside numbered clauses is split into line blocks.
+    """
+    if isinstance(document, ClauseTree):
+        tree, content, page_offsets = document, '', document.page_offsets
+    elif isinstance(document, dict):
+        content, page_offsets = document.get('content') or '', document.get('page_offsets')
+        tree = document.get('clauses') or ClauseTree(content, page_offsets)
+    else:
+        content, page_offsets = str(document or ''), None
+        tree = ClauseTree(content)
+
+    if not tree:
+        return _blocks(content.splitlines(), 'lines')
+
+    units = _blocks(tree.preamble, 'preamble', 1 if page_offsets else None)
+    positions = {}
+    for clause in tree:
+        if clause.kind != 'numbered':
+            continue
+        text = "\n".join([clause.text] + [item.full_text for item in clause.children if item.kind == 'item'])
+        positions[id(clause)] = len(units)
+        units.append({'clause_id': clause.id, 'text': text, 'page': clause.page,
+                      'parent': positions.get(id(clause.parent)) if clause.parent else None})
+    return units
+
+class ClauseRelevance:
+    """BM25 score of every document unit against the catalog's domain vocabulary"""
+
+    def __init__(self, vocabulary: Dict[str, int], k1: float = 1.2, b: float = 0.75):
+        self.vocabulary = vocabulary
+        self.k1 = k1
+        self.b = b
+
+    def score(self, units: List[Dict[str, Any]], tokens: Optional[List[List[str]]] = None) -> List[float]:
+        """Raw BM25 score per unit, with the units themselves as the corpus for IDF (tokens: tokenized unit texts)"""
+        if tokens is None:
+            tokens = [tokenize(unit['text']) for unit in units]
+        counts = [Counter(token for token in unit_tokens if token in self.vocabulary) for unit_tokens in tokens]
+        lengths = [max(1, len(unit_tokens)) for unit_tokens in tokens]
+        if not units:
+            return []
+        average = sum(lengths) / len(lengths)
+
+        frequency: Counter = Counter()
+        for terms in counts:
+            frequency.update(terms.keys())
+        idf = {term: math.log(1 + (len(units) - n + 0.5) / (n + 0.5)) for term, n in frequency.items()}
+
+        scores = []
+        for terms, length in zip(counts, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / average)
+            scores.append(sum(idf[term] * tf * (self.k1 + 1) / (tf + norm) for term, tf in terms.items()))
+        return scores
+
+    def select(self,
+               document: Any,
+               threshold: float = 0.15,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Clauses whose relevance reaches `threshold`, in document order, each with its 'relevance' and
+        the domain terms it matched. Relevance is the BM25 score over the mean of the top tenth of scores
+        (capped at 1). A clause also gets half the average relevance of its siblings, so a short line in a
+        list of meter specs ('Frequency ±0.005Hz') stays with it. Enclosing clauses come along as context.
+        """
+        units = document_units(document)
+        tokens = [tokenize(unit['text']) for unit in units]
+        scores = self.score(units, tokens)
+        ranked = sorted(scores, reverse=True)
+        top = ranked[:max(1, len(ranked) // 10)]
+        if not top or top[0] <= 0:
+            print("🎯 No clauses match the catalog vocabulary")
+            return []
+        reference = sum(top) / len(top)
+        relevance = [min(1.0, score / reference) for score in scores]
+
+        siblings = defaultdict(list)
+        for index, unit in enumerate(units):
+            if unit['parent'] is not None:
+                siblings[unit['parent']].append(index)
+        for members in siblings.values():
+            context = _SIBLING_WEIGHT * sum(relevance[i] for i in members) / len(members)
+            for index in members:
+                relevance[index] = max(relevance[index], context)
+
+        chosen = [value >= threshold for value in relevance]
+        if limit is not None and sum(chosen) > limit:
+            best = set(sorted((i for i, keep in enumerate(chosen) if keep), key=lambda i: -scores[i])[:limit])
+            chosen = [i in best for i in range(len(units))]
+        for index in [i for i, keep in enumerate(chosen) if keep]:
+            parent = units[index]['parent']
+            while parent is not None and not chosen[parent]:
+                chosen[parent] = True
+                parent = units[parent]['parent']
+
+        selected = []
+        for unit, unit_tokens, value, keep in zip(units, tokens, relevance, chosen):
+            if keep:
+                terms = sorted({token for token in unit_tokens if token in self.vocabulary})
+                selected.append({'clause_id': unit['clause_id'], 'text': unit['text'], 'page': unit['page'],
+                                 'relevance': round(value, 4), 'terms': terms})
+
+        total = sum(len(unit['text']) for unit in units)
+        kept = sum(len(unit['text']) for unit in selected)
+        print(f"🎯 Kept {len(selected)} of {len(units)} clauses at relevance >= {threshold:g} "
+              f"({kept:,} of {total:,} chars)")
+        return selected
@@ -0,0 +1,349 @@
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+# '6.5.1 Text', '7.0 TITLE', 'Clause 7.0 – Title', 'Section 4 General'
+_NUMBERED = re.compile(r'(?:(clause|section)\s+)?(\d+(?:\.\d+)+|\d+)\.?(?=\s|$)\s*(?:[–—:-]\s*)?', re.IGNORECASE)
+# 'a. Text', 'b) Text', '(c) Text', 'ii) Text', '(3) Text'
+_MARKER = re.compile(r'(?:\(([a-z]{1,4}|\d{1,2})\)|([a-z]{1,4}|\d{1,2})[.)])\s+', re.IGNORECASE)
+
+# Pieces of a clause id that normalize_id() rewrites: the keyword, '(a)' suffixes and spaced dots
+_ID_KEYWORD = re.compile(r'^\s*(?:clause|section)\s+', re.IGNORECASE)
+_ID_PARENS = re.compile(r'\(([^)]*)\)')
+_ID_DOTS = re.compile(r'\s*\.\s*')
+
+_ROMAN = ['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x', 'xi', 'xii', 'xiii', 'xiv', 'xv']
+
+# Digits, generalised to '#' when comparing page headers and footers
+_DIGIT = re.compile(r'\d')
+
+# Lines at the top/bottom of a page that repeat on at least this share of pages are running headers/footers
+_HEADER_SHARE = 0.5
+_EDGE_LINES = 3
+
+@dataclass
+class Clause:
+    """One numbered clause or list item with its own lines and nested sub-clauses"""
+    id: str
+    heading: str
+    level: int
+    start: int
+    end: int
+    page: Optional[int] = None
+    kind: str = 'numbered'
+    lines: List[str] = field(default_factory=list)
+    children: List['Clause'] = field(default_factory=list)
+    parent: Optional['Clause'] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        """This clause's own text (heading line and continuation lines, without sub-clauses)"""
+        return "\n".join(self.lines)
+
+    @property
+    def full_text(self) -> str:
+        """This clause and its whole subtree, in document order"""
+        return "\n".join(clause.text for clause in self.walk())
+
+    def walk(self):
+        """This clause and every descendant, depth first in document order"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, full: bool = True) -> Dict[str, Any]:
+        return {'clause_id': self.id, 'text': self.full_text if full else self.text}
+
+    def __str__(self) -> str:
+        return self.full_text
+
+def normalize_id(clause_id: Any) -> str:
+    """'Clause 6.6.10(a)' -> '6.6.10.a', '7.0.' -> '7.0'"""
+    text = _ID_KEYWORD.sub('', str(clause_id or ''))
+    text = _ID_PARENS.sub(r'.\1', text.strip()).strip('. ').lower()
+    return _ID_DOTS.sub('.', text)
+
+@lru_cache(maxsize=4096)
+def _numbers(clause_id: str) -> Tuple[int, ...]:
+    """Numeric path with trailing zero parts dropped, so '7.0' heads the same section as '7'"""
+    parts = [int(p) for p in clause_id.split('.')]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+def _page_edges(lines: List[Tuple[int, str]], page_offsets: Optional[List[int]]) -> Dict[int, List[int]]:
+    """Page -> indexes of its first and last few non-empty lines, where running headers/footers sit"""
+    pages = defaultdict(list)
+    if page_offsets:
+        for index, (offset, line) in enumerate(lines):
+            if line.strip():
+                pages[bisect_right(page_offsets, offset) - 1].append(index)
+    return {page: indexes[:_EDGE_LINES] + indexes[-_EDGE_LINES:] for page, indexes in pages.items()}
+
+def _running_headers(lines: List[Tuple[int, str]], edges: Dict[int, List[int]]) -> Tuple[set, List[str]]:
+    """
+    Running headers/footers, with digits generalised to '#': whole lines repeated at the top or
+    bottom of most pages, and prefixes such a line leaves glued to the first text of a page.
+    """
+    if len(edges) < 3:
+        return set(), []
+
+    # Group page-edge lines by how they start; a group found on most pages is a header/footer
+    groups = defaultdict(dict)
+    for page, indexes in edges.items():
+        for index in indexes:
+            shape = _DIGIT.sub('#', lines[index][1].strip())
+            groups[shape[:12]].setdefault(page, shape)
+
+    exact, prefixes = set(), []
+    needed = max(3, int(len(edges) * _HEADER_SHARE))
+    for members in groups.values():
+        if len(members) < needed:
+            continue
+        shapes = set(members.values())
+        if len(shapes) == 1:
+            exact |= shapes
+            continue
+        # Never cut into the page's own text, which often starts with a clause number
+        prefix = os.path.commonprefix(list(shapes)).rstrip('#. ')
+        if len(prefix) >= 8:
+            prefixes.append(prefix)
+    return exact, sorted(prefixes, key=len, reverse=True)
+
+def _strip_header(line: str, exact: set, prefixes: List[str]) -> Tuple[str, int]:
+    """Remove a running header from a line; returns the rest and how many characters went"""
+    shape = _DIGIT.sub('#', line.strip())
+    if shape in exact:
+        return "", len(line)
+    shape = _DIGIT.sub('#', line)
+    for prefix in prefixes:
+        if shape.startswith(prefix):
+            return line[len(prefix):], len(prefix)
+    return line, 0
+
+class ClauseTree:
+    """Clauses of a document found from their numbering ('6.5.1', 'a.', '(ii)', 'Clause 7.0'), nested by level"""
+
+    def __init__(self, content: str = "", page_offsets: Optional[List[int]] = None):
+        self.page_offsets = page_offsets
+        self._roots: List[Clause] = []
+        self._preamble: List[str] = []
+        self._by_id: Dict[str, List[Clause]] = defaultdict(list)
+        # Parsed on first use, so a document whose prompt never reads its clauses pays nothing
+        self._content: Optional[str] = content or ""
+        self._lock = threading.Lock()
+
+    def _ensure_parsed(self):
+        if self._content is None:
+            return
+        with self._lock:
+            if self._content is not None:
+                self._parse(self._content)
+                self._content = None
+
+    @property
+    def roots(self) -> List[Clause]:
+        self._ensure_parsed()
+        return self._roots
+
+    @property
+    def preamble(self) -> List[str]:
+        """Lines before the first numbered clause"""
+        self._ensure_parsed()
+        return self._preamble
+
+    @property
+    def _index(self) -> Dict[str, List[Clause]]:
+        self._ensure_parsed()
+        return self._by_id
+
+    @classmethod
+    def from_text(cls, content: str, page_offsets: Optional[List[int]] = None) -> 'ClauseTree':
+        return cls(content, page_offsets)
+
+    # --- Lookup ---
+
+    def get(self, clause_id: Any, default: Any = None) -> Optional[Clause]:
+        """First clause with this id ('6.5', 'Clause 7.0', '6.6.10(a)')"""
+        found = self._index.get(normalize_id(clause_id))
+        return found[0] if found else default
+
+    def get_all(self, clause_id: Any) -> List[Clause]:
+        """Every clause with this id (tenders reuse numbering across sections)"""
+        return list(self._index.get(normalize_id(clause_id), []))
+
+    def subtree(self, clause_id: Any) -> List[Clause]:
+        """A clause and all its descendants in document order (empty when the id is unknown)"""
+        clause = self.get(clause_id)
+        return list(clause.walk()) if clause else []
+
+    def text(self, clause_id: Any, default: str = "") -> str:
+        """Full text of a clause and its sub-clauses"""
+        clause = self.get(clause_id)
+        return clause.full_text if clause else default
+
+    def select(self, clause_ids: List[Any]) -> List[Dict[str, Any]]:
+        """{'clause_id', 'text'} for each requested clause that exists, subtrees included"""
+        selected = (self.get(clause_id) for clause_id in clause_ids or [])
+        return [clause.to_dict() for clause in selected if clause is not None]
+
+    def requirements(self) -> List[Dict[str, Any]]:
+        """{'clause_id', 'text'} for every clause in document order (own text only, no repetition)"""
+        return [clause.to_dict(full=False) for clause in self]
+
+    def ids(self) -> List[str]:
+        return [clause.id for clause in self]
+
+    def outline(self) -> str:
+        """Indented clause ids and headings, e.g. for a prompt that picks clauses to read"""
+        return "\n".join(f"{'  ' * clause.level}{clause.id} {clause.heading}".rstrip() for clause in self)
+
+    def __iter__(self):
+        for root in self.roots:
+            yield from root.walk()
+
+    def __len__(self) -> int:
+        return sum(len(found) for found in self._index.values())
+
+    def __contains__(self, clause_id: Any) -> bool:
+        return normalize_id(clause_id) in self._index
+
+    def __bool__(self) -> bool:
+        return bool(self.roots)
+
+    def __str__(self) -> str:
+        return self.outline()
+
+    # --- Parsing ---
+
+    def _page(self, offset: int) -> Optional[int]:
+        return bisect_right(self.page_offsets, offset) if self.page_offsets else None
+
+    def _parse(self, content: str):
+        lines = []
+        offset = 0
+        for line in content.splitlines(keepends=True):
+            lines.append((offset, line.rstrip('\r\n')))
+            offset += len(line)
+        edges = _page_edges(lines, self.page_offsets)
+        exact, prefixes = _running_headers(lines, edges)
+        edge_lines = {index for indexes in edges.values() for index in indexes} if exact or prefixes else set()
+
+        stack: List[Clause] = []
+        for index, (offset, raw) in enumerate(lines):
+            line, stripped = _strip_header(raw, exact, prefixes) if index in edge_lines else (raw, 0)
+            indent = len(line) - len(line.lstrip())
+            line = line.strip()
+            if not line:
+                continue
+            start = offset + stripped + indent
+
+            clause = self._numbered(line, start, stack) or self._list_item(line, start, stack)
+            if clause is None:
+                if stack:
+                    # Continuation line (including text carried over a page break)
+                    stack[-1].lines.append(line)
+                    stack[-1].end = start + len(line)
+                    stack[-1].heading = stack[-1].heading or line
+                else:
+                    self._preamble.append(line)
+                continue
+            if stack and clause is stack[-1]:
+                continue
+
+            parent = stack[-1] if stack else None
+            clause.parent = parent
+            clause.level = parent.level + 1 if parent else 0
+            (parent.children if parent else self._roots).append(clause)
+            self._by_id[normalize_id(clause.id)].append(clause)
+            stack.append(clause)
+
+    def _numbered(self, line: str, start: int, stack: List[Clause]) -> Optional[Clause]:
+        match = _NUMBERED.match(line)
+        if not match:
+            return None
+        keyword, number = match.group(1), match.group(2)
+        heading = line[match.end():].strip()
+        if not keyword and '.' not in number:
+            # A bare '6 ' starts a quantity far more often than a heading
+            return None
+
+        numbers = _numbers(number)
+        open_clauses = [c for c in stack if c.kind == 'numbered']
+        if not keyword:
+            # A number alone on its line, or one that does not fit the open clauses, is just text
+            if numbers[0] == 0 or (not open_clauses and not heading[:1].isupper() and not heading[:1].isdigit()):
+                return None
+            if open_clauses and not self._plausible(numbers, open_clauses, strict=not heading):
+                return None
+
+        # Close everything that is not an ancestor of the new clause
+        while stack:
+            top = stack[-1]
+            if top.kind == 'numbered':
+                current = _numbers(top.id)
+                if len(numbers) > len(current) and numbers[:len(current)] == current:
+                    break
+                if current == numbers and not top.children:
+                    # Repeated heading ('Clause 7.0 - Title' then '7.0 TITLE') continues the same clause
+                    top.lines.append(line)
+                    top.end = start + len(line)
+                    top.heading = top.heading or heading
+                    return top
+            stack.pop()
+
+        return Clause(id=number, heading=heading, level=0, start=start, end=start + len(line),
+                      page=self._page(start), lines=[line])
+
+    @staticmethod
+    def _plausible(numbers: Tuple[int, ...], open_clauses: List[Clause], strict: bool = False) -> bool:
+        """Whether a number fits the open clauses (a child, a later sibling or a new section), unlike '0.9 lagging'"""
+        for clause in open_clauses:
+            current = _numbers(clause.id)
+            if numbers[:-1] == current:
+                return True
+            if len(numbers) == len(current) and numbers[:-1] == current[:-1] and numbers[-1] > current[-1]:
+                return True
+        if strict:
+            return False
+        # The next top-level section ('7.0' after '6.5.3'); new sections restart their numbering
+        # ('7.1' after '6.6.12', or '6.1' under a '7.0' heading)
+        section = _numbers(open_clauses[0].id)[0]
+        if len(numbers) == 1 and numbers[0] == section + 1:
+            return True
+        return numbers[-1] <= 1 or (numbers[0] > section and numbers[-1] <= 2)
+
+    def _list_item(self, line: str, start: int, stack: List[Clause]) -> Optional[Clause]:
+        if not stack:
+            return None
+        match = _MARKER.match(line)
+        if not match:
+            return None
+        marker = (match.group(1) or match.group(2)).lower()
+
+        # A marker continuing an open list is a sibling; anything else must start a new list (a / i / 1)
+        for depth in range(len(stack) - 1, -1, -1):
+            items = [c for c in stack[depth].children if c.kind == 'item']
+            if items and self._follows(items[-1].id.rsplit('.', 1)[-1], marker):
+                del stack[depth + 1:]
+                break
+        else:
+            if marker not in ('a', 'i', '1'):
+                return None
+
+        parent = stack[-1]
+        return Clause(id=f"{parent.id}.{marker}", heading=line[match.end():].strip(), level=0,
+                      start=start, end=start + len(line), page=self._page(start), kind='item', lines=[line])
+
+    @staticmethod
+    def _follows(previous: str, marker: str) -> bool:
+        if previous.isdigit() and marker.isdigit():
+            return int(marker) == int(previous) + 1
+        if previous in _ROMAN and marker in _ROMAN and _ROMAN.index(marker) == _ROMAN.index(previous) + 1:
+            return True
+        return len(previous) == 1 and len(marker) == 1 and previous.isalpha() and ord(marker) == ord(previous) + 1
@@ -0,0 +1,454 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from .spec_parser import (MEMORY_UNITS, SPEC_FIELDS, SOURCE_TABLES, compare, parse_meter_specs, parse_percent,
+                          parse_range)
+
+# Clause numbers like '6.5.3' at the start of a requirement line
+_CLAUSE_ID = re.compile(r'^\s*(?:clause\s+)?(\d+(?:\.\d+)+)\.?\s+', re.IGNORECASE)
+
+def _word(*words: str) -> str:
+    """Whole-word alternatives written literal-first: re scans for a leading literal much faster than for \\b"""
+    return '|'.join(rf'{word}\b(?<!\w{word})' for word in words)
+
+# Protocol / interface name -> pattern over the lower-cased catalog text
+PROTOCOLS: Dict[str, str] = {
+    'Modbus TCP/IP': r'modbus\s*tcp',
+    'Modbus RTU': r'modbus\s*(?:rtu|serial)',
+    'BACnet': r'bacnet',
+    'DNP3': r'dnp\s*3',
+    'IEC 61850': r'iec\s*61850',
+    'IEC 60870-5-104': r'60870-5-104',
+    'Profibus': r'profibus',
+    'M-Bus': _word('mbus', 'm-bus'),
+    'LonWorks': r'lon\s*works',
+    'DLMS': r'dlms',
+    'SNTP': _word('ntp', 'sntp'),
+    'NTP': _word('ntp', 'sntp'),
+    'PTP': _word('ptp') + r'|ieee\s*1588',
+    'SNMP': _word('snmp'),
+    'SMTP': _word('smtp') + r'|e-?mail',
+    'FTP': _word('ftp', 'sftp'),
+    'HTTP': _word('http', 'https') + r'|web\s*server',
+    'RSTP': _word('rstp'),
+    'RS-485': r'rs\s*-?\s*485',
+    'Ethernet': r'ethernet|rj\s*-?\s*45',
+}
+
+# How each protocol is written in a requirement (falls back to the catalog pattern)
+_PROTOCOL_MENTIONS: Dict[str, str] = {
+    'Modbus RTU': r'modbus\s*rtu',
+    'SNTP': r'\bsntp\b',
+    'NTP': r'\bntp\b',
+    'SMTP': r'\bsmtp\b',
+    'HTTP': r'\bhttps?\b|web\s*server',
+}
+
+# Measured quantity as written in a requirement -> MeasurementAccuracy.parameter (lower-cased)
+ACCURACY_PARAMETERS: Dict[str, str] = {
+    'voltage': 'voltage',
+    'volts': 'voltage',
+    'current': 'current',
+    'active power': 'active_power',
+    'real power': 'active_power',
+    'reactive power': 'reactive_power',
+    'apparent power': 'apparent_power',
+    'active energy': 'active_energy',
+    'reactive energy': 'reactive_energy',
+    'apparent energy': 'apparent_energy',
+    'frequency': 'frequency',
+    'thd': 'thd_and_individual_harmonics',
+}
+
+@dataclass
+class Check:
+    """One measurable condition recognised in a requirement"""
+    kind: str
+    label: str
+    field: Optional[str] = None
+    operator: Optional[str] = None
+    value: Any = None
+    pattern: Optional[str] = None
+    standard: Optional[str] = None
+    quantity: Optional[str] = None
+
+@dataclass
+class MeterProfile:
+    """What the rules know about one meter: parsed numeric specs plus its catalog text"""
+    model_name: str
+    specs: Dict[str, Any]
+    text: str
+    accuracy_classes: List[str] = field(default_factory=list)
+    accuracy_by_parameter: Dict[str, float] = field(default_factory=dict)
+    _class_rows: Optional[List[Tuple[str, Optional[float], str]]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_specification(cls, meter: Dict[str, Any]) -> 'MeterProfile':
+        """Build from a get_specifications() record (main row plus '<table>_data' lists)"""
+        related = {table: meter.get(f"{table.lower()}_data") or [] for table in SOURCE_TABLES[1:]}
+        specs = meter.get('specs') or parse_meter_specs(meter, related)
+
+        texts = [v for k, v in meter.items() if isinstance(v, str)]
+        for key, rows in meter.items():
+            if key.endswith('_data') and isinstance(rows, list):
+                texts.extend(str(v) for row in rows for v in row.values() if isinstance(v, str))
+
+        by_parameter: Dict[str, float] = {}
+        for row in related['MeasurementAccuracy']:
+            percent = parse_percent(row.get('accuracy'))
+            if percent is not None:
+                parameter = str(row.get('parameter') or '').lower()
+                by_parameter[parameter] = min(percent, by_parameter.get(parameter, percent))
+
+        return cls(
+            model_name=str(meter.get('model_name') or meter.get('id') or 'meter'),
+            specs=specs,
+            text=' ; '.join(texts).lower(),
+            accuracy_classes=[r.get('accuracy_class') for r in related['AccuracyClasses'] if r.get('accuracy_class')],
+            accuracy_by_parameter=by_parameter
+        )
+
+    def accuracy_rank(self,
+                      standard: Optional[str] = None,
+                      quantity: Optional[str] = None) -> Tuple[Optional[float], str]:
+        """Best accuracy class as a rank (lower is better, 0.2S ranks ahead of 0.2) and where it came from"""
+        if self._class_rows is None:
+            # (compacted text, best rank in the row, row) parsed once; scoring asks for many quantities
+            self._class_rows = []
+            for row in self.accuracy_classes:
+                ranks = [class_rank(float(number), bool(s_class))
+                         for number, s_class in re.findall(r'class\s+(\d+(?:\.\d+)?)\s*(s)?\b', row, re.IGNORECASE)]
+                self._class_rows.append((_compact(row), min(ranks) if ranks else None, row))
+
+        # Classes for the named quantity only; active energy (the tariff class) when none is named
+        phrase = _compact(quantity or 'active_energy')
+        named = [entry for entry in self._class_rows if phrase in entry[0]]
+        rows = named if quantity or named else self._class_rows
+        if standard:
+            conforming = [entry for entry in rows if _compact(standard) in entry[0]]
+            rows = conforming or rows
+
+        best: Tuple[Optional[float], str] = (None, '')
+        for _, rank, row in rows:
+            if rank is not None and (best[0] is None or rank < best[0]):
+                best = (rank, row)
+        if best[0] is None and quantity in (None, 'active_energy') and self.specs.get('accuracy_class') is not None:
+            best = (self.specs['accuracy_class'], f"class {self.specs['accuracy_class']:g}")
+        return best
+
+def class_rank(value: float, s_class: bool) -> float:
+    """Accuracy class as one comparable number: class 0.2S is stricter than 0.2 but looser than 0.1"""
+    return value - 0.01 if s_class else value
+
+def _compact(text: str) -> str:
+    return re.sub(r'[\s_]', '', text).lower()
+
+def _number(text: str) -> float:
+    return float(text.replace('−', '-').replace('–', '-').replace('+', ''))
+
+def _format(field_name: str, value: Any) -> str:
+    if value is None:
+        return 'not specified'
+    unit = SPEC_FIELDS.get(field_name, '')
+    if unit == 'B':
+        for name, size in sorted(MEMORY_UNITS.items(), key=lambda item: -item[1]):
+            if value >= size:
+                return f"{value / size:.3g} {name.upper()}"
+    if unit in ('count', 'level', 'order', 'IP digit', 'class', 'bool', 'samples/cycle'):
+        return f"{value:g}" if isinstance(value, float) else str(value)
+    return f"{value:g} {unit}"
+
+def split_requirements(text: str) -> List[str]:
+    """Numbered requirement lines from a tender text (continuation lines stay with their clause)"""
+    lines = [line.strip() for line in (text or '').splitlines() if line.strip()]
+    if not any(_CLAUSE_ID.match(line) for line in lines):
+        return lines
+
+    requirements: List[str] = []
+    for line in lines:
+        if _CLAUSE_ID.match(line) or not requirements:
+            requirements.append(line)
+        else:
+            requirements[-1] += f"\n{line}"
+    return requirements
+
+def clause_id(requirement: str) -> Optional[str]:
+    match = _CLAUSE_ID.match(requirement)
+    return match.group(1) if match else None
+
+# --- Recognisers: requirement text -> checks (empty when the rule does not apply) ---
+
+def accuracy_checks(text: str) -> List[Check]:
+    checks = []
+    standard = re.search(r'\b(?:IEC|EN|ANSI)\s*-?\s*(62053-2[1-4]|61557-12|C12\.20|50470-3)', text, re.IGNORECASE)
+    classes = re.findall(r'\b(?:cl(?:ass)?\.?|class\s+of)\s*(\d+(?:\.\d+)?)\s*(s)?\b', text, re.IGNORECASE)
+    if classes:
+        # Alternatives ('class 0.2S or ... class of 0.2') are satisfied by the most lenient one
+        rank = max(class_rank(float(number), bool(s_class)) for number, s_class in classes)
+        number, s_class = next((n, s) for n, s in classes if class_rank(float(n), bool(s)) == rank)
+        lowered = text.lower()
+        quantity = next((ACCURACY_PARAMETERS[name] for name in sorted(ACCURACY_PARAMETERS, key=len, reverse=True)
+                         if ' ' in name and name in lowered), None)
+        label = f"{quantity.replace('_', ' ')} class" if quantity else 'accuracy class'
+        checks.append(Check('accuracy_class', f"{label} {number}{s_class.upper()}",
+                            field='accuracy_rank', operator='lte', value=rank,
+                            standard=standard.group(1) if standard and len(classes) == 1 else None,
+                            quantity=quantity))
+
+    if classes:
+        return checks
+
+    # '<quantity>[/<quantity>] ±0.2%', e.g. 'Voltage / Current ±0.1%' or 'Active power 0.5%'
+    quantity = re.fullmatch(r'\s*(?:accuracy\s*(?:of|for)?\s*)?([A-Za-z /,\-]+?)\s*(?:accuracy)?\s*[:\-]?\s*'
+                            r'(?:±|\+/-)?\s*(\d+(?:\.\d+)?)\s*%\s*', text, re.IGNORECASE)
+    if quantity:
+        name = re.sub(r'\b(?:true\s+rms|v?l-?[ln])\b', '', quantity.group(1), flags=re.IGNORECASE)
+        parts = [' '.join(p.split()).lower() for p in re.split(r'/|,|\band\b', name) if p.strip()]
+        if parts and all(p in ACCURACY_PARAMETERS for p in parts):
+            for part in dict.fromkeys(parts):
+                checks.append(Check('accuracy_percent', f"{part} accuracy ±{quantity.group(2)}%",
+                                    field=f"accuracy:{ACCURACY_PARAMETERS[part]}", operator='lte',
+                                    value=float(quantity.group(2))))
+            return checks
+
+    percent = re.search(r'accura\w*[^%]*?(?:±|\+/-)?\s*(\d+(?:\.\d+)?)\s*%', text, re.IGNORECASE)
+    if percent:
+        lowered = text.lower()
+        target = ('voltage_accuracy_pct' if 'voltage' in lowered and 'current' not in lowered else
+                  'current_accuracy_pct' if 'current' in lowered and 'voltage' not in lowered else 'accuracy_pct')
+        checks.append(Check('accuracy_percent', f"accuracy ±{percent.group(1)}%",
+                            field=target, operator='lte', value=float(percent.group(1))))
+    return checks
+
+def power_quality_class_checks(text: str) -> List[Check]:
+    match = re.search(r'\bclass\s+([AS])\b', text, re.IGNORECASE)
+    if not match or not re.search(r'power\s+(?:quality|analy[sz]er)|61000-4-30|\bPQ', text, re.IGNORECASE):
+        return []
+    pq_class = match.group(1).lower()
+    # A class A instrument also meets a class S requirement
+    wanted = 'a' if pq_class == 'a' else '[as]'
+    return [Check('power_quality_class', f"IEC 61000-4-30 class {pq_class.upper()}",
+                  pattern=rf'61000-4-30\W*(?:class\s+)?{wanted}\b|61000-4-30[^;]*\bclass\s+{wanted}\b|pqi-{wanted}\b')]
+
+def protocol_checks(text: str) -> List[Check]:
+    lowered = text.lower()
+    checks = []
+    for name, pattern in PROTOCOLS.items():
+        if re.search(_PROTOCOL_MENTIONS.get(name, pattern), lowered):
+            checks.append(Check('protocol', name, pattern=pattern))
+    return checks
+
+def io_checks(text: str) -> List[Check]:
+    inputs = sum(int(n) for n in re.findall(
+        r'(\d+)\s*(?:x\s*)?(?:nos?\.?\s*)?(?:digital\s+inputs?|status\s+inputs?|DI\b|binary\s+inputs?)', text, re.IGNORECASE))
+    outputs = sum(int(n) for n in re.findall(
+        r'(\d+)\s*(?:x\s*)?(?:nos?\.?\s*)?(?:digital\s+outputs?|relay\s+outputs?|pulse\s+outputs?|DO\b|RO\b)', text, re.IGNORECASE))
+    checks = []
+    if inputs:
+        checks.append(Check('io', f"{inputs} digital inputs", field='digital_inputs', operator='gte', value=inputs))
+    if outputs:
+        checks.append(Check('io', f"{outputs} digital/relay outputs", field='digital_outputs', operator='gte', value=outputs))
+    return checks
+
+def temperature_checks(text: str) -> List[Check]:
+    if not re.search(r'temperature', text, re.IGNORECASE) or not re.search(r'°|\bdeg', text, re.IGNORECASE):
+        return []
+    low, high = parse_range(text[re.search(r'temperature', text, re.IGNORECASE).end():])
+    if low is None:
+        return []
+    prefix = 'storage_temp' if re.search(r'storage', text, re.IGNORECASE) else 'temp'
+    label = 'storage temperature' if prefix == 'storage_temp' else 'operating temperature'
+    checks = [Check('temperature', f"{label} down to {low:g} °C", field=f'{prefix}_min', operator='lte', value=low)]
+    if high != low:
+        checks.append(Check('temperature', f"{label} up to {high:g} °C", field=f'{prefix}_max', operator='gte', value=high))
+    return checks
+
+def voltage_checks(text: str) -> List[Check]:
+    if not re.search(r'volt|\bV(?:AC|DC)?\b|L-L|L-N', text, re.IGNORECASE):
+        return []
+    volts = [(_number(n) * (1000 if unit.lower().startswith('k') else 1))
+             for n, unit in re.findall(r'(\d+(?:\.\d+)?)\s*(kV|V)(?:AC|DC|ac|dc)?\b', text)]
+    if not volts:
+        return []
+    return [Check('voltage', f"rated voltage {max(volts):g} V", field='voltage_max', operator='gte', value=max(volts))]
+
+def ip_checks(text: str) -> List[Check]:
+    codes = re.findall(r'\bIP\s?(\d)(\d|X)\b', text, re.IGNORECASE)
+    if not codes:
+        return []
+    # A single catalog rating has to meet the strictest position named in the requirement
+    solids = max(int(s) for s, _ in codes)
+    liquids = [int(l) for _, l in codes if l.isdigit()]
+    checks = [Check('ip_rating', f"IP{solids}X or better", field='ip_solids', operator='gte', value=solids)]
+    if liquids:
+        checks.append(Check('ip_rating', f"IPX{max(liquids)} or better", field='ip_liquids', operator='gte', value=max(liquids)))
+    return checks
+
+def harmonic_checks(text: str) -> List[Check]:
+    orders = [int(n) for n in re.findall(r'(\d+)(?:st|nd|rd|th)\s*(?:order|harmonic)', text, re.IGNORECASE)]
+    orders += [int(n) for n in re.findall(r'harmonics?\s+up\s+to\s+(?:at\s+least\s+)?(?:the\s+)?(\d+)', text, re.IGNORECASE)]
+    if not orders:
+        return []
+    return [Check('harmonics', f"harmonics up to order {max(orders)}", field='harmonic_order', operator='gte', value=max(orders))]
+
+def memory_checks(text: str) -> List[Check]:
+    if not re.search(r'memory|storage|logging', text, re.IGNORECASE) or re.search(r'temperature', text, re.IGNORECASE):
+        return []
+    sizes = [_number(n) * MEMORY_UNITS[unit.lower()]
+             for n, unit in re.findall(r'(\d+(?:\.\d+)?)\s*(KB|MB|GB|TB)\b', text, re.IGNORECASE)]
+    if not sizes:
+        return []
+    return [Check('memory', f"{_format('memory_bytes', max(sizes))} memory", field='memory_bytes', operator='gte', value=max(sizes))]
+
+def standard_checks(text: str) -> List[Check]:
+    checks = []
+    for body, number in re.findall(r'\b(?:DIN\s+)?(EN|IEC|IEEE|ANSI|UL)\s*-?\s*(\d{3,5}(?:-\d+)*)', text, re.IGNORECASE):
+        if re.search(PROTOCOLS['IEC 61850'] + '|60870-5-104', f"{body} {number}", re.IGNORECASE):
+            continue
+        checks.append(Check('standard', f"{body.upper()} {number}", pattern=rf'{re.escape(number)}(?!\d)(?<![\d-]{re.escape(number)})'))
+    return checks
+
+# Rule name -> recogniser, in evaluation order
+RULES: List[Tuple[str, Callable[[str], List[Check]]]] = [
+    ('accuracy', accuracy_checks),
+    ('power_quality_class', power_quality_class_checks),
+    ('protocol', protocol_checks),
+    ('io', io_checks),
+    ('temperature', temperature_checks),
+    ('voltage', voltage_checks),
+    ('ip_rating', ip_checks),
+    ('harmonics', harmonic_checks),
+    ('memory', memory_checks),
+    ('standard', standard_checks),
+]
+
+class ComplianceEngine:
+    """Evaluate measurable tender requirements against catalog specs without an LLM"""
+
+    def __init__(self, rules: Optional[List[Tuple[str, Callable[[str], List[Check]]]]] = None):
+        self.rules = rules if rules is not None else RULES
+
+    def recognize(self, requirement: str) -> List[Check]:
+        """Every check the rules recognise in a requirement (empty: the LLM has to judge it)"""
+        text = _CLAUSE_ID.sub('', requirement, count=1)
+        checks = []
+        for _, recognizer in self.rules:
+            checks.extend(recognizer(text))
+        return checks
+
+    def evaluate_check(self, check: Check, meter: MeterProfile) -> Tuple[Optional[bool], str, bool]:
+        """(complies or None when the catalog lacks the value, what the meter offers, strictly better)"""
+        if check.pattern is not None:
+            found = re.search(check.pattern, meter.text)
+            if not found:
+                # Catalogs list only some of what a meter supports, so an unlisted protocol or
+                # standard is unknown (left to the LLM), never a failure
+                return None, f"{check.label} not listed", False
+            # Quote the catalog entry that satisfied the check
+            start = meter.text.rfind(';', 0, found.start()) + 1
+            end = meter.text.find(';', found.end())
+            return True, meter.text[start:end if end != -1 else None].strip(), False
+
+        if check.field == 'accuracy_rank':
+            actual, source = meter.accuracy_rank(check.standard, check.quantity)
+            if actual is None:
+                return None, 'no accuracy class listed', False
+            spec_value = source
+        elif check.field.startswith('accuracy:'):
+            actual = meter.accuracy_by_parameter.get(check.field.split(':', 1)[1])
+            if actual is None:
+                return None, f"{check.label.split(' accuracy')[0]} accuracy not specified", False
+            spec_value = f"±{actual:g}%"
+        else:
+            actual = meter.specs.get(check.field)
+            if actual is None:
+                return None, f"{check.field} not specified", False
+            spec_value = _format(check.field, actual)
+
+        complies = compare(actual, check.operator, check.value)
+        return complies, spec_value, complies and actual != check.value
+
+    def evaluate_requirement(self, requirement: str, meter: MeterProfile,
+                             checks: Optional[List[Check]] = None) -> Optional[Dict[str, Any]]:
+        """A verdict when every recognised check could be decided, else None"""
+        checks = self.recognize(requirement) if checks is None else checks
+        if not checks:
+            return None
+
+        results = [(check, *self.evaluate_check(check, meter)) for check in checks]
+        if any(complies is None for _, complies, _, _ in results):
+            return None
+
+        reasons = []
+        for check, complies, spec_value, better in results:
+            if complies:
+                reasons.append(f"{check.label}: meter offers {spec_value}" + (" (exceeds requirement)" if better else ""))
+            else:
+                reasons.append(f"{check.label}: meter offers {spec_value}")
+        complies = all(complies for _, complies, _, _ in results)
+        return {
+            'clause_id': clause_id(requirement),
+            'requirement': requirement,
+            'spec_value': '; '.join(spec_value for _, _, spec_value, _ in results),
+            'complies': complies,
+            'justification': ('Meets requirement. ' if complies else 'Does not meet requirement. ') + '; '.join(reasons),
+            'rules': sorted({check.kind for check in checks}),
+            'evaluated_by': 'rules'
+        }
+
+    def evaluate(self, requirements: Any, meter: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Split requirements into rule verdicts and the ones only an LLM can judge.
+        - requirements: tender text or a list of requirement strings
+        - meter: a get_specifications() record (or a MeterProfile)
+        """
+        if isinstance(requirements, str):
+            requirements = split_requirements(requirements)
+        profile = meter if isinstance(meter, MeterProfile) else MeterProfile.from_specification(meter)
+
+        analysis, unresolved = [], []
+        for position, requirement in enumerate(requirements):
+            checks = self.recognize(requirement)
+            verdict = self.evaluate_requirement(requirement, profile, checks)
+            if verdict is not None:
+                analysis.append(dict(verdict, position=position))
+            else:
+                unresolved.append({
+                    'clause_id': clause_id(requirement),
+                    'requirement': requirement,
+                    'reason': 'not a recognised measurable requirement' if not checks
+                              else 'catalog does not specify the value',
+                    'position': position
+                })
+
+        print(f"📏 Rules decided {len(analysis)}/{len(requirements)} requirements for {profile.model_name}; "
+              f"{len(unresolved)} left for the LLM")
+        return {
+            'model_name': profile.model_name,
+            'compliance_analysis': analysis,
+            'unresolved': unresolved,
+            'stats': {'requirements': len(requirements), 'rule_verdicts': len(analysis), 'llm_required': len(unresolved)}
+        }
+
+    @staticmethod
+    def merge(result: Dict[str, Any], llm_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine rule verdicts with LLM verdicts for the unresolved requirements, in tender order"""
+        positions = {item['requirement']: item['position'] for item in result.get('unresolved', [])}
+        combined = list(result.get('compliance_analysis', []))
+        for item in llm_items:
+            position = positions.get(item.get('requirement'), len(positions) + len(combined))
+            combined.append(dict(item, evaluated_by=item.get('evaluated_by', 'llm'), position=position))
+        combined.sort(key=lambda item: item.get('position', 0))
+
+        compliant = sum(1 for item in combined if item.get('complies', False))
+        return {
+            'model_name': result.get('model_name'),
+            'compliance_analysis': combined,
+            # Same threshold the chunked LLM comparison used
+            'overall_compliance': bool(combined) and compliant / len(combined) >= 0.8,
+            'areas_exceeding_requirements': [
+                item['requirement'] for item in combined if 'exceeds requirement' in str(item.get('justification', ''))
+            ],
+            'potential_issues': [item['requirement'] for item in combined if not item.get('complies', False)]
+        }
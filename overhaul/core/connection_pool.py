@@ -0,0 +1,161 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+class SQLiteConnectionPool:
+    """Per-database pool of reusable SQLite connections (read-only by default)"""
+
+    _pools: Dict[Tuple[str, bool], 'SQLiteConnectionPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self,
+                 db_path: str,
+                 read_only: bool = True,
+                 max_size: int = 4,
+                 timeout: float = 30.0,
+                 mmap_size: int = 256 * 1024 * 1024,
+                 cache_size_kb: int = 16 * 1024,
+                 cached_statements: int = 256):
+        self.db_path = str(Path(db_path).resolve())
+        self.read_only = read_only
+        self.max_size = max_size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        self.created = 0
+        self.reused = 0
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def for_database(cls, db_path: str, read_only: bool = True, **kwargs) -> 'SQLiteConnectionPool':
+        """Get the shared pool for a database file, creating it on first use"""
+        key = (str(Path(db_path).resolve()), read_only)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls(db_path, read_only=read_only, **kwargs)
+                cls._pools[key] = pool
+            return pool
+
+    @classmethod
+    def close_all(cls, db_path: Optional[str] = None):
+        """Close shared pools (all of them, or only those for one database file)"""
+        resolved = str(Path(db_path).resolve()) if db_path else None
+        with cls._pools_lock:
+            for key in list(cls._pools):
+                if resolved is None or key[0] == resolved:
+                    cls._pools.pop(key).close()
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).as_uri() + ('?mode=ro' if self.read_only else '')
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+        try:
+            conn = self._idle.get_nowait()
+            self.reused += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self.created < self.max_size
+            if can_create:
+                self.created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self.created -= 1
+                raise
+
+        # Pool exhausted: wait for another thread to hand a connection back
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"All {self.max_size} connections to {Path(self.db_path).name} stayed in use "
+                               f"for {self.timeout}s") from None
+        self.reused += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def execute(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        """Run a query on a pooled connection and return rows as dicts"""
+        with self.connection() as conn:
+            cursor = conn.execute(sql, params or ())
+            rows = [dict(row) for row in cursor.fetchall()]
+            if not self.read_only:
+                conn.commit()
+            return rows
+
+    async def aexecute(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        """Run a query in a worker thread so the event loop is not blocked"""
+        return await asyncio.to_thread(self.execute, sql, params)
+
+    def close(self):
+        """Close idle connections (borrowed ones are closed when they come back)"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self.created = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.db_path,
+            'read_only': self.read_only,
+            'connections': self.created,
+            'idle': self._idle.qsize(),
+            'reused': self.reused
+        }
+
+# Shadow tables FTS5 (and FTS3/4) keep next to a virtual table
+_SHADOW_SUFFIXES = ('data', 'idx', 'content', 'docsize', 'config', 'segments', 'segdir', 'stat')
+
+def list_user_tables(conn: sqlite3.Connection) -> List[str]:
+    """Ordinary tables of a database, without sqlite_* tables, virtual tables or their shadow tables"""
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'").fetchall()
+    virtual = [row[0] for row in rows if (row[1] or '').upper().startswith('CREATE VIRTUAL TABLE')]
+    shadow = {f"{name}_{suffix}" for name in virtual for suffix in _SHADOW_SUFFIXES}
+    return [row[0] for row in rows if row[0] not in virtual and row[0] not in shadow]
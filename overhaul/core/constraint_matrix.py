@@ -0,0 +1,261 @@
+import re
+import time
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+import numpy as np
+
+from .compliance_engine import Check, ComplianceEngine, MeterProfile, clause_id, split_requirements
+from .spec_parser import SPEC_FIELDS
+
+# Vectorized form of spec_parser's operators (NaN marks an unknown value)
+_COMPARE = {
+    'eq': np.equal,
+    'ne': np.not_equal,
+    'lt': np.less,
+    'lte': np.less_equal,
+    'gt': np.greater,
+    'gte': np.greater_equal,
+}
+
+# Check kinds a meter cannot make up for: failing one removes it from a clause's shortlist. Only
+# numeric specs can fail; protocols and standards the catalog does not list are unknown, not failed
+HARD_CONSTRAINTS = ('accuracy_class', 'accuracy_percent', 'voltage', 'io')
+
+class CatalogMatrix:
+    """Column arrays of every meter's numeric specs (NaN when unknown), built once per catalog snapshot"""
+
+    def __init__(self, profiles: List[MeterProfile], records: Optional[List[Dict[str, Any]]] = None):
+        self.profiles = profiles
+        self.model_names = [p.model_name for p in profiles]
+        self.records = records if records is not None else [{'model_name': name} for name in self.model_names]
+        self.size = len(profiles)
+        self.fields: Dict[str, np.ndarray] = {
+            field: self._array(p.specs.get(field) for p in profiles) for field in SPEC_FIELDS
+        }
+        self._derived: Dict[Tuple[Any, ...], np.ndarray] = {}
+        self._starts = self._ends = None
+
+    @classmethod
+    def from_specifications(cls, specifications: Iterable[Dict[str, Any]]) -> 'CatalogMatrix':
+        """Build from get_specifications() records (main row plus '<table>_data' lists), read in one pass"""
+        profiles, records = [], []
+        for meter in specifications:
+            records.append({key: value for key, value in meter.items() if not key.endswith('_data')})
+            profiles.append(MeterProfile.from_specification(meter))
+        return cls(profiles, records)
+
+    def _array(self, values) -> np.ndarray:
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+    def values(self, check: Check) -> np.ndarray:
+        """The catalog column a numeric check compares against"""
+        if check.field == 'accuracy_rank':
+            key = ('accuracy_rank', check.standard, check.quantity)
+            if key not in self._derived:
+                self._derived[key] = self._array(p.accuracy_rank(check.standard, check.quantity)[0]
+                                                 for p in self.profiles)
+            return self._derived[key]
+        if check.field.startswith('accuracy:'):
+            key = ('accuracy', check.field)
+            if key not in self._derived:
+                parameter = check.field.split(':', 1)[1]
+                self._derived[key] = self._array(p.accuracy_by_parameter.get(parameter) for p in self.profiles)
+            return self._derived[key]
+        return self.fields[check.field]
+
+    def found(self, pattern: str) -> np.ndarray:
+        """Whether each meter's catalog text matches a pattern (one scan of the whole catalog per pattern)"""
+        key = ('pattern', pattern)
+        if key in self._derived:
+            return self._derived[key]
+
+        # All texts in one string; starts[i] is where meter i begins. Joined per scan rather than kept,
+        # since every pattern is scanned once and the profiles already hold the text
+        text = '\x00'.join(p.text for p in self.profiles)
+        if self._starts is None:
+            lengths = np.fromiter((len(p.text) + 1 for p in self.profiles), dtype=np.int64, count=self.size)
+            self._starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if self.size else lengths
+            self._ends = self._starts + lengths - 1
+
+        compiled = re.compile(pattern)
+        found = np.zeros(self.size, dtype=bool)
+        position = 0
+        while self.size:
+            match = compiled.search(text, position)
+            if match is None:
+                break
+            meter = int(np.searchsorted(self._starts, match.start(), side='right')) - 1
+            end = int(self._ends[meter])
+            # A match running into the next meter's text does not count; retry inside this meter only
+            if match.end() > end:
+                match = compiled.search(text, match.start() + 1, end)
+            found[meter] = match is not None
+            # Presence is all that matters, so skip the rest of this meter's text
+            position = end + 1
+        self._derived[key] = found
+        return found
+
+    def outcome(self, check: Check) -> np.ndarray:
+        """1.0 pass, 0.0 fail, NaN unknown for every meter"""
+        if check.pattern is not None:
+            # Same rule as ComplianceEngine.evaluate_check: an unlisted protocol or standard is unknown
+            return np.where(self.found(check.pattern), 1.0, np.nan)
+
+        values = self.values(check)
+        with np.errstate(invalid='ignore'):
+            passed = _COMPARE[check.operator](values, check.value)
+        return np.where(np.isnan(values), np.nan, passed.astype(np.float64))
+
+class ClauseScores:
+    """N clauses x M meters satisfaction matrix with per-check outcomes kept for explanations"""
+
+    def __init__(self,
+                 requirements: List[str],
+                 checks: List[List[Check]],
+                 catalog: CatalogMatrix,
+                 outcomes: np.ndarray,
+                 owners: np.ndarray):
+        self.requirements = requirements
+        self.checks = checks
+        self.catalog = catalog
+        self.outcomes = outcomes
+        self.owners = owners
+
+        counts = np.array([len(c) for c in checks], dtype=np.int64)
+        self._scored = np.flatnonzero(counts)
+        self._starts = np.concatenate(([0], np.cumsum(counts[self._scored])[:-1])).astype(np.int64)
+        self.passed = self._per_clause(outcomes == 1.0)
+        self.failed = self._per_clause(outcomes == 0.0)
+        self.unknown = self._per_clause(np.isnan(outcomes))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Fraction of checks passed; clauses without recognised checks stay NaN
+            self.scores = np.where(counts[:, None] > 0, self.passed / counts[:, None], np.nan)
+        self.satisfied = (counts[:, None] > 0) & (self.failed == 0) & (self.unknown == 0)
+        self.counts = counts
+
+    def _per_clause(self, rows: np.ndarray) -> np.ndarray:
+        """Sum per-check rows into per-clause rows (clauses without checks stay zero)"""
+        totals = np.zeros((len(self.requirements), self.catalog.size))
+        if len(self._scored):
+            # Checks are stored clause by clause, so one reduceat sums each clause's block of rows
+            totals[self._scored] = np.add.reduceat(rows, self._starts, axis=0)
+        return totals
+
+    def _explain(self, row: int, meter: int) -> Tuple[List[str], List[str]]:
+        first = int(self.counts[:row].sum())
+        failing, unknown = [], []
+        for offset, check in enumerate(self.checks[row]):
+            outcome = self.outcomes[first + offset, meter]
+            if np.isnan(outcome):
+                unknown.append(check.label)
+            elif outcome == 0.0:
+                failing.append(check.label)
+        return failing, unknown
+
+    def top_k(self, k: int = 5) -> List[Dict[str, Any]]:
+        """Best meters per clause (score, then fewest unknowns) with the constraints each one fails"""
+        k = max(0, min(k, self.catalog.size))
+        # lexsort sorts by the last key first: highest score, then fewest unknowns, then catalog order
+        order = np.lexsort((self.unknown, -np.nan_to_num(self.scores, nan=-1.0)), axis=1)[:, :k]
+
+        results = []
+        for row, requirement in enumerate(self.requirements):
+            entry = {
+                'clause_id': clause_id(requirement),
+                'requirement': requirement,
+                'constraints': [check.label for check in self.checks[row]],
+                'meters': []
+            }
+            if self.counts[row]:
+                for meter in order[row]:
+                    failing, unknown = self._explain(row, meter)
+                    entry['meters'].append({
+                        'model_name': self.catalog.model_names[meter],
+                        'score': round(float(self.scores[row, meter]), 4),
+                        'satisfied': bool(self.satisfied[row, meter]),
+                        'failing': failing,
+                        'unknown': unknown
+                    })
+            results.append(entry)
+        return results
+
+    def meter_ranking(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Meters ordered by how many scorable clauses they fully satisfy"""
+        scorable = self.counts > 0
+        satisfied = self.satisfied[scorable].sum(axis=0)
+        mean_score = np.nan_to_num(self.scores[scorable]).mean(axis=0) if scorable.any() else np.zeros(self.catalog.size)
+        order = np.lexsort((-mean_score, -satisfied))[:k]
+        return [{
+            'model_name': self.catalog.model_names[i],
+            'clauses_satisfied': int(satisfied[i]),
+            'clauses_scored': int(scorable.sum()),
+            'mean_score': round(float(mean_score[i]), 4)
+        } for i in order]
+
+    def shortlist(self,
+                  k: int = 10,
+                  hard: Tuple[str, ...] = HARD_CONSTRAINTS,
+                  relevance: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Per clause, drop meters that definitely fail a hard constraint and keep the best k of the rest.
+        Survivors are ordered by score, then fewest unknowns, then relevance (N x M, higher is better),
+        so clauses without recognised constraints fall back to the relevance order. When fewer than k
+        survive (a requirement no catalog meter meets), the best partial matches fill the list, with
+        the constraints they fail, so the prompt never has to choose from nothing.
+        """
+        kinds = np.array([check.kind in hard for clause in self.checks for check in clause], dtype=bool)
+        eliminated = self._per_clause((self.outcomes == 0.0) & kinds[:, None]) > 0
+        if relevance is None:
+            relevance = np.zeros(eliminated.shape)
+        order = np.lexsort((-relevance, self.unknown, -np.nan_to_num(self.scores, nan=-1.0)), axis=1)
+
+        results = []
+        for row, requirement in enumerate(self.requirements):
+            ruled_out = eliminated[row, order[row]]
+            survivors = order[row][~ruled_out][:max(0, k)]
+            fill = order[row][ruled_out][:max(0, k - len(survivors))]
+            candidates = []
+            for meter in np.concatenate((survivors, fill)):
+                failing, unknown = self._explain(row, meter)
+                candidates.append({
+                    'index': int(meter),
+                    'score': None if np.isnan(self.scores[row, meter]) else round(float(self.scores[row, meter]), 4),
+                    'failing': failing,
+                    'unknown': unknown
+                })
+            results.append({
+                'clause_id': clause_id(requirement),
+                'requirement': requirement,
+                'eliminated': int(eliminated[row].sum()),
+                'candidates': candidates
+            })
+        return results
+
+def score_clauses(requirements: Any,
+                  catalog: CatalogMatrix,
+                  engine: Optional[ComplianceEngine] = None) -> ClauseScores:
+    """Compile requirements into checks and evaluate every clause against every meter at once"""
+    started = time.perf_counter()
+    if isinstance(requirements, str):
+        requirements = split_requirements(requirements)
+    engine = engine or ComplianceEngine()
+
+    checks = [engine.recognize(requirement) for requirement in requirements]
+    flat = [check for clause in checks for check in clause]
+    owners = np.repeat(np.arange(len(requirements)), [len(c) for c in checks])
+
+    # Identical checks (repeated clauses, shared standards) are evaluated once
+    distinct: Dict[Tuple[Any, ...], np.ndarray] = {}
+    rows = []
+    for check in flat:
+        key = (check.field, check.operator, check.value, check.pattern, check.standard, check.quantity)
+        if key not in distinct:
+            distinct[key] = catalog.outcome(check)
+        rows.append(distinct[key])
+    outcomes = np.vstack(rows) if rows else np.empty((0, catalog.size))
+
+    scores = ClauseScores(requirements, checks, catalog, outcomes, owners)
+    print(f"🧮 Scored {len(requirements)} clauses x {catalog.size} meters "
+          f"({len(flat)} checks) in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return scores
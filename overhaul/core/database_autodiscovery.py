@@ -1,8 +1,28 @@
 # core/database_autodiscovery.py
 import sqlite3
 import os
+import hashlib
+import json
+import time
+from pathlib import Path
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+import numpy as np
+from .connection_pool import SQLiteConnectionPool, list_user_tables
+from .catalog_snapshot import CatalogSnapshot
+from .fulltext_index import FULLTEXT_TABLE, FullTextIndex
+from .compliance_engine import ComplianceEngine, split_requirements
+from .constraint_matrix import HARD_CONSTRAINTS, CatalogMatrix, score_clauses
+from .clause_relevance import ClauseRelevance, build_vocabulary
+from .spec_parser import (CATALOG_KEY, CATALOG_TABLE, SPEC_FIELDS, SPEC_PARSER_VERSION, SPEC_TABLE, SOURCE_TABLES, conditions_sql,
+                          matches, parse_catalog, parse_catalog_from, parse_conditions, spec_table_status)
+
+# Bump when the cached schema layout or the discovery logic changes
+DISCOVERY_CACHE_FORMAT = 1
+
+def _is_derived_table(table: str) -> bool:
+    """Tables built from the catalog (parsed specs, the full-text index and its shadow tables), never part of a record"""
+    return table in (SPEC_TABLE, FULLTEXT_TABLE) or table.startswith(f"{FULLTEXT_TABLE}_")
 
 @dataclass
 class TableInfo:
@@ -22,24 +42,40 @@ class DatabaseSchema:
 class DatabaseAutoDiscovery:
     """Automatically discover database schema and generate smart queries"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, persist_cache: bool = True):
         self.discovered_schemas = {}
+        self.cache_dir = cache_dir
+        self.persist_cache = persist_cache
+        self._fingerprints = {}
     
     def discover_database(self, db_path: str) -> DatabaseSchema:
         """Analyze database and discover its structure"""
         
-        if db_path in self.discovered_schemas:
+        try:
+            fingerprint = self._fingerprint(db_path)
+        except Exception as e:
+            print(f"❌ Error discovering database {db_path}: {e}")
+            return DatabaseSchema(db_path, {}, [], {})
+        
+        if db_path in self.discovered_schemas and self._fingerprints.get(db_path) == fingerprint:
             return self.discovered_schemas[db_path]
         
+        schema = self._load_cached_schema(db_path, fingerprint)
+        if schema:
+            print(f"📦 Using cached schema for {os.path.basename(db_path)} "
+                  f"({len(schema.tables)} tables, {len(schema.relationships)} relationships)")
+            self.discovered_schemas[db_path] = schema
+            self._fingerprints[db_path] = fingerprint
+            return schema
+        
         print(f"🔍 Auto-discovering database schema: {os.path.basename(db_path)}")
         
         try:
-            with sqlite3.connect(db_path) as conn:
+            with SQLiteConnectionPool.for_database(db_path).connection() as conn:
                 cursor = conn.cursor()
                 
                 # Get all tables
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                table_names = [row[0] for row in cursor.fetchall()]
+                table_names = list_user_tables(conn)
                 
                 tables = {}
                 relationships = []
@@ -68,6 +104,8 @@ class DatabaseAutoDiscovery:
                 )
                 
                 self.discovered_schemas[db_path] = schema
+                self._fingerprints[db_path] = fingerprint
+                self._save_cached_schema(db_path, fingerprint, schema)
                 
                 print(f"✅ Discovered {len(tables)} tables with {len(relationships)} relationships")
                 return schema
@@ -76,6 +114,73 @@ class DatabaseAutoDiscovery:
             print(f"❌ Error discovering database {db_path}: {e}")
             return DatabaseSchema(db_path, {}, [], {})
     
+    def _fingerprint(self, db_path: str) -> Dict[str, Any]:
+        """Identify a database file state: path, size, mtime and SQLite schema_version"""
+        stat = os.stat(db_path)
+        with SQLiteConnectionPool.for_database(db_path).connection() as conn:
+            schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        
+        fingerprint = {
+            'format': DISCOVERY_CACHE_FORMAT,
+            'path': str(Path(db_path).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'schema_version': schema_version
+        }
+        # Writes in WAL mode land in the -wal file before the main file changes
+        wal_path = f"{db_path}-wal"
+        if os.path.exists(wal_path):
+            wal_stat = os.stat(wal_path)
+            fingerprint['wal'] = [wal_stat.st_size, wal_stat.st_mtime_ns]
+        return fingerprint
+    
+    def _cache_path(self, db_path: str) -> Path:
+        """Sidecar cache file, next to the database unless a cache_dir was given"""
+        resolved = Path(db_path).resolve()
+        cache_dir = Path(self.cache_dir) if self.cache_dir else resolved.parent / '.discovery_cache'
+        path_hash = hashlib.sha1(str(resolved).encode('utf-8')).hexdigest()[:12]
+        return cache_dir / f"{resolved.name}.{path_hash}.json"
+    
+    def _load_cached_schema(self, db_path: str, fingerprint: Dict[str, Any]) -> Optional[DatabaseSchema]:
+        """Load a persisted schema if it was discovered from the same file state"""
+        if not self.persist_cache:
+            return None
+        
+        cache_path = self._cache_path(db_path)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('fingerprint') != fingerprint:
+                return None
+            
+            data = cached['schema']
+            return DatabaseSchema(
+                path=db_path,
+                tables={name: TableInfo(**info) for name, info in data['tables'].items()},
+                relationships=data['relationships'],
+                suggested_queries=data['suggested_queries']
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable discovery cache {cache_path.name}: {e}")
+            return None
+    
+    def _save_cached_schema(self, db_path: str, fingerprint: Dict[str, Any], schema: DatabaseSchema):
+        """Persist a discovered schema (best effort: a read-only location just skips caching)"""
+        if not self.persist_cache:
+            return
+        
+        cache_path = self._cache_path(db_path)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'schema': asdict(schema)}, f, indent=2)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not write discovery cache: {e}")
+    
     def _analyze_table(self, cursor, table_name: str) -> TableInfo:
         """Analyze individual table structure"""
         
@@ -137,10 +242,31 @@ class DatabaseAutoDiscovery:
 class SmartDatabaseWrapper:
     """Wrapper that provides intelligent database access in templates"""
     
-    def __init__(self, db_path: str, discovery_engine: DatabaseAutoDiscovery):
+    def __init__(self, db_path: str, discovery_engine: DatabaseAutoDiscovery, use_snapshot: bool = True):
         self.db_path = db_path
+        self.pool = SQLiteConnectionPool.for_database(db_path)
         self.schema = discovery_engine.discover_database(db_path)
         self.discovery_engine = discovery_engine
+        self.use_snapshot = use_snapshot
+        self._main_table = None
+        self._related = None
+        self._query_results = {}
+        self._query_snapshot = None
+    
+    def _snapshot(self) -> Optional[CatalogSnapshot]:
+        """The shared in-memory catalog snapshot, or None to fall back to SQLite"""
+        if not self.use_snapshot or not self.schema.tables:
+            return None
+        
+        main_table = self._detect_main_table()
+        try:
+            return CatalogSnapshot.shared(self.db_path, main_table,
+                                          self.schema.tables[main_table].primary_key,
+                                          self._related_tables(main_table))
+        except Exception as e:
+            print(f"⚠️ Catalog snapshot unavailable, querying SQLite directly: {e}")
+            self.use_snapshot = False
+            return None
     
     def get_all(self, table_name: str = None) -> List[Dict]:
         """Get all records from main table or specified table"""
@@ -150,6 +276,10 @@ class SmartDatabaseWrapper:
         if not table_name or table_name not in self.schema.tables:
             return []
         
+        snapshot = self._snapshot()
+        if snapshot and snapshot.has_table(table_name):
+            return snapshot.rows(table_name, limit=100)
+        
         query = f"SELECT * FROM {table_name} ORDER BY {self.schema.tables[table_name].primary_key} LIMIT 100"
         return self._execute_query(query)
     
@@ -158,46 +288,131 @@ class SmartDatabaseWrapper:
         main_table = self._detect_main_table()
         
         if main_table and 'series_name' in self.schema.tables[main_table].columns:
+            snapshot = self._snapshot()
+            if snapshot:
+                return snapshot.where(main_table, {'series_name': series_name}, limit=50)
             query = f"SELECT * FROM {main_table} WHERE series_name = ? LIMIT 50"
             return self._execute_query(query, (series_name,))
         return []
     
     def get_specifications(self, model_name: str) -> Dict:
         """Get detailed specifications with related data"""
+        return self.get_specifications_many([model_name]).get(model_name, {})
+    
+    def get_specifications_many(self, models: List[str]) -> Dict[str, Dict]:
+        """Get specifications for several models with one query per related table"""
         main_table = self._detect_main_table()
         
-        if not main_table:
+        if not main_table or 'model_name' not in self.schema.tables[main_table].columns:
             return {}
         
-        # Start with basic query
-        query = f"SELECT * FROM {main_table} WHERE model_name = ? LIMIT 1"
-        results = self._execute_query(query, (model_name,))
+        snapshot = self._snapshot()
+        if snapshot:
+            return snapshot.specifications(models)
+        
+        wanted = list(dict.fromkeys(m for m in models if m))
+        primary_key = self.schema.tables[main_table].primary_key
+        rows = []
+        for chunk in self._chunks(wanted):
+            placeholders = ', '.join('?' * len(chunk))
+            query = f"SELECT * FROM {main_table} WHERE model_name IN ({placeholders}) ORDER BY {primary_key}"
+            rows.extend(self._execute_query(query, tuple(chunk)))
+        
+        by_model = {}
+        for row in rows:
+            # Keep the first match per model, like the old LIMIT 1 lookup
+            by_model.setdefault(row['model_name'], row)
+        
+        self._attach_related(main_table, list(by_model.values()))
+        return {model: by_model[model] for model in wanted if model in by_model}
+    
+    def get_all_specifications(self) -> Dict[str, Dict]:
+        """Get specifications for every model in the main table, keyed by model name"""
+        main_table = self._detect_main_table()
         
-        if not results:
+        if not main_table or 'model_name' not in self.schema.tables[main_table].columns:
             return {}
         
-        base_result = results[0]
-        
-        # Add related data from foreign key relationships
-        meter_id = base_result.get('id')
-        if meter_id:
-            # Get related specifications
-            for rel in self.schema.relationships:
-                if rel['from_table'] == main_table:
-                    related_table = rel['to_table']
-                    related_query = f"SELECT * FROM {related_table} WHERE {rel['to_column']} = ?"
-                    related_data = self._execute_query(related_query, (meter_id,))
-                    
-                    if related_data:
-                        base_result[f"{related_table.lower()}_data"] = related_data
+        snapshot = self._snapshot()
+        if snapshot:
+            return snapshot.specifications()
+        
+        query = f"SELECT * FROM {main_table} ORDER BY {self.schema.tables[main_table].primary_key}"
+        by_model = {}
+        for row in self._execute_query(query):
+            by_model.setdefault(row['model_name'], row)
+        
+        self._attach_related(main_table, list(by_model.values()), all_rows=True)
+        return by_model
+    
+    def _related_tables(self, main_table: str) -> List[Dict[str, str]]:
+        """Find child tables of the main table by foreign key or by '<singular>_id' naming"""
+        if self._related is not None and self._related[0] == main_table:
+            return self._related[1]
+        
+        primary_key = self.schema.tables[main_table].primary_key
+        related = {}
+        
+        for rel in self.schema.relationships:
+            if rel['to_table'] == main_table and rel['from_table'] != main_table and not _is_derived_table(rel['from_table']):
+                related[rel['from_table']] = {'table': rel['from_table'], 'column': rel['from_column'],
+                                              'parent_column': rel['to_column'] or primary_key}
         
-        return base_result
+        singular = main_table.lower().rstrip('s')
+        for table_name, table_info in self.schema.tables.items():
+            if table_name == main_table or table_name in related or _is_derived_table(table_name):
+                continue
+            for column in table_info.columns:
+                if column.lower() in (f"{singular}_id", f"{main_table.lower()}_id"):
+                    related[table_name] = {'table': table_name, 'column': column, 'parent_column': primary_key}
+                    break
+        
+        self._related = (main_table, list(related.values()))
+        return self._related[1]
+    
+    def _attach_related(self, main_table: str, base_rows: List[Dict], all_rows: bool = False):
+        """Add '<table>_data' lists to each row, fetching each related table in one pass"""
+        for rel in self._related_tables(main_table):
+            parent_column = rel['parent_column']
+            parents = {}
+            for row in base_rows:
+                if row.get(parent_column) is not None:
+                    parents.setdefault(row[parent_column], []).append(row)
+            if not parents:
+                continue
+            
+            related_rows = []
+            if all_rows:
+                related_rows = self._execute_query(f"SELECT * FROM {rel['table']}")
+            else:
+                for chunk in self._chunks(list(parents)):
+                    placeholders = ', '.join('?' * len(chunk))
+                    query = f"SELECT * FROM {rel['table']} WHERE {rel['column']} IN ({placeholders})"
+                    related_rows.extend(self._execute_query(query, tuple(chunk)))
+            
+            grouped = {}
+            for related in related_rows:
+                grouped.setdefault(related.get(rel['column']), []).append(related)
+            
+            key = f"{rel['table'].lower()}_data"
+            for parent_id, rows in parents.items():
+                if parent_id in grouped:
+                    for row in rows:
+                        row[key] = grouped[parent_id]
+    
+    @staticmethod
+    def _chunks(values: List[Any], size: int = 500) -> List[List[Any]]:
+        """Split IN (...) parameter lists to stay under SQLite's variable limit"""
+        return [values[i:i + size] for i in range(0, len(values), size)]
     
     def get_series_summary(self) -> List[Dict]:
         """Get summary of available series"""
         main_table = self._detect_main_table()
         
         if main_table and 'series_name' in self.schema.tables[main_table].columns:
+            snapshot = self._snapshot()
+            if snapshot:
+                return snapshot.series_summary()
             query = f"""
                 SELECT series_name, COUNT(*) as model_count,
                        GROUP_CONCAT(model_name, ', ') as sample_models
@@ -215,6 +430,11 @@ class SmartDatabaseWrapper:
         if not main_table:
             return []
         
+        snapshot = self._snapshot()
+        columns = self.schema.tables[main_table].columns
+        if snapshot and any(key in columns for key in criteria):
+            return snapshot.where(main_table, {k: v for k, v in criteria.items() if k in columns}, limit=50)
+        
         where_clauses = []
         params = []
         
@@ -232,13 +452,218 @@ class SmartDatabaseWrapper:
         
         return self.get_all()
     
+    def fulltext(self, query: str, k: int = 10) -> List[Dict]:
+        """Rank catalog records against free text with BM25 (best first, 'relevance' added)"""
+        try:
+            return FullTextIndex.for_database(self.db_path).search(query, k)
+        except Exception as e:
+            print(f"❌ Full-text search failed: {e}")
+            return []
+    
+    def filter(self, limit: Optional[int] = None, **conditions) -> List[Dict]:
+        """Records whose parsed numeric specs meet every condition, e.g. filter(temp_min__lte=-10, accuracy_class__lte=0.2)"""
+        if self._detect_main_table() != CATALOG_TABLE:
+            return []
+        try:
+            parsed = parse_conditions(conditions)
+        except (ValueError, TypeError) as e:
+            print(f"❌ Invalid filter: {e}")
+            return []
+        
+        results = []
+        for meter, specs in self._meter_specs(parsed):
+            if matches(specs, parsed):
+                results.append(dict(meter, specs=dict(specs)))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+    
+    def _meter_specs(self, conditions: List[tuple]) -> List[tuple]:
+        """(meter row, specs) pairs from the MeterSpecs table when it is current, else parsed from the catalog"""
+        snapshot = self._snapshot()
+        if snapshot is None:
+            try:
+                with self.pool.connection() as conn:
+                    if spec_table_status(conn) is None:
+                        return self._meter_specs_sql(conn, conditions)
+                    return parse_catalog_from(conn)
+            except Exception as e:
+                print(f"❌ Spec filter failed: {e}")
+                return []
+        
+        # Parsed once per snapshot for every wrapper; a reload (catalog changed) parses again
+        return snapshot.derived('meter_specs', lambda: self._parse_snapshot_specs(snapshot))
+    
+    def _parse_snapshot_specs(self, snapshot: CatalogSnapshot) -> List[tuple]:
+        meters = snapshot.rows(CATALOG_TABLE)
+        stored = snapshot.rows(SPEC_TABLE) if snapshot.has_table(SPEC_TABLE) else []
+        by_meter = {row['meter_id']: row for row in stored if row.get('parser_version') == SPEC_PARSER_VERSION}
+        if meters and len(by_meter) == len(meters) and all(m[CATALOG_KEY] in by_meter for m in meters):
+            return [(meter, {f: by_meter[meter[CATALOG_KEY]].get(f) for f in SPEC_FIELDS}) for meter in meters]
+        return parse_catalog(meters, {t: snapshot.rows(t) for t in SOURCE_TABLES[1:] if snapshot.has_table(t)})
+    
+    def _meter_specs_sql(self, conn: sqlite3.Connection, conditions: List[tuple]) -> List[tuple]:
+        """Let the per-field MeterSpecs indexes pick the matching meters"""
+        where, params = conditions_sql(conditions)
+        fields = ', '.join(f's.{f} AS "spec.{f}"' for f in SPEC_FIELDS)
+        main_table = self._detect_main_table()
+        key = self.schema.tables[main_table].primary_key
+        cursor = conn.execute(f'SELECT m.*, {fields} FROM "{main_table}" m JOIN {SPEC_TABLE} s ON s.meter_id = m.{key} '
+                              f'WHERE {where} ORDER BY m.{key}', params)
+        names = [d[0] for d in cursor.description]
+        pairs = []
+        for row in cursor.fetchall():
+            record = dict(zip(names, row))
+            specs = {f: record.pop(f"spec.{f}") for f in SPEC_FIELDS}
+            pairs.append((record, specs))
+        return pairs
+    
+    def check_compliance(self, requirements: Any, model_name: str) -> Dict[str, Any]:
+        """Rule verdicts for measurable requirements; 'unresolved' lists the ones left for the LLM"""
+        meter = self.get_specifications(model_name)
+        if not meter:
+            print(f"❌ Model not found: {model_name}")
+            return {'model_name': model_name, 'compliance_analysis': [], 'unresolved': [], 'stats': {}}
+        
+        try:
+            return ComplianceEngine().evaluate(requirements, meter)
+        except Exception as e:
+            print(f"❌ Compliance rules failed: {e}")
+            return {'model_name': model_name, 'compliance_analysis': [], 'unresolved': [], 'stats': {}}
+    
+    def score_requirements(self, requirements: Any, k: int = 5) -> Dict[str, Any]:
+        """Score every clause against every catalog meter at once; top-k meters per clause with failing constraints"""
+        catalog = self._catalog()
+        if catalog is None or not catalog.size:
+            return {'clauses': [], 'ranking': []}
+        
+        try:
+            scores = score_clauses(requirements, catalog)
+            return {'clauses': scores.top_k(k), 'ranking': scores.meter_ranking(k)}
+        except Exception as e:
+            print(f"❌ Clause scoring failed: {e}")
+            return {'clauses': [], 'ranking': []}
+    
+    def shortlist(self,
+                  clauses: Any,
+                  k: int = 10,
+                  hard: Optional[List[str]] = None,
+                  text_key: str = 'text',
+                  fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Attach to every clause the k best meters that fail none of its hard constraints
+        (accuracy, voltage, I/O), so a prompt only lists plausible candidates. When fewer than k
+        pass, the closest matches fill the list with what they miss under 'unmet'.
+        Clauses may be strings or dicts (e.g. extract_clauses output); dicts keep their keys.
+        """
+        if isinstance(clauses, str):
+            clauses = split_requirements(clauses)
+        clauses = list(clauses or [])
+        fields = fields or ['model_name', 'series_name', 'selection_blurb']
+        texts = [c.get(text_key) or '' if isinstance(c, dict) else str(c) for c in clauses]
+        
+        catalog = self._catalog()
+        if catalog is None or not catalog.size or not clauses:
+            return [dict(c) if isinstance(c, dict) else {'text': c} for c in clauses]
+        
+        try:
+            started = time.perf_counter()
+            scores = score_clauses(texts, catalog)
+            
+            # BM25 relevance orders meters the constraints cannot tell apart
+            positions = {record.get(CATALOG_KEY): i for i, record in enumerate(catalog.records)}
+            relevance = np.zeros((len(texts), catalog.size))
+            index = FullTextIndex.for_database(self.db_path)
+            for row, text in enumerate(texts):
+                for meter_id, value in index.relevance(text, max(k * 5, 50)).items():
+                    if meter_id in positions:
+                        relevance[row, positions[meter_id]] = value
+            
+            shortlisted = scores.shortlist(k, tuple(hard or HARD_CONSTRAINTS), relevance)
+        except Exception as e:
+            print(f"❌ Shortlisting failed: {e}")
+            return [dict(c) if isinstance(c, dict) else {'text': c} for c in clauses]
+        
+        results = []
+        for clause, entry in zip(clauses, shortlisted):
+            result = dict(clause) if isinstance(clause, dict) else {'clause_id': entry['clause_id'], 'text': clause}
+            result['candidates'] = []
+            for candidate in entry['candidates']:
+                record = catalog.records[candidate['index']]
+                meter = {field: record.get(field) for field in fields if field in record}
+                if candidate['failing']:
+                    meter['unmet'] = candidate['failing']
+                if candidate['unknown']:
+                    meter['unverified'] = candidate['unknown']
+                result['candidates'].append(meter)
+            results.append(result)
+        
+        eliminated = sum(entry['eliminated'] for entry in shortlisted)
+        print(f"✂️ Shortlisted {len(clauses)} clauses to at most {k} of {catalog.size} meters "
+              f"({eliminated} clause/meter pairs ruled out) in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return results
+    
+    def relevant_clauses(self,
+                         document: Any,
+                         threshold: float = 0.15,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Clauses of a document (processed file, clause tree or text) that talk about what the catalog
+        describes, ranked with BM25 against the catalog's own vocabulary; each has 'clause_id', 'text',
+        'page', 'relevance' and 'terms'. Unrelated trades (earthing, fuel, HVAC) drop out before prompting.
+        """
+        try:
+            relevance = self._clause_relevance()
+            if relevance is None:
+                return []
+            return relevance.select(document, threshold, limit)
+        except Exception as e:
+            print(f"❌ Clause relevance failed: {e}")
+            return []
+    
+    def _clause_relevance(self) -> Optional[ClauseRelevance]:
+        """Scorer over the catalog vocabulary, built once per catalog snapshot"""
+        main_table = self._detect_main_table()
+        if not main_table:
+            return None
+        
+        def build() -> ClauseRelevance:
+            with self.pool.connection() as conn:
+                return ClauseRelevance(build_vocabulary(conn, main_table))
+        
+        snapshot = self._snapshot()
+        return snapshot.derived('clause_relevance', build) if snapshot is not None else build()
+    
+    def _catalog(self) -> Optional[CatalogMatrix]:
+        """Spec arrays for every meter, built once per catalog snapshot"""
+        if self._detect_main_table() != CATALOG_TABLE:
+            return None
+        
+        def build() -> CatalogMatrix:
+            specifications = self.get_all_specifications()
+            # Each meter's rows are dropped once profiled, so they never sit next to the whole matrix
+            return CatalogMatrix.from_specifications(specifications.pop(model) for model in list(specifications))
+        
+        snapshot = self._snapshot()
+        # Shared through the snapshot, so every engine in the process reuses one matrix per catalog version
+        return snapshot.derived('catalog_matrix', build) if snapshot is not None else build()
+    
     def _detect_main_table(self) -> str:
         """Auto-detect the main table (usually has most rows or central relationships)"""
+        if self._main_table is None:
+            self._main_table = self._score_main_table()
+        return self._main_table
+    
+    def _score_main_table(self) -> str:
+        """Score every table once; the schema is fixed for the wrapper's lifetime"""
         if not self.schema.tables:
             return ""
         
         # Heuristics for main table detection
         candidates = []
+        references = {}
+        for rel in self.schema.relationships:
+            references[rel['to_table']] = references.get(rel['to_table'], 0) + 1
         
         for table_name, table_info in self.schema.tables.items():
             score = 0
@@ -247,8 +672,7 @@ class SmartDatabaseWrapper:
             score += table_info.row_count / 100
             
             # Higher score for tables that are referenced by others
-            references = len([r for r in self.schema.relationships if r['to_table'] == table_name])
-            score += references * 10
+            score += references.get(table_name, 0) * 10
             
             # Higher score for common main table names
             if table_name.lower() in ['meters', 'products', 'items', 'main']:
@@ -263,25 +687,32 @@ class SmartDatabaseWrapper:
     def _execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """Execute query and return results as dictionaries"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                return [dict(row) for row in cursor.fetchall()]
+            return self.pool.execute(query, params)
         except Exception as e:
             print(f"❌ Query failed: {e}")
             return []
 
     def query(self, sql, params=None):
         """Run a raw SQL query and return results as a list of dicts."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(sql)
-            return [dict(row) for row in cursor.fetchall()]
+        snapshot = self._snapshot()
+        if snapshot is None or not sql.lstrip().upper().startswith('SELECT') or 'RANDOM(' in sql.upper():
+            return self.pool.execute(sql, params)
+        
+        # Read-only results stay valid for as long as the catalog snapshot does
+        if self._query_snapshot is not snapshot:
+            self._query_results = {}
+            self._query_snapshot = snapshot
+        try:
+            key = (sql, tuple(params) if isinstance(params, (list, tuple)) else params)
+            hash(key)
+        except TypeError:
+            return self.pool.execute(sql, params)
+        
+        if key not in self._query_results:
+            if len(self._query_results) >= 256:
+                self._query_results.clear()
+            self._query_results[key] = self.pool.execute(sql, params)
+        return [dict(row) for row in self._query_results[key]]
 
 class AutoDiscoveryDatabase:
     def __init__(self, db_path):
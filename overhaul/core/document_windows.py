@@ -0,0 +1,170 @@
+import re
+from bisect import bisect_right
+from typing import Dict, List, Any, Optional, Tuple
+
+from .clause_segmenter import ClauseTree, normalize_id
+from .token_budget import estimate_tokens
+
+# Preference for where a window starts or ends: a top-level clause, any numbered clause, a page, any line
+_ROOT_CLAUSE, _CLAUSE, _PAGE, _LINE = 3, 2, 1, 0
+
+# A window is cut at the best boundary in its back half, so a rare boundary type never leaves it mostly empty
+_MIN_FILL = 0.5
+
+def _document(document: Any) -> Tuple[str, Optional[List[int]], Optional[ClauseTree]]:
+    """Content, page offsets and clause tree of a processed file, a ClauseTree-bearing dict or plain text"""
+    if isinstance(document, dict):
+        return document.get('content') or '', document.get('page_offsets'), document.get('clauses')
+    return str(document or ''), None, None
+
+class DocumentWindower:
+    """Split a document into overlapping windows that fit a prompt token budget, cut at clause and page boundaries"""
+
+    def __init__(self, budget: int, overhead_tokens: int = 0, overlap_tokens: int = 300):
+        self.budget = budget
+        self.overhead_tokens = overhead_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @property
+    def window_budget(self) -> int:
+        """Tokens left for document text once the fixed prompt overhead is paid"""
+        return max(1, self.budget - self.overhead_tokens)
+
+    @property
+    def overlap(self) -> int:
+        """Overlap actually used: more than a quarter window would spend most of each window re-reading the last"""
+        return min(self.overlap_tokens, self.window_budget // 4)
+
+    def windows(self, document: Any) -> List[Dict[str, Any]]:
+        """
+        Windows in document order, each {'index', 'start', 'end', 'first_page', 'last_page', 'tokens',
+        'clause_ids', 'text'}. Consecutive windows share up to overlap_tokens of text, starting at a clause
+        where possible, so a clause cut off at the end of one window is read whole by the next.
+        """
+        content, page_offsets, tree = _document(document)
+        if not content.strip():
+            return []
+        if tree is None:
+            tree = ClauseTree(content, page_offsets)
+
+        # Token pieces never span a newline, so the whole text estimates the same as its lines summed
+        total = estimate_tokens(content) + content.count('\n') + 1
+        if total <= self.window_budget:
+            # Fits in one window: no cut to choose, so skip per-line counts and ranking boundaries
+            offsets = [0]
+            spans = [(0, 1, total)]
+        else:
+            offsets = [0] + [match.end() for match in re.finditer('\n', content)]
+            # cumulative[i] = tokens in lines [0, i); the newline is counted with its line
+            cumulative = [0]
+            for start, stop in zip(offsets, offsets[1:] + [len(content)]):
+                cumulative.append(cumulative[-1] + estimate_tokens(content[start:stop]) + 1)
+            spans = self._spans(offsets, cumulative, page_offsets, tree)
+
+        clause_starts = [(clause.start, clause.id) for clause in tree if clause.kind == 'numbered']
+        windows = []
+        for index, (first, last, tokens) in enumerate(spans):
+            start = offsets[first]
+            end = offsets[last] if last < len(offsets) else len(content)
+            windows.append({
+                'index': index,
+                'start': start,
+                'end': end,
+                'first_page': bisect_right(page_offsets, start) if page_offsets else None,
+                'last_page': bisect_right(page_offsets, max(start, end - 1)) if page_offsets else None,
+                'tokens': tokens,
+                'clause_ids': [clause_id for offset, clause_id in clause_starts if start <= offset < end],
+                'text': content[start:end].rstrip('\n')
+            })
+        return windows
+
+    def _spans(self,
+               offsets: List[int],
+               cumulative: List[int],
+               page_offsets: Optional[List[int]],
+               tree: ClauseTree) -> List[Tuple[int, int, int]]:
+        """(first line, end line, tokens) of each window, cut at the best boundary within the budget"""
+        priority = self._priorities(offsets, page_offsets, tree)
+
+        budget = self.window_budget
+        overlap = self.overlap
+        spans = []
+        first = 0
+        while first < len(offsets):
+            # Furthest line end that keeps the window within budget (at least one line, however long)
+            last = max(first + 1, bisect_right(cumulative, cumulative[first] + budget) - 1)
+            if last >= len(offsets):
+                spans.append((first, len(offsets), cumulative[-1] - cumulative[first]))
+                break
+            if last == first + 1 and cumulative[last] - cumulative[first] > budget:
+                print(f"⚠️ Line {first + 1} alone exceeds the window budget ({budget} tokens)")
+            else:
+                floor = first + max(1, int((last - first) * _MIN_FILL))
+                last = max(range(floor, last + 1), key=lambda line: (priority[line], line))
+            spans.append((first, last, cumulative[last] - cumulative[first]))
+
+            # Next window starts within the overlap before the cut, at the best boundary there (earliest on ties)
+            reach = [line for line in range(last - 1, first, -1)
+                     if cumulative[last] - cumulative[line] <= overlap]
+            first = min(reach, key=lambda line: (-priority[line], line)) if reach else last
+        return spans
+
+    @staticmethod
+    def _priorities(offsets: List[int], page_offsets: Optional[List[int]], tree: ClauseTree) -> List[int]:
+        """Boundary preference for the start of every line (one extra entry for the end of the document)"""
+        priority = [_LINE] * (len(offsets) + 1)
+        priority[-1] = _ROOT_CLAUSE
+        for offset in page_offsets or []:
+            line = bisect_right(offsets, offset) - 1
+            priority[line] = max(priority[line], _PAGE)
+        for clause in tree:
+            if clause.kind == 'numbered':
+                line = bisect_right(offsets, clause.start) - 1
+                priority[line] = max(priority[line], _ROOT_CLAUSE if clause.level == 0 else _CLAUSE)
+        return priority
+
+def _normalized_text(text: Any) -> str:
+    return re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+
+def merge_window_items(results: List[Dict[str, Any]],
+                       reduce_key: str,
+                       id_key: str = 'clause_id',
+                       text_key: str = 'text') -> Dict[str, Any]:
+    """
+    Concatenate reduce_key lists from window results in window order, dropping clauses that several
+    windows returned. Copies are matched on normalized id ('Clause 6.5' == '6.5'), or on text when an
+    item has no id (one copy containing the other); the longest copy wins, since the window that saw
+    the whole clause returns more of it than the one that cut it off.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_id: Dict[str, int] = {}
+    duplicates = 0
+
+    for result in results:
+        parsed = result.get('parsed_result') if isinstance(result, dict) else None
+        items = parsed.get(reduce_key) if isinstance(parsed, dict) else None
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                item = {text_key: item}
+            text = _normalized_text(item.get(text_key))
+            clause_id = normalize_id(item.get(id_key)) if item.get(id_key) not in (None, '') else ''
+
+            if clause_id:
+                position = by_id.get(clause_id)
+            else:
+                position = next((i for i, kept in enumerate(merged)
+                                 if text and (text in _normalized_text(kept.get(text_key))
+                                              or _normalized_text(kept.get(text_key)) in text)), None)
+            if position is None:
+                if clause_id:
+                    by_id[clause_id] = len(merged)
+                merged.append(item)
+                continue
+
+            duplicates += 1
+            if len(text) > len(_normalized_text(merged[position].get(text_key))):
+                merged[position] = {**merged[position], **item}
+
+    if duplicates:
+        print(f"🔗 Merged {duplicates} clauses returned by more than one window")
+    return {reduce_key: merged}
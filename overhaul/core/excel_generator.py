@@ -9,13 +9,14 @@ class ExcelGenerator:
     def __init__(self):
         self.workbook = None
     
-    def generate_compliance_report(self, output_file, data):
+    def generate_compliance_report(self, output_file, data, validated=False):
         """Generate Excel compliance report - method name matches prompt engine call"""
         
         print(f"📊 Generating Excel report: {output_file}")
         
-        # FIX: Validate and fix data structure
-        data = self.validate_and_fix_data_structure(data)
+        # FIX: Validate and fix data structure (skipped when the LLM output already matched the schema)
+        if not validated:
+            data = self.validate_and_fix_data_structure(data)
         
         # Create workbook
         self.workbook = Workbook()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+class ExtractionCache:
+    """Disk-backed cache of extracted document text keyed on file content hash and extractor version"""
+
+    def __init__(self,
+                 cache_dir: str = "outputs",
+                 filename: str = "extraction_cache.sqlite3",
+                 max_entries: int = 200):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / filename
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                content_hash TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                content BLOB NOT NULL,
+                page_offsets TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, extractor)
+            )
+        """)
+        # Last known hash per path, so files whose size and mtime did not change skip hashing
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions(last_used_at)")
+        self._conn.commit()
+
+    def content_hash(self, file_path: str) -> str:
+        """SHA-256 of the file, reused from the last call while its size and mtime are unchanged"""
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, content_hash)
+            )
+            self._conn.commit()
+        return content_hash
+
+    def get(self, content_hash: str, extractor: str) -> Optional[Dict[str, Any]]:
+        """Return {'content', 'page_offsets'} for a previous extraction, or None on a miss"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, page_offsets FROM extractions WHERE content_hash = ? AND extractor = ?",
+                (content_hash, extractor)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE extractions SET last_used_at = ? WHERE content_hash = ? AND extractor = ?",
+                (time.time(), content_hash, extractor)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return {'content': zlib.decompress(row[0]).decode('utf-8'), 'page_offsets': json.loads(row[1])}
+
+    def set(self, content_hash: str, extractor: str, content: str, page_offsets: List[int]):
+        """Store extracted text (zlib-compressed) and evict least recently used entries over the limit"""
+        now = time.time()
+        blob = zlib.compress(content.encode('utf-8'), 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(content_hash, extractor, content, page_offsets, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, extractor, blob, json.dumps(page_offsets), now, now)
+            )
+            if self.max_entries is not None:
+                self._conn.execute("""
+                    DELETE FROM extractions WHERE rowid IN (
+                        SELECT rowid FROM extractions ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all cached extractions and remembered file hashes"""
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.execute("DELETE FROM files")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current cache size"""
+        with self._lock:
+            entries, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM extractions"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': entries,
+            'compressed_bytes': stored,
+            'path': str(self.path)
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,11 +1,64 @@
 # core/file_processor.py
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+from .clause_segmenter import ClauseTree
+from .extraction_cache import ExtractionCache
+
+# Bump when extraction output changes so cached text from older code is not reused
+EXTRACTOR_VERSION = 1
+
+# Smaller PDFs are extracted in-process; starting worker processes would cost more than it saves
+PARALLEL_MIN_PAGES = 32
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract pages [start, stop) of a PDF (runs in a worker process with its own reader)"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def extract_pdf_pages(pdf_path: str,
+                      max_workers: Optional[int] = None,
+                      min_pages: int = PARALLEL_MIN_PAGES) -> Tuple[List[str], int]:
+    """Text of every PDF page, split into page ranges across a process pool for large files; returns (pages, workers)"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(pdf_path)
+    count = len(reader.pages)
+    workers = min(max_workers or os.cpu_count() or 1, count)
+    if count < min_pages or workers < 2:
+        return [page.extract_text() or "" for page in reader.pages], 1
+    
+    # A few ranges per worker so one slow range (scanned or image-heavy pages) does not hold up the rest
+    size = -(-count // (workers * 4))
+    starts = list(range(0, count, size))
+    stops = [min(start + size, count) for start in starts]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ranges = pool.map(_extract_page_range, [pdf_path] * len(starts), starts, stops)
+            return [text for pages in ranges for text in pages], workers
+    except Exception as e:
+        print(f"⚠️ Parallel PDF extraction failed, extracting serially: {e}")
+        return [page.extract_text() or "" for page in reader.pages], 1
+
+def join_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """Join page texts with newlines; returns the text and the offset where each page starts"""
+    offsets = []
+    position = 0
+    for text in pages:
+        offsets.append(position)
+        position += len(text) + 1
+    return "\n".join(pages), offsets
 
 class FileProcessor:
     """Handle different file types for input processing"""
     
+    def __init__(self, cache: Optional[ExtractionCache] = None, max_workers: Optional[int] = None):
+        self.cache = cache
+        self.max_workers = max_workers
+    
     def process_file(self, file_path: str) -> Dict[str, Any]:
         """Process a file and return its content with metadata"""
         
@@ -15,15 +68,14 @@ class FileProcessor:
             raise FileNotFoundError(f"File not found: {file_path}")
         
         content = ""
+        page_offsets = None
         # Read content based on file type
         if path.suffix.lower() in ['.txt', '.md']:
             with open(path, 'r', encoding='utf-8') as f:
                 content = f.read()
         elif path.suffix.lower() == '.pdf':
             try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(str(path))
-                content = "\n".join(page.extract_text() or "" for page in reader.pages)
+                content, page_offsets = self._extract_pdf(path)
             except Exception as e:
                 content = f"[Binary file: {path.name}]"
         else:
@@ -35,11 +87,41 @@ class FileProcessor:
                 with open(path, 'rb') as f:
                     content = f"[Binary file: {path.name}]"
         
-        return {
+        file_data = {
             'name': path.name,
             'basename': path.stem,
             'extension': path.suffix,
             'size': path.stat().st_size,
             'content': content,
             'path': str(path.absolute())
-        }
\ No newline at end of file
+        }
+        if page_offsets is not None:
+            file_data['page_offsets'] = page_offsets
+        # Numbered clauses for templates, e.g. {{ document.clauses.text('6.5') }}; parsed on first access
+        file_data['clauses'] = ClauseTree(content, page_offsets)
+        return file_data
+    
+    def _extract_pdf(self, path: Path) -> Tuple[str, List[int]]:
+        """Extract PDF text page by page, reusing a cached extraction of identical file content"""
+        from PyPDF2 import __version__ as pypdf2_version
+        
+        extractor = f"pypdf2-{pypdf2_version}/v{EXTRACTOR_VERSION}"
+        content_hash = None
+        if self.cache is not None:
+            started = time.perf_counter()
+            content_hash = self.cache.content_hash(str(path))
+            cached = self.cache.get(content_hash, extractor)
+            if cached is not None:
+                print(f"⚡ Reused extracted text for {path.name} "
+                      f"({len(cached['page_offsets'])} pages, {(time.perf_counter() - started) * 1000:.1f}ms)")
+                return cached['content'], cached['page_offsets']
+        
+        started = time.perf_counter()
+        pages, workers = extract_pdf_pages(str(path), self.max_workers)
+        content, page_offsets = join_pages(pages)
+        print(f"📄 Extracted {len(page_offsets)} pages from {path.name} in {time.perf_counter() - started:.2f}s"
+              + (f" ({workers} processes)" if workers > 1 else ""))
+        
+        if self.cache is not None:
+            self.cache.set(content_hash, extractor, content, page_offsets)
+        return content, page_offsets
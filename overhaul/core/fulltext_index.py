@@ -0,0 +1,226 @@
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .connection_pool import SQLiteConnectionPool, list_user_tables
+
+FULLTEXT_TABLE = 'MeterSearch'
+MAIN_TABLE = 'Meters'
+FK_COLUMN = 'meter_id'
+
+# Meters columns copied into the index, with their BM25 weights
+MAIN_COLUMNS: List[Tuple[str, float]] = [
+    ('model_name', 3.0),
+    ('series_name', 2.0),
+    ('product_name', 2.0),
+    ('device_short_name', 2.0),
+    ('selection_blurb', 1.0),
+]
+
+# Index column -> (child table, SQL expression over that table's row, BM25 weight)
+CHILD_SOURCES: List[Tuple[str, str, str, float]] = [
+    ('measurements', 'Measurements', 'measurement_type', 1.0),
+    ('power_quality', 'PowerQualityAnalysis', 'analysis_feature', 1.5),
+    ('protocols', 'CommunicationProtocols', "protocol || coalesce(' ' || support, '')", 1.5),
+    ('certifications', 'Certifications', 'certification', 1.0),
+    ('applications', 'DeviceApplications', 'application', 1.0),
+]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def to_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query that ORs every word (BM25 rewards documents matching more)"""
+    words = list(dict.fromkeys(word.lower() for word in _WORD.findall(text or '')))
+    return ' OR '.join(f'"{word}"' for word in words)
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+class FullTextLayout:
+    """Which catalog columns and child tables feed the full-text index for a given database"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        tables = set(list_user_tables(conn))
+        main_columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{MAIN_TABLE}")')} if MAIN_TABLE in tables else set()
+
+        self.usable = 'id' in main_columns
+        self.main_columns = [(name, weight) for name, weight in MAIN_COLUMNS if name in main_columns]
+        self.child_sources = []
+        for column, table, expression, weight in CHILD_SOURCES:
+            if table in tables:
+                child_columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+                if FK_COLUMN in child_columns:
+                    self.child_sources.append((column, table, expression, weight))
+
+    @property
+    def columns(self) -> List[str]:
+        return [name for name, _ in self.main_columns] + [source[0] for source in self.child_sources]
+
+    @property
+    def weights(self) -> List[float]:
+        return [weight for _, weight in self.main_columns] + [source[3] for source in self.child_sources]
+
+    def create_sql(self) -> str:
+        return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {FULLTEXT_TABLE} USING fts5("
+                f"{', '.join(self.columns)}, tokenize = 'porter unicode61')")
+
+    def documents_sql(self, where: str = '', source: str = '') -> str:
+        """SELECT producing (rowid, indexed columns...) per meter; source is a schema prefix like 'src.'"""
+        parts = [f"m.{name}" for name, _ in self.main_columns]
+        for _, table, expression, _ in self.child_sources:
+            parts.append(f"(SELECT group_concat({expression}, ' ; ') FROM {source}{table} "
+                         f"WHERE {FK_COLUMN} = m.id)")
+        return f"SELECT m.id, {', '.join(parts)} FROM {source}{MAIN_TABLE} m {where}"
+
+    def _refresh_sql(self, key: str) -> str:
+        """Statements (trigger body) that re-index the meter whose id is `key`"""
+        return (f"DELETE FROM {FULLTEXT_TABLE} WHERE rowid = {key};\n"
+                f"    INSERT INTO {FULLTEXT_TABLE}(rowid, {', '.join(self.columns)}) "
+                f"{self.documents_sql(f'WHERE m.id = {key}')};")
+
+    def trigger_sql(self) -> Dict[str, str]:
+        """Trigger name -> CREATE TRIGGER statement keeping the index in step with the catalog"""
+        triggers = {}
+        sources = [(MAIN_TABLE, 'id')] + [(table, FK_COLUMN) for _, table, _, _ in self.child_sources]
+        for table, key in sources:
+            prefix = f"{FULLTEXT_TABLE.lower()}_{table.lower()}"
+            triggers[f"{prefix}_ai"] = f"AFTER INSERT ON {table} BEGIN\n    {self._refresh_sql(f'NEW.{key}')}\nEND"
+            triggers[f"{prefix}_ad"] = f"AFTER DELETE ON {table} BEGIN\n    {self._refresh_sql(f'OLD.{key}')}\nEND"
+            triggers[f"{prefix}_au"] = (f"AFTER UPDATE ON {table} BEGIN\n    {self._refresh_sql(f'OLD.{key}')}\n"
+                                        f"    {self._refresh_sql(f'NEW.{key}')}\nEND")
+        return {name: f"CREATE TRIGGER IF NOT EXISTS {name} {body}" for name, body in triggers.items()}
+
+    def search_sql(self, source: str = '') -> str:
+        weights = ', '.join(str(w) for w in self.weights)
+        return (f"SELECT m.*, -bm25({FULLTEXT_TABLE}, {weights}) AS relevance "
+                f"FROM {FULLTEXT_TABLE} JOIN {source}{MAIN_TABLE} m ON m.id = {FULLTEXT_TABLE}.rowid "
+                f"WHERE {FULLTEXT_TABLE} MATCH ? ORDER BY bm25({FULLTEXT_TABLE}, {weights}) LIMIT ?")
+
+    def relevance_sql(self) -> str:
+        """Like search_sql, but only (meter id, relevance), without joining the meter rows"""
+        weights = ', '.join(str(w) for w in self.weights)
+        return (f"SELECT rowid AS id, -bm25({FULLTEXT_TABLE}, {weights}) AS relevance FROM {FULLTEXT_TABLE} "
+                f"WHERE {FULLTEXT_TABLE} MATCH ? ORDER BY bm25({FULLTEXT_TABLE}, {weights}) LIMIT ?")
+
+def install_fulltext(conn: sqlite3.Connection) -> int:
+    """Create (or rebuild) the persistent index and its triggers; returns the number of indexed meters"""
+    layout = FullTextLayout(conn)
+    if not layout.usable:
+        return 0
+    conn.execute(layout.create_sql())
+    for statement in layout.trigger_sql().values():
+        conn.execute(statement)
+    conn.execute(f"DELETE FROM {FULLTEXT_TABLE}")
+    conn.execute(f"INSERT INTO {FULLTEXT_TABLE}(rowid, {', '.join(layout.columns)}) {layout.documents_sql()}")
+    conn.execute(f"INSERT INTO {FULLTEXT_TABLE}({FULLTEXT_TABLE}) VALUES ('optimize')")
+    return conn.execute(f"SELECT COUNT(*) FROM {FULLTEXT_TABLE}").fetchone()[0]
+
+def missing_fulltext(conn: sqlite3.Connection) -> List[str]:
+    """Names of the index table and triggers that a catalog is missing"""
+    layout = FullTextLayout(conn)
+    if not layout.usable:
+        return []
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+    return [name for name in [FULLTEXT_TABLE] + list(layout.trigger_sql()) if name not in existing]
+
+class FullTextIndex:
+    """BM25 search over the catalog's FTS5 table, or over an in-memory copy when the file has none"""
+
+    _shared: Dict[str, 'FullTextIndex'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str):
+        self.db_path = str(Path(db_path).resolve())
+        self.layout: Optional[FullTextLayout] = None
+        self.persistent = False
+        self._state = None
+        self._memory: Optional[sqlite3.Connection] = None
+        self._memory_state = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db_path: str) -> 'FullTextIndex':
+        key = str(Path(db_path).resolve())
+        with cls._shared_lock:
+            index = cls._shared.get(key)
+            if index is None:
+                index = cls(db_path)
+                cls._shared[key] = index
+            return index
+
+    def _file_state(self) -> Tuple[int, int]:
+        stat = os.stat(self.db_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _refresh(self):
+        """Re-read the layout whenever the file changed (e.g. after the migrator added the index)"""
+        state = self._file_state()
+        if state == self._state:
+            return
+        with SQLiteConnectionPool.for_database(self.db_path).connection() as conn:
+            self.layout = FullTextLayout(conn)
+            self.persistent = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (FULLTEXT_TABLE,)
+            ).fetchone() is not None
+        self._state = state
+
+    def _memory_index(self) -> sqlite3.Connection:
+        """Build (or rebuild after the file changed) a temporary index from the catalog"""
+        if self._memory is not None and self._memory_state == self._state:
+            return self._memory
+
+        if self._memory is not None:
+            self._memory.close()
+        print(f"🔎 Building in-memory full-text index for {os.path.basename(self.db_path)} "
+              f"(run core.catalog_migrator to persist it)")
+        conn = sqlite3.connect('file::memory:', uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("ATTACH DATABASE ? AS src", (Path(self.db_path).as_uri() + '?mode=ro',))
+        conn.execute(self.layout.create_sql())
+        conn.execute(f"INSERT INTO {FULLTEXT_TABLE}(rowid, {', '.join(self.layout.columns)}) "
+                     f"{self.layout.documents_sql(source='src.')}")
+        conn.commit()
+        self._memory = conn
+        self._memory_state = self._state
+        return conn
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Meters ranked by BM25 relevance to free text (higher relevance is better)"""
+        match = to_match_query(query)
+        if not match or k <= 0:
+            return []
+
+        with self._lock:
+            self._refresh()
+            if not self.layout.usable:
+                return []
+            if self.persistent:
+                return SQLiteConnectionPool.for_database(self.db_path).execute(self.layout.search_sql(), (match, k))
+            conn = self._memory_index()
+            rows = conn.execute(self.layout.search_sql(source='src.'), (match, k)).fetchall()
+            return [dict(row) for row in rows]
+
+    def relevance(self, query: str, k: int = 10) -> Dict[int, float]:
+        """Meter id -> BM25 relevance for the k best matches, for callers that already hold the rows"""
+        match = to_match_query(query)
+        if not match or k <= 0:
+            return {}
+
+        with self._lock:
+            self._refresh()
+            if not self.layout.usable:
+                return {}
+            if self.persistent:
+                rows = SQLiteConnectionPool.for_database(self.db_path).execute(self.layout.relevance_sql(), (match, k))
+                return {row['id']: row['relevance'] for row in rows}
+            rows = self._memory_index().execute(self.layout.relevance_sql(), (match, k)).fetchall()
+            return {row['id']: row['relevance'] for row in rows}
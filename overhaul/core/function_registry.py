@@ -1,6 +1,8 @@
 # core/function_registry.py
 from typing import Dict, List, Any
 
+from .spec_parser import CATALOG_TABLE
+
 class DatabaseFunctionRegistry:
     """Registry of available database functions with metadata"""
     
@@ -32,6 +34,12 @@ class DatabaseFunctionRegistry:
                 'parameters': [],
                 'returns': 'List[Dict]',
                 'example': f'databases.{db_name}.get_series_summary()'
+            },
+            'fulltext': {
+                'description': 'Rank records against free text (BM25 full-text search)',
+                'parameters': [{'name': 'query', 'type': 'str'}, {'name': 'k', 'type': 'int'}],
+                'returns': 'List[Dict]',
+                'example': f'databases.{db_name}.fulltext("harmonics Modbus TCP class 0.2S", 5)'
             }
         }
         
@@ -54,6 +62,56 @@ class DatabaseFunctionRegistry:
                     'returns': 'Dict',
                     'example': f'databases.{db_name}.get_specifications("PM5560")'
                 }
+                functions['get_specifications_many'] = {
+                    'description': 'Get detailed specifications for several models at once',
+                    'parameters': [{'name': 'models', 'type': 'List[str]'}],
+                    'returns': 'Dict[str, Dict]',
+                    'example': f'databases.{db_name}.get_specifications_many(["PM5560", "PM8240"])'
+                }
+                functions['get_all_specifications'] = {
+                    'description': 'Get detailed specifications for every model',
+                    'parameters': [],
+                    'returns': 'Dict[str, Dict]',
+                    'example': f'databases.{db_name}.get_all_specifications()'
+                }
+                functions['check_compliance'] = {
+                    'description': 'Decide measurable requirements with rules; unrecognised ones are returned as unresolved for the LLM',
+                    'parameters': [{'name': 'requirements', 'type': 'str | List[str]'}, {'name': 'model_name', 'type': 'str'}],
+                    'returns': 'Dict',
+                    'example': f'databases.{db_name}.check_compliance(tender_document.content, "PowerLogic PM8240")'
+                }
+            
+            if main_table == CATALOG_TABLE:
+                functions['filter'] = {
+                    'description': 'Filter records on numeric specs parsed from the catalog text '
+                                   '(field__lt/lte/gt/gte/ne/in, plain field for equality)',
+                    'parameters': [{'name': '**conditions', 'type': 'Any'}, {'name': 'limit', 'type': 'int'}],
+                    'returns': 'List[Dict]',
+                    'example': f'databases.{db_name}.filter(temp_min__lte=-10, accuracy_class__lte=0.2)'
+                }
+                functions['score_requirements'] = {
+                    'description': 'Score every requirement against every meter; top-k meters per clause with failing constraints',
+                    'parameters': [{'name': 'requirements', 'type': 'str | List[str]'}, {'name': 'k', 'type': 'int'}],
+                    'returns': 'Dict',
+                    'example': f'databases.{db_name}.score_requirements(tender_document.content, 5)'
+                }
+                functions['shortlist'] = {
+                    'description': 'Attach to each clause the k best meters that fail none of its hard constraints '
+                                   '(accuracy, voltage, I/O); closest matches with their unmet constraints fill the rest',
+                    'parameters': [{'name': 'clauses', 'type': 'List[Dict] | List[str] | str'}, {'name': 'k', 'type': 'int'}],
+                    'returns': 'List[Dict]',
+                    'example': f'databases.{db_name}.shortlist(extract_clauses.parsed_result.clauses, 5)'
+                }
+            
+            # The vocabulary comes from whichever feature tables exist, so any catalog can filter clauses
+            functions['relevant_clauses'] = {
+                'description': 'Clauses of a document that match the catalog vocabulary (BM25), '
+                               'so unrelated sections are left out of the prompt',
+                'parameters': [{'name': 'document', 'type': 'Dict | str'}, {'name': 'threshold', 'type': 'float'},
+                               {'name': 'limit', 'type': 'int'}],
+                'returns': 'List[Dict]',
+                'example': f'databases.{db_name}.relevant_clauses(tender_document, 0.15)'
+            }
         
         self.functions[db_name] = functions
     
@@ -0,0 +1,366 @@
+import json
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Any, Callable, Optional, Tuple
+
+# Characters that change the structure inside a candidate; strings are then consumed whole
+_STRUCTURE = re.compile(r'[{}\[\],"]')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# A number, true, false or null between structural characters
+_LITERAL = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_CLOSERS = {'{': '}', '[': ']'}
+
+@dataclass
+class JSONCandidate:
+    start: int
+    end: int
+    complete: bool
+    # Open containers at the end of the text (only for incomplete candidates)
+    open_stack: List[str] = field(default_factory=list)
+    in_string: bool = False
+    # Comma positions inside the candidate with the container stack at that point
+    cut_points: List[Tuple[int, Tuple[str, ...]]] = field(default_factory=list)
+    # Parsed value (only for complete candidates, which are kept only when they parse)
+    value: Any = None
+
+@dataclass
+class JSONExtraction:
+    value: Any
+    strategy: str
+    elapsed_us: float
+    span: Optional[Tuple[int, int]] = None
+
+    @property
+    def found(self) -> bool:
+        return self.strategy != 'none'
+
+    def report(self) -> dict:
+        return {'strategy': self.strategy, 'elapsed_us': round(self.elapsed_us, 1), 'span': self.span}
+
+def scan_json_candidates(text: str, openers: str = '{', max_cut_points: int = 8) -> List[JSONCandidate]:
+    """
+    Find top-level JSON values in a single left-to-right pass, never rescanning input.
+    Quotes are only tracked inside a candidate, so prose apostrophes and quotes are ignored.
+    Every open container checks the JSON grammar as it goes; a container whose content cannot be
+    JSON ('{see below}', '{oops]', '{it"s}') is invalid, and so is everything enclosing it. The
+    largest valid containers that start with one of `openers` are the candidates, so valid JSON
+    nested inside an invalid span is still found, and json.loads only ever sees disjoint spans.
+    """
+    candidates: List[JSONCandidate] = []
+    opener_pattern = re.compile('[' + re.escape(openers) + ']')
+    emitted: List[Tuple[int, int]] = []
+    # Last commas seen, with the innermost open container at each (for truncation repair)
+    commas: deque = deque(maxlen=max_cut_points)
+    length = len(text)
+    frame: Optional[_Frame] = None
+    pos = 0
+    in_string = False
+
+    while pos < length:
+        if frame is None:
+            opener = opener_pattern.search(text, pos)
+            if opener is None:
+                break
+            frame = _Frame(opener.group(), opener.start(), None)
+            pos = opener.end()
+            continue
+
+        token = _STRUCTURE.search(text, pos)
+        if token is None:
+            break
+        char = token.group()
+        if frame.valid:
+            frame.gap(text[pos:token.start()], emitted)
+        pos = token.end()
+
+        if char == '"':
+            if not _string_allowed(text, token.start()):
+                # Prose quote inside brackets: not JSON, and not the start of a string either
+                frame.invalidate(emitted)
+                continue
+            string = _STRING.match(text, token.start())
+            if string is None:
+                if frame.valid:
+                    # Unterminated string: the text was cut off mid-value
+                    in_string = True
+                    break
+                continue
+            frame.string(emitted)
+            pos = string.end()
+        elif char in _CLOSERS:
+            frame.child(emitted)
+            frame = _Frame(char, token.start(), frame)
+        elif char == ',':
+            frame.comma(emitted)
+            commas.append((token.start(), frame))
+        elif char == _CLOSERS[frame.opener]:
+            parent = frame.parent
+            frame.close(token.end(), openers, emitted)
+            frame = parent
+        else:
+            # Mismatched closer: not JSON; the container stays open so brackets keep pairing up
+            frame.invalidate(emitted)
+
+    for start, end in sorted(emitted):
+        try:
+            value = json.loads(text[start:end])
+        except (ValueError, RecursionError):
+            continue
+        candidates.append(JSONCandidate(start, end, True, value=value))
+
+    # Ran out of text with containers still open: the outermost one with nothing invalid inside is truncated JSON
+    open_frames = []
+    while frame is not None and frame.valid:
+        open_frames.append(frame)
+        frame = frame.parent
+    root = next((f for f in reversed(open_frames) if f.opener in openers), None)
+    if root is not None:
+        stack = [f.opener for f in reversed(open_frames[:open_frames.index(root) + 1])]
+        cut_points = [(position, tuple(_openers_from(root, inner))) for position, inner in commas
+                      if position > root.start]
+        candidates.append(JSONCandidate(root.start, length, False, stack, in_string, cut_points))
+    return candidates
+
+# Grammar states of an open container
+_OBJECT_START, _OBJECT_KEY, _OBJECT_COLON, _OBJECT_VALUE, _OBJECT_NEXT = range(5)
+_ARRAY_START, _ARRAY_VALUE, _ARRAY_NEXT = range(5, 8)
+_AFTER_VALUE = {_OBJECT_VALUE: _OBJECT_NEXT, _ARRAY_START: _ARRAY_NEXT, _ARRAY_VALUE: _ARRAY_NEXT}
+
+class _Frame:
+    """An open '{' or '[' during a scan, with where it is in the JSON grammar"""
+
+    __slots__ = ('opener', 'start', 'parent', 'state', 'valid', 'pending')
+
+    def __init__(self, opener: str, start: int, parent: Optional['_Frame']):
+        self.opener = opener
+        self.start = start
+        self.parent = parent
+        self.state = _OBJECT_START if opener == '{' else _ARRAY_START
+        self.valid = True
+        # Valid containers closed inside this one: candidates only if this one turns out invalid
+        self.pending: List[Any] = []
+
+    def invalidate(self, emitted: List[Tuple[int, int]]):
+        if self.valid:
+            self.valid = False
+            _flatten(self.pending, emitted)
+            self.pending = []
+
+    def gap(self, between: str, emitted: List[Tuple[int, int]]):
+        """Text between two structural characters: whitespace, a colon and/or a literal"""
+        between = between.strip()
+        if not between:
+            return
+        if self.state == _OBJECT_COLON:
+            if between[0] != ':':
+                return self.invalidate(emitted)
+            self.state = _OBJECT_VALUE
+            between = between[1:].strip()
+            if not between:
+                return
+        if self.state in _AFTER_VALUE and _LITERAL.fullmatch(between):
+            self.state = _AFTER_VALUE[self.state]
+        else:
+            self.invalidate(emitted)
+
+    def string(self, emitted: List[Tuple[int, int]]):
+        if self.state in (_OBJECT_START, _OBJECT_KEY):
+            self.state = _OBJECT_COLON
+        elif self.state in _AFTER_VALUE:
+            self.state = _AFTER_VALUE[self.state]
+        else:
+            self.invalidate(emitted)
+
+    def child(self, emitted: List[Tuple[int, int]]):
+        """A nested container opens here (its value is accounted for when it closes)"""
+        if self.state not in _AFTER_VALUE:
+            self.invalidate(emitted)
+
+    def comma(self, emitted: List[Tuple[int, int]]):
+        if self.state == _OBJECT_NEXT:
+            self.state = _OBJECT_KEY
+        elif self.state == _ARRAY_NEXT:
+            self.state = _ARRAY_VALUE
+        else:
+            self.invalidate(emitted)
+
+    def close(self, end: int, openers: str, emitted: List[Tuple[int, int]]):
+        if self.state not in (_OBJECT_START, _OBJECT_NEXT, _ARRAY_START, _ARRAY_NEXT):
+            self.invalidate(emitted)
+        parent = self.parent
+        if not self.valid:
+            if parent is not None:
+                parent.invalidate(emitted)
+            return
+        # A valid container is a candidate itself, or passes on the candidates it holds ('[' with openers '{')
+        found = (self.start, end) if self.opener in openers else self.pending
+        if parent is None or not parent.valid:
+            _flatten([found], emitted)
+        else:
+            parent.pending.append(found)
+            parent.state = _AFTER_VALUE[parent.state]
+
+def _flatten(pending: List[Any], emitted: List[Tuple[int, int]]):
+    stack = list(pending)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            emitted.append(item)
+        else:
+            stack.extend(item)
+
+def _openers_from(root: _Frame, inner: _Frame) -> List[str]:
+    """Openers of the containers from root down to inner, outermost first"""
+    openers = []
+    while inner is not root:
+        openers.append(inner.opener)
+        inner = inner.parent
+    openers.append(root.opener)
+    return openers[::-1]
+
+def _string_allowed(text: str, index: int) -> bool:
+    """Whether a JSON string may start at index: right after an opener, a comma or a colon"""
+    index -= 1
+    while index >= 0 and text[index] in ' \t\r\n':
+        index -= 1
+    return index >= 0 and text[index] in '{[,:'
+
+def repair_truncated(text: str, candidate: JSONCandidate) -> Optional[Any]:
+    """Close an unterminated JSON value, dropping a partial trailing element if needed"""
+    fragment = text[candidate.start:candidate.end]
+
+    # First try keeping everything: close the open string and containers
+    attempts = [(fragment + ('"' if candidate.in_string else ''), candidate.open_stack)]
+    # Then cut back to earlier commas, which drops the partially written element
+    for comma_pos, stack in reversed(candidate.cut_points):
+        attempts.append((text[candidate.start:comma_pos], list(stack)))
+
+    for body, stack in attempts:
+        closed = body.rstrip().rstrip(',:') + ''.join(_CLOSERS[c] for c in reversed(stack))
+        try:
+            return json.loads(closed)
+        except (ValueError, RecursionError):
+            continue
+    return None
+
+def extract_json(text: str,
+                 accept: Optional[Callable[[Any], bool]] = None,
+                 openers: str = '{',
+                 repair: bool = True) -> JSONExtraction:
+    """
+    Extract the best JSON value from an LLM response.
+    Strategies, in order: 'direct' (whole response, code fences stripped), 'scan' (largest
+    complete top-level value), 'repaired' (truncated tail closed off), otherwise 'none'.
+    - accept: Optional predicate a value must satisfy (e.g. required keys present).
+    """
+    started = time.perf_counter()
+
+    def done(value: Any, strategy: str, span: Optional[Tuple[int, int]] = None) -> JSONExtraction:
+        return JSONExtraction(value, strategy, (time.perf_counter() - started) * 1e6, span)
+
+    def acceptable(value: Any) -> bool:
+        return isinstance(value, (dict, list)) and (accept is None or accept(value))
+
+    stripped = (text or '').strip()
+    if stripped.startswith('```'):
+        stripped = stripped[3:]
+        if stripped[:4].lower() == 'json':
+            stripped = stripped[4:]
+    if stripped.endswith('```'):
+        stripped = stripped[:-3]
+    stripped = stripped.strip()
+
+    if stripped[:1] and stripped[0] in openers:
+        try:
+            value = json.loads(stripped)
+            if acceptable(value):
+                return done(value, 'direct', (0, len(text)))
+        except (ValueError, RecursionError):
+            pass
+
+    candidates = scan_json_candidates(text or '', openers)
+
+    complete = sorted((c for c in candidates if c.complete), key=lambda c: c.end - c.start, reverse=True)
+    for candidate in complete:
+        if acceptable(candidate.value):
+            return done(candidate.value, 'scan', (candidate.start, candidate.end))
+
+    if repair:
+        for candidate in (c for c in candidates if not c.complete):
+            value = repair_truncated(text, candidate)
+            if value is not None and acceptable(value):
+                return done(value, 'repaired', (candidate.start, candidate.end))
+
+    return done(None, 'none')
+
+class IncrementalJSONScanner:
+    """
+    Track a streamed response and report when its leading JSON value is complete.
+    Only responses that start with JSON (optionally inside a ``` fence) are tracked,
+    so prose answers that merely contain braces are never cut short.
+    """
+
+    def __init__(self, openers: str = '{['):
+        self.openers = openers
+        self.buffer: List[str] = []
+        self.length = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.disabled = False
+        self.complete = False
+        self.end: Optional[int] = None
+        self._prefix = ''
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next piece of text; returns True once the JSON value has closed"""
+        offset = self.length
+        self.buffer.append(chunk)
+        self.length += len(chunk)
+
+        if self.complete or self.disabled:
+            return self.complete
+
+        for index, char in enumerate(chunk):
+            if not self.started:
+                if char in self.openers:
+                    self.started = True
+                    self.stack.append(char)
+                    continue
+                self._prefix += char
+                # Allow whitespace and an opening code fence before the value
+                if not '```json'.startswith(self._prefix.strip().lower()):
+                    self.disabled = True
+                    return False
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in _CLOSERS:
+                self.stack.append(char)
+            elif char in '}]':
+                if char != _CLOSERS[self.stack[-1]]:
+                    self.disabled = True
+                    return False
+                self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+                    self.end = offset + index + 1
+                    return True
+
+        return False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return ''.join(self.buffer)
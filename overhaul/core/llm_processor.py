@@ -1,46 +1,172 @@
 # core/llm_processor.py
-import json
-import re
 import asyncio
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from .llm_cache import LLMResponseCache
+from .token_budget import budget_report
+from .json_extractor import extract_json, IncrementalJSONScanner
+from .schema_validator import SchemaValidator
 
 class LLMProcessor:
     """Handle LLM interactions using ollama"""
     
-    def __init__(self, model: str = "qwen2.5-coder:7b"):
+    def __init__(self,
+                 model: str = "qwen2.5-coder:7b",
+                 cache: Optional[LLMResponseCache] = None,
+                 host: Optional[str] = None,
+                 max_concurrency: int = 2,
+                 max_connections: int = 4,
+                 num_ctx: int = 8192,
+                 num_predict: int = 4096):
         self.model = model
+        self.cache = cache
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.num_ctx = num_ctx
+        self.num_predict = num_predict
+        
+        # Async client and semaphore are bound to the running event loop
+        self._client = None
+        self._semaphore = None
+        self._loop = None
     
-    async def process_prompt(self, prompt: str, timeout: int = 120) -> Dict[str, Any]:
-        """Process a prompt with the LLM and return structured result"""
+    def _get_client(self):
+        """Get the shared async ollama client, creating it for the current event loop"""
         
-        try:
-            # Import ollama here to avoid dependency issues if not installed
-            import ollama
-            
-            print(f"🤖 Processing with {self.model}...")
-            
-            response = ollama.chat(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                options={
-                    "temperature": 0.1,
-                    "timeout": timeout,
-                    "num_ctx": 8192,
-                    "num_predict": 4096
-                }
+        # Import ollama here to avoid dependency issues if not installed
+        import ollama
+        import httpx
+        
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = ollama.AsyncClient(
+                host=self.host,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
             )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections of the async client"""
+        
+        if self._client is not None:
+            try:
+                await self._client.close()
+            except Exception:
+                pass
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+    
+    async def process_prompt(self,
+                             prompt: str,
+                             timeout: int = 120,
+                             use_cache: bool = True,
+                             output_schema: Optional[Dict[str, Any]] = None,
+                             stream: bool = False) -> Dict[str, Any]:
+        """
+        Process a prompt with the LLM and return structured result.
+        With output_schema, Ollama constrains decoding to the schema and the parsed
+        result is checked against it ('schema_valid' / 'schema_errors'; 'schema_enforced'
+        is False when the schema uses keywords the local validator does not check).
+        With stream, tokens are read as they are generated and generation is cancelled
+        as soon as a leading JSON document closes (see 'streaming' in the result).
+        """
+        
+        options = {
+            "temperature": 0.1,
+            "timeout": timeout,
+            "num_ctx": self.num_ctx,
+            "num_predict": self.num_predict
+        }
+        
+        # Ollama silently drops whatever does not fit in the context window
+        budget = budget_report(prompt, self.num_ctx, self.num_predict)
+        if budget['overflow']:
+            print(f"⚠️ Prompt is ~{budget['prompt_tokens']} tokens but only ~{budget['available_tokens']} "
+                  f"fit in num_ctx={self.num_ctx}; the model will not see the end of it")
+        
+        # Serve identical prompts from the response cache
+        cache_key = None
+        if self.cache is not None and use_cache:
+            # The timeout only bounds the wait; it does not change what the model generates
+            key_options = {key: value for key, value in options.items() if key != 'timeout'}
+            if output_schema:
+                key_options['format'] = output_schema
+            cache_key = self.cache.make_key(self.model, key_options, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"💾 Cache hit for {self.model} ({len(prompt)} char prompt)")
+                cached['cached'] = True
+                return cached
+        
+        try:
+            client = self._get_client()
             
-            ai_content = response['message']['content']
+            # Bound the number of in-flight requests; waiting here does not block the event loop
+            async with self._semaphore:
+                print(f"🤖 Processing with {self.model}...")
+                
+                if stream:
+                    ai_content, stream_stats = await asyncio.wait_for(
+                        self._stream_chat(client, prompt, options, output_schema),
+                        timeout
+                    )
+                else:
+                    response = await asyncio.wait_for(
+                        client.chat(
+                            model=self.model,
+                            messages=[{"role": "user", "content": prompt}],
+                            options=options,
+                            format=output_schema
+                        ),
+                        timeout
+                    )
+                    ai_content = response['message']['content']
             
             # Try to extract JSON from response
-            json_result = self._extract_json_from_response(ai_content)
+            extraction = extract_json(ai_content)
             
-            return {
+            result = {
                 'raw_response': ai_content,
-                'parsed_result': json_result,
+                'parsed_result': extraction.value if extraction.found else {"message": ai_content},
+                'json_extraction': extraction.report(),
                 'success': True
             }
             
+            if stream:
+                result['streaming'] = stream_stats
+            
+            if output_schema:
+                validator = SchemaValidator.for_schema(output_schema)
+                schema_errors = validator.validate(extraction.value) if extraction.found \
+                    else ["$: no JSON value found in response"]
+                result['schema_valid'] = not schema_errors
+                # Valid against the whole schema, not just the keywords the validator understands
+                result['schema_enforced'] = validator.fully_enforced
+                result['schema_errors'] = schema_errors[:20]
+                if schema_errors:
+                    print(f"⚠️ Response does not match output_schema: {schema_errors[0]}")
+            
+            # A response that did not parse or validate would otherwise be replayed on every later run
+            if cache_key is not None and extraction.found and result.get('schema_valid', True):
+                self.cache.set(cache_key, self.model, result)
+            
+            return result
+            
+        except asyncio.TimeoutError:
+            print(f"❌ LLM processing timed out after {timeout}s")
+            return {
+                'error': f"LLM request timed out after {timeout}s",
+                'success': False
+            }
         except ImportError:
             # Fallback if ollama not available
             print("⚠️ Ollama not available, using mock response")
@@ -56,21 +182,65 @@ class LLMProcessor:
                 'success': False
             }
     
+    async def _stream_chat(self,
+                           client,
+                           prompt: str,
+                           options: Dict[str, Any],
+                           output_schema: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Stream a chat response, stopping once the leading JSON document is complete"""
+        
+        started = time.perf_counter()
+        first_token_at = None
+        chunks_received = 0
+        eval_count = None
+        scanner = IncrementalJSONScanner()
+        
+        response_stream = await client.chat(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            options=options,
+            format=output_schema,
+            stream=True
+        )
+        
+        try:
+            async for part in response_stream:
+                content = part['message']['content']
+                if content:
+                    chunks_received += 1
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    if scanner.feed(content):
+                        break
+                if part.get('done'):
+                    eval_count = part.get('eval_count')
+        finally:
+            # Closing the stream drops the HTTP connection, which makes Ollama stop generating
+            await response_stream.aclose()
+        
+        text = scanner.text
+        stopped_early = scanner.complete and eval_count is None
+        if stopped_early:
+            print(f"✂️ Stopped generation after {chunks_received} tokens: JSON document complete")
+        
+        # Ollama streams roughly one token per chunk; unseen tokens are bounded by num_predict
+        tokens_generated = eval_count if eval_count is not None else chunks_received
+        stats = {
+            'time_to_first_token': (first_token_at - started) if first_token_at else None,
+            'total_time': time.perf_counter() - started,
+            'tokens_generated': tokens_generated,
+            'stopped_early': stopped_early,
+            'max_tokens_saved': max(0, options.get('num_predict', 0) - tokens_generated) if stopped_early else 0
+        }
+        
+        return (text[:scanner.end] if stopped_early else text), stats
+    
     def _extract_json_from_response(self, text: str) -> Optional[Dict[str, Any]]:
         """Extract JSON from LLM response"""
         
-        # Try to find JSON in the response
-        json_pattern = re.compile(r'\{(?:[^{}]|(?:\{[^{}]*\}))*\}', re.DOTALL)
-        matches = json_pattern.findall(text)
-        
-        # Try each match, from longest to shortest
-        if matches:
-            matches.sort(key=len, reverse=True)
-            for match in matches:
-                try:
-                    return json.loads(match)
-                except json.JSONDecodeError:
-                    continue
+        extraction = extract_json(text)
+        if extraction.found:
+            return extraction.value
         
         # If no JSON found, return the text as a message
-        return {"message": text}
\ No newline at end of file
+        return {"message": text}
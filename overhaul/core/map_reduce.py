@@ -0,0 +1,80 @@
+import importlib
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+def chunk_items(items: List[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Split a list into consecutive chunks of at most chunk_size items"""
+    chunk_size = max(1, int(chunk_size))
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+def _parsed(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the parsed JSON payload of a chunk result"""
+    parsed = result.get('parsed_result') if isinstance(result, dict) else None
+    return parsed if isinstance(parsed, dict) else {}
+
+def reduce_concat(results: List[Dict[str, Any]], reduce_key: Optional[str] = None) -> Dict[str, Any]:
+    """Concatenate list values across chunks (only reduce_key if given), keeping chunk order"""
+    merged: Dict[str, List[Any]] = {}
+
+    for result in results:
+        parsed = _parsed(result)
+        keys = [reduce_key] if reduce_key else [k for k, v in parsed.items() if isinstance(v, list)]
+        for key in keys:
+            value = parsed.get(key)
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif value is not None:
+                merged.setdefault(key, []).append(value)
+
+    if reduce_key and reduce_key not in merged:
+        merged[reduce_key] = []
+    return merged
+
+def reduce_merge_keys(results: List[Dict[str, Any]], reduce_key: Optional[str] = None) -> Dict[str, Any]:
+    """Merge chunk objects key by key: lists are extended, dicts updated, scalars overwritten"""
+    merged: Dict[str, Any] = {}
+
+    for result in results:
+        parsed = _parsed(result)
+        if reduce_key:
+            parsed = parsed.get(reduce_key) or {}
+        for key, value in parsed.items():
+            existing = merged.get(key)
+            if isinstance(existing, list) and isinstance(value, list):
+                existing.extend(value)
+            elif isinstance(existing, dict) and isinstance(value, dict):
+                existing.update(value)
+            elif isinstance(value, list):
+                merged[key] = list(value)
+            elif isinstance(value, dict):
+                merged[key] = dict(value)
+            else:
+                merged[key] = value
+
+    return {reduce_key: merged} if reduce_key else merged
+
+REDUCERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'concat': reduce_concat,
+    'merge_keys': reduce_merge_keys
+}
+
+def load_reduce_function(path: str) -> Callable[[List[Dict[str, Any]]], Dict[str, Any]]:
+    """Import a custom reducer given as 'package.module:function'"""
+    module_name, _, attr = path.partition(':')
+    if not module_name or not attr:
+        raise ValueError(f"Custom reduce_function must look like 'module:function', got '{path}'")
+    return getattr(importlib.import_module(module_name), attr)
+
+def reduce_results(mode: str,
+                   results: List[Dict[str, Any]],
+                   reduce_key: Optional[str] = None,
+                   reduce_function: Optional[str] = None) -> Dict[str, Any]:
+    """Combine ordered chunk results with the reducer declared on the step"""
+    if mode == 'custom':
+        if not reduce_function:
+            raise ValueError("reduce: custom requires a 'reduce_function'")
+        return load_reduce_function(reduce_function)(results)
+
+    if mode not in REDUCERS:
+        raise ValueError(f"Unknown reduce mode '{mode}' (expected one of: {', '.join(REDUCERS)}, custom)")
+    return REDUCERS[mode](results, reduce_key)
@@ -3,8 +3,9 @@ import os
 import yaml
 import json
 import asyncio
+import time
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PureWindowsPath
 from typing import Dict, List, Any, Optional
 from jinja2 import Environment, BaseLoader, Template
 
@@ -12,16 +13,37 @@ from .database_autodiscovery import DatabaseAutoDiscovery, SmartDatabaseWrapper
 from .function_registry import DatabaseFunctionRegistry  
 from .template_analyzer import TemplateAnalyzer
 from .file_processor import FileProcessor
+from .extraction_cache import ExtractionCache
 from .llm_processor import LLMProcessor
+from .llm_cache import LLMResponseCache
+from .step_scheduler import StepScheduler
+from .map_reduce import chunk_items, reduce_results
+from .token_budget import TokenBudgetBatcher, estimate_tokens, resolve_token_budget
+from .document_windows import DocumentWindower, merge_window_items
+from .json_extractor import extract_json
 from .excel_generator import ExcelGenerator
 
+# libyaml's loader when PyYAML was built with it: the same safe subset, about ten times faster on prompt files
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# One Jinja2 environment for every engine in the process; it holds no engine state, so compiled templates
+# and expressions are kept by source and a prompt pays for compiling only on its first run
+_JINJA_ENV = Environment(loader=BaseLoader())
+_TEMPLATE_CACHE: Dict[str, Template] = {}
+_EXPRESSION_CACHE: Dict[str, Any] = {}
+
 class PromptEngine:
     """Main YAML prompt engine with auto-discovery database integration"""
     
     def __init__(self, 
                  databases_dir: str = "databases", 
                  prompts_dir: str = "prompts",
-                 outputs_dir: str = "outputs"):
+                 outputs_dir: str = "outputs",
+                 cache_dir: Optional[str] = None,
+                 enable_llm_cache: bool = True,
+                 enable_extraction_cache: bool = True,
+                 max_llm_concurrency: int = 2,
+                 max_step_concurrency: int = 4):
         self.databases_dir = Path(databases_dir)
         self.prompts_dir = Path(prompts_dir)
         self.outputs_dir = Path(outputs_dir)
@@ -29,25 +51,55 @@ class PromptEngine:
         # Ensure output directory exists
         self.outputs_dir.mkdir(exist_ok=True)
         
+        # Persistent LLM response cache (defaults to the outputs directory)
+        self.llm_cache = LLMResponseCache(cache_dir or str(self.outputs_dir)) if enable_llm_cache else None
+        
+        # Extracted document text keyed on file content, so re-analysing a known tender skips extraction
+        self.extraction_cache = ExtractionCache(cache_dir or str(self.outputs_dir)) if enable_extraction_cache else None
+        
         # Initialize components
         self.discovery_engine = DatabaseAutoDiscovery()
         self.function_registry = DatabaseFunctionRegistry()
         self.template_analyzer = TemplateAnalyzer(self.function_registry)
-        self.file_processor = FileProcessor()
-        self.llm_processor = LLMProcessor()
+        self.file_processor = FileProcessor(cache=self.extraction_cache)
+        self.llm_processor = LLMProcessor(cache=self.llm_cache, max_concurrency=max_llm_concurrency)
+        
+        # Steps without mutual dependencies run concurrently up to this limit
+        self.max_step_concurrency = max_step_concurrency
+        self.last_pipeline_stats = {}
+        self.last_stage_timings = {}
         
-        # Jinja2 environment for template rendering
-        self.jinja_env = Environment(loader=BaseLoader())
+        # Jinja2 environment for template rendering (compiled templates are shared across engines)
+        self.jinja_env = _JINJA_ENV
+        self._template_cache = _TEMPLATE_CACHE
         
         print("🔧 Prompt engine components initialized")
     
-    async def run_prompt(self, prompt_file: str) -> Dict[str, Any]:
-        """Run a YAML prompt configuration end-to-end"""
+    async def run_prompt(self, prompt_file: str, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run a YAML prompt configuration end-to-end.
+        - inputs: Optional input values by name (file paths for file inputs); anything
+          not provided is asked for interactively.
+        """
+        
+        self.last_stage_timings = {}
+        stage_started = time.perf_counter()
+        
+        def stage_done(stage: str):
+            nonlocal stage_started
+            now = time.perf_counter()
+            self.last_stage_timings[stage] = now - stage_started
+            stage_started = now
         
         try:
             # 1. Load and validate YAML configuration
             print(f"📄 Loading prompt configuration: {prompt_file}")
             config = self._load_yaml_config(prompt_file)
+            config['databases'] = {
+                db_name: self._resolve_database_path(db_path)
+                for db_name, db_path in (config.get('databases') or {}).items()
+            }
+            stage_done('load_config')
             
             # 2. Validate configuration
             print("🔍 Validating configuration...")
@@ -58,14 +110,17 @@ class PromptEngine:
             if validation['warnings']:
                 for warning in validation['warnings']:
                     print(f"⚠️ {warning}")
+            stage_done('validate')
             
             # 3. Process input files
             print("📁 Processing input files...")
-            input_data = await self._process_inputs(config.get('inputs', []))
+            input_data = await self._process_inputs(config.get('inputs', []), inputs)
+            stage_done('inputs')
             
             # 4. Load databases with auto-discovery
             print("🗄️ Loading databases with auto-discovery...")
             databases = await self._load_databases_smart(config.get('databases', {}))
+            stage_done('databases')
             
             # 5. Execute processing pipeline
             print("🔄 Executing processing pipeline...")
@@ -74,6 +129,7 @@ class PromptEngine:
                 input_data,
                 databases
             )
+            stage_done('pipeline')
             
             # 6. Generate outputs
             print("📤 Generating outputs...")
@@ -83,18 +139,39 @@ class PromptEngine:
                 input_data,
                 config
             )
+            stage_done('outputs')
             
-            return {
+            result = {
                 'success': True,
                 'pipeline_results': pipeline_results,
-                'output_files': output_files
+                'output_files': output_files,
+                'pipeline_stats': self.last_pipeline_stats,
+                'stage_timings': self.last_stage_timings
             }
             
+            # Steps reduced from only some of their chunks or windows
+            incomplete = {name: step_result['failed_chunks'] for name, step_result in pipeline_results.items()
+                          if isinstance(step_result, dict) and step_result.get('failed_chunks')}
+            if incomplete:
+                for name, failed in incomplete.items():
+                    print(f"⚠️ Step '{name}' is missing the results of chunks {', '.join(str(i + 1) for i in failed)}")
+                result['incomplete_steps'] = incomplete
+            
+            if self.llm_cache is not None:
+                cache_stats = self.llm_cache.stats()
+                print(f"💾 LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+                result['llm_cache'] = cache_stats
+            
+            return result
+            
         except Exception as e:
             print(f"❌ Error running prompt: {e}")
             import traceback
             traceback.print_exc()
             return {'success': False, 'error': str(e)}
+        finally:
+            # Release pooled LLM connections bound to this event loop
+            await self.llm_processor.aclose()
     
     def _load_yaml_config(self, prompt_file: str) -> Dict[str, Any]:
         """Load and parse YAML configuration"""
@@ -104,7 +181,7 @@ class PromptEngine:
             raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
         
         with open(prompt_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=_YAML_LOADER)
         
         if not config:
             raise ValueError("Empty or invalid YAML configuration")
@@ -112,19 +189,29 @@ class PromptEngine:
         print(f"✅ Loaded configuration: {config.get('name', 'Unnamed')}")
         return config
     
-    async def _process_inputs(self, inputs_config: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Process input files and parameters"""
+    async def _process_inputs(self, 
+                              inputs_config: List[Dict[str, Any]], 
+                              provided: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Process input files and parameters (provided values skip the interactive prompt)"""
         
         input_data = {}
+        provided = provided or {}
         
         for input_spec in inputs_config:
             input_name = input_spec['name']
             input_type = input_spec['type']
             required = input_spec.get('required', False)
             
+            if input_name in provided and input_type != 'file':
+                input_data[input_name] = provided[input_name]
+                continue
+            
             if input_type == 'file':
                 # Get file from user
-                file_path = input(f"📁 Enter path for {input_name} ({input_spec.get('description', '')}): ").strip().strip('"\'')
+                if input_name in provided:
+                    file_path = str(provided[input_name] or '')
+                else:
+                    file_path = input(f"📁 Enter path for {input_name} ({input_spec.get('description', '')}): ").strip().strip('"\'')
                 
                 if not file_path and required:
                     raise ValueError(f"Required input '{input_name}' not provided")
@@ -168,6 +255,19 @@ class PromptEngine:
         
         return input_data
     
+    def _resolve_database_path(self, db_path: str) -> str:
+        """Fall back to the databases directory when a configured path does not exist on this machine"""
+        
+        if Path(db_path).exists():
+            return db_path
+        
+        # Configured paths may be absolute Windows paths from another machine
+        local_path = self.databases_dir / PureWindowsPath(db_path).name
+        if local_path.exists():
+            print(f"ℹ️ Using {local_path} for {db_path}")
+            return str(local_path)
+        return db_path
+    
     async def _load_databases_smart(self, database_config: Dict[str, str]) -> Dict[str, SmartDatabaseWrapper]:
         """Load databases with auto-discovery"""
         
@@ -194,69 +294,77 @@ class PromptEngine:
                                steps: List[Dict[str, Any]], 
                                input_data: Dict[str, Any], 
                                databases: Dict[str, SmartDatabaseWrapper]) -> Dict[str, Any]:
-        """Execute the processing pipeline"""
-        
-        results = {}
+        """Execute the processing pipeline, running independent steps concurrently"""
         
         # Create template context
-        context = {
+        base_context = {
             **input_data,
             'databases': databases,
             'timestamp': datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         }
         
-        for step in steps:
+        # Build the dependency graph up front (rejects unknown dependencies and cycles)
+        scheduler = StepScheduler(steps, max_concurrency=self.max_step_concurrency)
+        
+        async def run_step(step: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
             step_name = step['name']
-            prompt_template = step['prompt_template']
-            dependencies = step.get('dependencies', [])
-            timeout = step.get('timeout', 120)
-            
             print(f"⚙️ Executing step: {step_name}")
             
-            # Check dependencies
-            for dep in dependencies:
-                if dep not in results:
-                    raise ValueError(f"Step '{step_name}' depends on '{dep}' which hasn't been executed")
-            
-            # Add previous results to context
-            for dep in dependencies:
+            # Each step sees the results of everything it (transitively) depends on
+            context = dict(base_context)
+            for dep in scheduler.ancestors(step_name):
                 context[dep] = results[dep]
-
-            # CHUNKED LLM STEP (example for recommend_meters)
-            if step_name == "recommend_meters":
-                # Get clauses from previous step result
-                extract_clauses_result = results.get('extract_clauses', {})
-                parsed = extract_clauses_result.get('parsed_result', {})
-                context['clauses'] = parsed.get('clauses', [])
-                # Get meters (you may want to limit or filter here)
-                context['meters'] = databases['meters'].query("SELECT model_name, series_name, selection_blurb FROM Meters LIMIT 10")
-                chunked_result = await self._execute_chunked_llm_step(
-                    step, context, chunk_key="clauses", chunk_size=5, meters_key="meters"
-                )
-                results[step_name] = chunked_result
-                print(f"✅ Step '{step_name}' completed (chunked)")
-                continue
-
-            # Normal (non-chunked) step
-            # Render template
-            try:
-                template = self.jinja_env.from_string(prompt_template)
-                rendered_prompt = template.render(**context)
-                
-                print(f"📝 Rendered prompt ({len(rendered_prompt)} chars)")
-                
-                # Execute with LLM
-                step_result = await self.llm_processor.process_prompt(rendered_prompt, timeout)
-                results[step_name] = step_result
-                
-                print(f"✅ Step '{step_name}' completed")
-                
-            except Exception as e:
-                print(f"❌ Step '{step_name}' failed: {e}")
-                raise
+            
+            return await self._execute_step(step, context)
+        
+        results = await scheduler.run(run_step)
+        
+        self.last_pipeline_stats = scheduler.stats()
+        print(f"⏱️ Pipeline finished in {self.last_pipeline_stats['wall_time']:.2f}s "
+              f"(critical path {self.last_pipeline_stats['critical_path_duration']:.2f}s: "
+              f"{' -> '.join(self.last_pipeline_stats['critical_path'])})")
         
         return results
     
+    async def _execute_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a single processing step with its prepared template context"""
+        
+        step_name = step['name']
+        prompt_template = step['prompt_template']
+        timeout = step.get('timeout', 120)
+        use_cache = step.get('cache', True)
+        
+        # Map/reduce step: fan the prompt out over chunks of a list
+        if 'map_over' in step:
+            return await self._execute_map_step(step, context)
+        
+        # Windowed step: run the prompt over overlapping windows of a long document
+        if 'window_over' in step:
+            return await self._execute_window_step(step, context)
+        
+        # Normal (non-chunked) step
+        # Render template
+        try:
+            template = self._get_template(prompt_template)
+            rendered_prompt = template.render(**context)
+            
+            print(f"📝 Rendered prompt ({len(rendered_prompt)} chars)")
+            
+            # Execute with LLM
+            step_result = await self.llm_processor.process_prompt(
+                rendered_prompt, timeout,
+                use_cache=use_cache,
+                output_schema=step.get('output_schema'),
+                stream=step.get('stream', False)
+            )
+            
+            print(f"✅ Step '{step_name}' completed")
+            return step_result
+            
+        except Exception as e:
+            print(f"❌ Step '{step_name}' failed: {e}")
+            raise
+    
     async def _generate_outputs(self, 
                               outputs_config: List[Dict[str, Any]], 
                               pipeline_results: Dict[str, Any],
@@ -282,7 +390,7 @@ class PromptEngine:
             condition = output_spec.get('condition')
             if condition:
                 try:
-                    template = self.jinja_env.from_string(f"{{{{ {condition} }}}}")
+                    template = self._get_template(f"{{{{ {condition} }}}}")
                     should_generate = template.render(**context).strip().lower() in ['true', '1', 'yes']
                     if not should_generate:
                         continue
@@ -291,7 +399,7 @@ class PromptEngine:
                     continue
             
             # Render filename
-            filename_tmpl = self.jinja_env.from_string(filename_template)
+            filename_tmpl = self._get_template(filename_template)
             filename = filename_tmpl.render(**context)
             output_path = self.outputs_dir / filename
             
@@ -300,7 +408,7 @@ class PromptEngine:
                 data = output_spec.get('data', pipeline_results)
                 if isinstance(data, str):
                     # Data is a template string
-                    data_template = self.jinja_env.from_string(data)
+                    data_template = self._get_template(data)
                     data = data_template.render(**context)
                     try:
                         data = json.loads(data)
@@ -317,7 +425,7 @@ class PromptEngine:
                 data = output_spec.get('data', pipeline_results)
                 if isinstance(data, str):
                     # Data is a template string
-                    data_template = self.jinja_env.from_string(data)
+                    data_template = self._get_template(data)
                     data = data_template.render(**context)
                     try:
                         data = json.loads(data)
@@ -344,14 +452,20 @@ class PromptEngine:
                     llm_result = pipeline_results[llm_step]
                     raw_response = llm_result.get('raw_response', '')
                     
-                    # Try to extract JSON from raw response
-                    excel_data = self._extract_and_fix_json_from_raw_response(raw_response)
+                    # Schema-validated output is parsed already; it skips the Excel repair pass only
+                    # when every keyword of the schema was actually enforced
+                    schema_valid = bool(llm_result.get('schema_valid'))
+                    fully_validated = schema_valid and bool(llm_result.get('schema_enforced'))
+                    if schema_valid:
+                        excel_data = llm_result['parsed_result']
+                    else:
+                        excel_data = self._extract_and_fix_json_from_raw_response(raw_response)
                     
                     # Generate Excel file
                     if excel_data is not None:
                         excel_generator = ExcelGenerator()
                         try:
-                            if excel_generator.generate_compliance_report(str(output_path), excel_data):
+                            if excel_generator.generate_compliance_report(str(output_path), excel_data, validated=fully_validated):
                                 print(f"✅ Custom Excel file generated: {output_path}")
                             else:
                                 print(f"❌ Failed to generate Excel file: {output_path}")
@@ -370,7 +484,7 @@ class PromptEngine:
                 else:
                     template_content = output_spec.get('content', '# Results\\n\\n{{ pipeline_results | tojson(indent=2) }}')
                 
-                template = self.jinja_env.from_string(template_content)
+                template = self._get_template(template_content)
                 content = template.render(**context)
                 
                 with open(output_path, 'w', encoding='utf-8') as f:
@@ -378,7 +492,7 @@ class PromptEngine:
             
             elif output_type == 'text':
                 content_template = output_spec.get('content', '{{ pipeline_results }}')
-                template = self.jinja_env.from_string(content_template)
+                template = self._get_template(content_template)
                 content = template.render(**context)
                 
                 with open(output_path, 'w', encoding='utf-8') as f:
@@ -398,7 +512,7 @@ class PromptEngine:
             return [self._render_template_dict(item, context) for item in data]
         elif isinstance(data, str) and '{{' in data:
             try:
-                template = self.jinja_env.from_string(data)
+                template = self._get_template(data)
                 return template.render(**context)
             except:
                 return data
@@ -410,142 +524,217 @@ class PromptEngine:
         
         print(f"🔧 Extracting JSON from {len(raw_response)} character response...")
         
-        import re
-        import json
-        
-        # Remove any markdown code block markers
-        clean_response = raw_response.strip()
-        if clean_response.startswith('```json'):
-            clean_response = clean_response[7:]  # Remove ```json
-        if clean_response.startswith('```'):
-            clean_response = clean_response[3:]   # Remove ```
-        if clean_response.endswith('```'):
-            clean_response = clean_response[:-3]  # Remove trailing ```
-        
-        clean_response = clean_response.strip()
-        
-        # Try to parse the entire response as JSON first
-        try:
-            data = json.loads(clean_response)
-            
-            # Validate that it has the required sections
-            required_sections = ['summary_sheet', 'compliance_matrix', 'meter_specs']
-            missing_sections = [s for s in required_sections if s not in data]
-            
-            if not missing_sections:
-                print("✅ Found complete valid Excel structure in LLM response")
-                return data
-            else:
-                print(f"⚠️ Found JSON but missing sections: {missing_sections}")
-                
-        except json.JSONDecodeError as e:
-            print(f"⚠️ Direct JSON parse failed: {e}")
+        required_sections = ['summary_sheet', 'compliance_matrix', 'meter_specs']
         
-        # Try to find JSON blocks with improved regex
-        json_pattern = re.compile(r'\{(?:[^{}]|{[^{}]*})*\}', re.DOTALL)
-        matches = json_pattern.findall(clean_response)
+        # Single pass over the response: whole-text parse, then the largest complete
+        # top-level object, then a repaired truncated tail
+        extraction = extract_json(
+            raw_response,
+            accept=lambda data: isinstance(data, dict) and all(section in data for section in required_sections)
+        )
         
-        # Try each match, from longest to shortest
-        if matches:
-            matches.sort(key=len, reverse=True)
-            for i, match in enumerate(matches):
-                try:
-                    data = json.loads(match)
-                    
-                    # Validate that it has the required sections
-                    required_sections = ['summary_sheet', 'compliance_matrix', 'meter_specs']
-                    missing_sections = [s for s in required_sections if s not in data]
-                    
-                    if not missing_sections:
-                        print(f"✅ Found valid Excel structure in match {i+1}")
-                        return data
-                    else:
-                        print(f"⚠️ Match {i+1} missing sections: {missing_sections}")
-                        
-                except json.JSONDecodeError as e:
-                    print(f"⚠️ JSON parse error in match {i+1}: {e}")
-                    continue
+        if extraction.found:
+            print(f"✅ Found valid Excel structure ({extraction.strategy}, {extraction.elapsed_us:.0f}µs)")
+            return extraction.value
         
-        # If we get here, something went wrong - but we know the LLM response was good
-        # Let's try a more aggressive approach
-        print("🔄 Attempting aggressive JSON extraction...")
-        
-        # Find the opening brace and try to parse from there
-        start_idx = clean_response.find('{')
-        if start_idx != -1:
-            # Find the last closing brace
-            end_idx = clean_response.rfind('}')
-            if end_idx != -1 and end_idx > start_idx:
-                json_candidate = clean_response[start_idx:end_idx+1]
-                try:
-                    data = json.loads(json_candidate)
-                    required_sections = ['summary_sheet', 'compliance_matrix', 'meter_specs']
-                    missing_sections = [s for s in required_sections if s not in data]
-                    
-                    if not missing_sections:
-                        print("✅ Aggressive extraction successful!")
-                        return data
-                        
-                except json.JSONDecodeError:
-                    pass
-        
-        print("❌ All JSON extraction methods failed")
+        print(f"❌ No JSON object with sections {required_sections} found ({extraction.elapsed_us:.0f}µs)")
         # Return None to indicate failure - let the calling code handle fallback
         return None
     
-    async def _execute_chunked_llm_step(
-        self,
-        step: Dict[str, Any],
-        context: Dict[str, Any],
-        chunk_key: str,
-        chunk_size: int = 5,
-        meters_key: str = "meters"
-    ) -> Dict[str, Any]:
+    def _get_template(self, source: str) -> Template:
+        """Compile a Jinja template once and reuse it for every render"""
+        
+        template = self._template_cache.get(source)
+        if template is None:
+            template = self.jinja_env.from_string(source)
+            self._template_cache[source] = template
+        return template
+    
+    def _evaluate_expression(self, expression: Any, context: Dict[str, Any]) -> Any:
+        """Evaluate a YAML-declared Jinja expression (e.g. 'extract_clauses.parsed_result.clauses')"""
+        
+        if not isinstance(expression, str):
+            return expression
+        compiled = _EXPRESSION_CACHE.get(expression)
+        if compiled is None:
+            compiled = self.jinja_env.compile_expression(expression, undefined_to_none=True)
+            _EXPRESSION_CACHE[expression] = compiled
+        return compiled(**context)
+    
+    async def _execute_map_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Execute an LLM step in chunks, aggregating results.
-        - step: The step dict from YAML.
-        - context: The current template context.
-        - chunk_key: The key in context to chunk (e.g., 'clauses').
+        Execute an LLM step over chunks of a list in parallel and reduce the results.
+        YAML keys:
+        - map_over: Jinja expression giving the list to split (e.g. 'extract_clauses.parsed_result.clauses').
+        - map_as: Template variable holding each chunk (defaults to map_over when it is a plain name).
         - chunk_size: Number of items per chunk.
-        - meters_key: The key for meters in context.
-        Returns: Aggregated result dictionary.
+        - token_budget: Prompt token budget ('auto' = num_ctx - num_predict); packs chunks by size instead of count.
+        - split_key: Field of an oversized item to split across chunks (defaults to its longest string).
+        - let: Extra template variables, evaluated once before the fan-out.
+        - reduce: concat | merge_keys | custom (with reduce_function: 'module:function').
+        - reduce_key: Optional key to reduce (e.g. 'recommendations').
+        - max_concurrency: Maximum number of chunks in flight.
+        Returns: Step result with the reduced 'parsed_result'.
         """
-        prompt_template = step['prompt_template']
+        step_name = step['name']
         timeout = step.get('timeout', 120)
-        all_items = context[chunk_key]
-        meters = context.get(meters_key)
-        aggregated_recommendations = []
-
-        def chunk_list(lst, n):
-            for i in range(0, len(lst), n):
-                yield lst[i:i + n]
-
-        for chunk in chunk_list(all_items, chunk_size):
-            chunk_context = context.copy()
-            chunk_context[chunk_key] = chunk
-            if meters is not None:
-                chunk_context[meters_key] = meters
-            template = self.jinja_env.from_string(prompt_template)
-            rendered_prompt = template.render(**chunk_context)
-            print(f"📝 [Chunked] Rendered prompt ({len(rendered_prompt)} chars, {len(chunk)} items)")
-            chunk_result = await self.llm_processor.process_prompt(rendered_prompt, timeout)
-            # Expecting chunk_result to be a dict with 'recommendations' key
-            if isinstance(chunk_result, dict):
-                # If recommendations are present at the top level
-                if 'recommendations' in chunk_result:
-                    aggregated_recommendations.extend(chunk_result['recommendations'])
-                    continue
-                # If raw_response is present, try to parse it as JSON
-                if 'raw_response' in chunk_result:
-                    try:
-                        parsed = json.loads(chunk_result['raw_response'])
-                        if 'recommendations' in parsed:
-                            aggregated_recommendations.extend(parsed['recommendations'])
-                            continue
-                    except Exception as e:
-                        print("⚠️ Could not parse raw_response as JSON:", e)
-                print("⚠️ Chunk result missing 'recommendations', skipping this chunk.")
+        use_cache = step.get('cache', True)
+        map_over = step['map_over']
+        map_as = step.get('map_as') or (map_over if map_over.isidentifier() else 'items')
+        
+        # Variables shared by every chunk are evaluated once
+        context = dict(context)
+        for name, expression in (step.get('let') or {}).items():
+            context[name] = self._evaluate_expression(expression, context)
+        
+        items = self._evaluate_expression(map_over, context) or []
+        if not isinstance(items, list):
+            items = list(items) if isinstance(items, (tuple, set)) else [items]
+        
+        template = self._get_template(step['prompt_template'])
+        
+        if 'token_budget' in step:
+            # Pack items by estimated size around the fixed part of the prompt
+            budget = resolve_token_budget(step['token_budget'], self.llm_processor.num_ctx, self.llm_processor.num_predict)
+            overhead = estimate_tokens(template.render(**{**context, map_as: []}))
+            batcher = TokenBudgetBatcher(budget, overhead_tokens=overhead, text_key=step.get('split_key'))
+            chunks = batcher.batch(items)
+            print(f"📦 Packed {len(items)} items into {len(chunks)} chunks "
+                  f"(budget {budget} tokens, prompt overhead ~{overhead})")
+        else:
+            chunks = list(chunk_items(items, step.get('chunk_size', 5)))
+        semaphore = asyncio.Semaphore(max(1, step.get('max_concurrency', 4)))
+        
+        async def run_chunk(index: int, chunk: List[Any]) -> Dict[str, Any]:
+            async with semaphore:
+                chunk_context = dict(context)
+                chunk_context[map_as] = chunk
+                rendered_prompt = template.render(**chunk_context)
+                print(f"📝 [{step_name} {index + 1}/{len(chunks)}] Rendered prompt ({len(rendered_prompt)} chars, {len(chunk)} items)")
+                return await self.llm_processor.process_prompt(
+                    rendered_prompt, timeout,
+                    use_cache=use_cache,
+                    output_schema=step.get('output_schema'),
+                    stream=step.get('stream', False)
+                )
+        
+        chunk_results = await asyncio.gather(*(run_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        successful, errors = self._collect_chunk_results(step_name, chunk_results)
+        
+        parsed_result = reduce_results(
+            step.get('reduce', 'concat'),
+            successful,
+            reduce_key=step.get('reduce_key'),
+            reduce_function=step.get('reduce_function')
+        )
+        
+        self._report_chunk_step(step_name, len(chunks), 'chunks', errors)
+        
+        return {
+            'raw_response': "\n".join(r.get('raw_response', '') for r in successful),
+            'parsed_result': parsed_result,
+            'chunks': len(chunks),
+            **self._chunk_step_status(successful, errors)
+        }
+    
+    async def _execute_window_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute an LLM step over overlapping windows of a document too long for one prompt, concurrently.
+        YAML keys:
+        - window_over: Jinja expression giving the document (e.g. 'tender_document'; a file input or text).
+        - window_as: Template variable holding each window (default 'window'; use {{ window.text }}).
+        - token_budget: Prompt token budget per window ('auto' = num_ctx - num_predict, the default).
+        - window_overlap: Tokens of text repeated at the start of the next window (default 300).
+        - reduce_key: List in each window's JSON to merge (e.g. 'clauses'); clauses that straddle a
+          window edge come back from both windows and are kept once.
+        - dedup_key / dedup_text_key: Item fields that identify a clause (default 'clause_id' / 'text').
+        - max_concurrency: Maximum number of windows in flight.
+        Without reduce_key the raw responses are joined in window order.
+        Returns: Step result with the merged 'parsed_result' and the 'windows' that were sent.
+        """
+        step_name = step['name']
+        timeout = step.get('timeout', 120)
+        use_cache = step.get('cache', True)
+        window_as = step.get('window_as', 'window')
+        
+        document = self._evaluate_expression(step['window_over'], context)
+        template = self._get_template(step['prompt_template'])
+        budget = resolve_token_budget(step.get('token_budget', 'auto'), self.llm_processor.num_ctx, self.llm_processor.num_predict)
+        empty_window = {'index': 0, 'start': 0, 'end': 0, 'first_page': None, 'last_page': None,
+                        'tokens': 0, 'clause_ids': [], 'text': ''}
+        overhead = estimate_tokens(template.render(**{**context, window_as: empty_window, 'window_count': 1}))
+        windower = DocumentWindower(budget, overhead_tokens=overhead, overlap_tokens=step.get('window_overlap', 300))
+        windows = windower.windows(document)
+        print(f"🪟 Split document into {len(windows)} windows "
+              f"(budget {budget} tokens, prompt overhead ~{overhead}, overlap {windower.overlap})")
+        semaphore = asyncio.Semaphore(max(1, step.get('max_concurrency', 4)))
+        
+        async def run_window(window: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                window_context = dict(context)
+                window_context[window_as] = window
+                window_context['window_count'] = len(windows)
+                rendered_prompt = template.render(**window_context)
+                pages = f", pages {window['first_page']}-{window['last_page']}" if window['first_page'] else ""
+                print(f"📝 [{step_name} {window['index'] + 1}/{len(windows)}] Rendered prompt "
+                      f"({len(rendered_prompt)} chars{pages})")
+                return await self.llm_processor.process_prompt(
+                    rendered_prompt, timeout,
+                    use_cache=use_cache,
+                    output_schema=step.get('output_schema'),
+                    stream=step.get('stream', False)
+                )
+        
+        window_results = await asyncio.gather(*(run_window(window) for window in windows))
+        successful, errors = self._collect_chunk_results(step_name, window_results)
+        
+        if step.get('reduce_key'):
+            parsed_result = merge_window_items(successful, step['reduce_key'],
+                                               id_key=step.get('dedup_key', 'clause_id'),
+                                               text_key=step.get('dedup_text_key', 'text'))
+        else:
+            parsed_result = None
+        
+        self._report_chunk_step(step_name, len(windows), 'windows', errors)
+        
+        return {
+            'raw_response': "\n".join(r.get('raw_response', '') for r in successful),
+            'parsed_result': parsed_result,
+            'chunks': len(windows),
+            **self._chunk_step_status(successful, errors),
+            'windows': [{key: value for key, value in window.items() if key != 'text'} for window in windows]
+        }
+    
+    def _collect_chunk_results(self, step_name: str, chunk_results: List[Any]):
+        """Split results (in chunk order) into successful ones and reported, skipped failures"""
+        successful = []
+        errors = []
+        for index, chunk_result in enumerate(chunk_results):
+            if isinstance(chunk_result, dict) and chunk_result.get('success'):
+                successful.append(chunk_result)
             else:
-                print("⚠️ Chunk result is not a dict, skipping this chunk.")
-
-        return {"recommendations": aggregated_recommendations}
\ No newline at end of file
+                error = chunk_result.get('error', 'unknown error') if isinstance(chunk_result, dict) else 'invalid result'
+                print(f"⚠️ Chunk {index + 1} of '{step_name}' failed, skipping: {error}")
+                errors.append({'chunk': index, 'error': error})
+        return successful, errors
+    
+    @staticmethod
+    def _chunk_step_status(successful: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Result fields of a fanned-out step: it only succeeds when every chunk did, and a step
+        reduced from some of its chunks is marked partial with the indices that are missing"""
+        return {
+            'success': not errors,
+            'partial': bool(errors) and bool(successful),
+            'failed_chunks': [error['chunk'] for error in errors],
+            'chunk_errors': errors
+        }
+    
+    @staticmethod
+    def _report_chunk_step(step_name: str, total: int, unit: str, errors: List[Dict[str, Any]]):
+        if not errors:
+            print(f"✅ Step '{step_name}' completed ({total} {unit})")
+        elif len(errors) < total:
+            print(f"⚠️ Step '{step_name}' is partial: {len(errors)} of {total} {unit} failed "
+                  f"({', '.join(str(error['chunk'] + 1) for error in errors)})")
+        else:
+            print(f"❌ Step '{step_name}' failed: all {total} {unit} failed")
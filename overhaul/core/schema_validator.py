@@ -0,0 +1,162 @@
+import json
+from typing import Dict, List, Any, Callable
+
+Validator = Callable[[Any, str], List[str]]
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'null': lambda v: v is None
+}
+
+# Keywords _compile turns into checks, and keywords that only describe the schema
+_ENFORCED_KEYWORDS = {'type', 'enum', 'anyOf', 'properties', 'required', 'additionalProperties',
+                      'items', 'minItems', 'maxItems', 'minimum', 'maximum'}
+_ANNOTATION_KEYWORDS = {'title', 'description', 'default', 'examples', '$schema', '$id', '$comment'}
+
+class SchemaValidator:
+    """Validate parsed LLM output against a JSON schema compiled once into closures"""
+
+    _compiled: Dict[str, 'SchemaValidator'] = {}
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        # Keywords (with their schema path) that validate() does not check
+        self.unchecked: List[str] = []
+        self._validate = self._compile(schema, '$')
+
+    @property
+    def fully_enforced(self) -> bool:
+        """True when every keyword of the schema is checked, so a valid value needs no further repair"""
+        return not self.unchecked
+
+    @classmethod
+    def for_schema(cls, schema: Dict[str, Any]) -> 'SchemaValidator':
+        """Get the compiled validator for a schema, compiling it on first use"""
+        key = json.dumps(schema, sort_keys=True)
+        validator = cls._compiled.get(key)
+        if validator is None:
+            validator = cls(schema)
+            cls._compiled[key] = validator
+            if validator.unchecked:
+                print(f"⚠️ output_schema keywords not enforced locally: {', '.join(validator.unchecked[:10])}")
+        return validator
+
+    def validate(self, value: Any) -> List[str]:
+        """Return a list of validation errors (empty when the value is valid)"""
+        return self._validate(value, '$')
+
+    def is_valid(self, value: Any) -> bool:
+        return not self.validate(value)
+
+    def _compile(self, schema: Any, schema_path: str) -> Validator:
+        """Turn a schema (subset: type, enum, properties, required, additionalProperties,
+        items, minItems, maxItems, minimum, maximum, anyOf) into one validator function.
+        Any other keyword is recorded in self.unchecked rather than silently accepted."""
+
+        if isinstance(schema, bool):
+            return (lambda value, path: []) if schema else (lambda value, path: [f"{path}: no value is allowed here"])
+        if not isinstance(schema, dict):
+            raise ValueError(f"{schema_path}: schema must be an object or boolean, got {type(schema).__name__}")
+
+        self.unchecked.extend(f"{schema_path}.{keyword}" for keyword in schema
+                              if keyword not in _ENFORCED_KEYWORDS and keyword not in _ANNOTATION_KEYWORDS)
+        if 'items' in schema and not isinstance(schema['items'], (dict, bool)):
+            self.unchecked.append(f"{schema_path}.items")
+
+        checks: List[Validator] = []
+
+        if 'type' in schema:
+            types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+            unknown = [t for t in types if t not in _TYPE_CHECKS]
+            if unknown:
+                raise ValueError(f"{schema_path}: unsupported type {unknown[0]!r} (supported: {', '.join(_TYPE_CHECKS)})")
+            type_checks = [_TYPE_CHECKS[t] for t in types]
+            expected = ' or '.join(types)
+
+            def check_type(value, path):
+                if any(check(value) for check in type_checks):
+                    return []
+                return [f"{path}: expected {expected}, got {type(value).__name__}"]
+            checks.append(check_type)
+
+        if 'enum' in schema:
+            allowed = schema['enum']
+
+            def check_enum(value, path):
+                return [] if value in allowed else [f"{path}: {value!r} is not one of {allowed}"]
+            checks.append(check_enum)
+
+        if 'anyOf' in schema:
+            options = [self._compile(option, f"{schema_path}.anyOf[{index}]") for index, option in enumerate(schema['anyOf'])]
+
+            def check_any_of(value, path):
+                if any(not option(value, path) for option in options):
+                    return []
+                return [f"{path}: does not match any allowed schema"]
+            checks.append(check_any_of)
+
+        properties = {name: self._compile(sub, f"{schema_path}.properties.{name}") for name, sub in schema.get('properties', {}).items()}
+        required = list(schema.get('required', []))
+        additional = schema.get('additionalProperties', True)
+        additional_validator = self._compile(additional, f"{schema_path}.additionalProperties") if isinstance(additional, dict) else None
+
+        if properties or required or additional is not True:
+            def check_object(value, path):
+                if not isinstance(value, dict):
+                    return []
+                errors = [f"{path}: missing required property '{name}'" for name in required if name not in value]
+                for name, item in value.items():
+                    if name in properties:
+                        errors.extend(properties[name](item, f"{path}.{name}"))
+                    elif additional is False:
+                        errors.append(f"{path}: unexpected property '{name}'")
+                    elif additional_validator is not None:
+                        errors.extend(additional_validator(item, f"{path}.{name}"))
+                return errors
+            checks.append(check_object)
+
+        if 'items' in schema or 'minItems' in schema or 'maxItems' in schema:
+            item_validator = self._compile(schema['items'], f"{schema_path}.items") if isinstance(schema.get('items'), (dict, bool)) else None
+            min_items = schema.get('minItems')
+            max_items = schema.get('maxItems')
+
+            def check_array(value, path):
+                if not isinstance(value, list):
+                    return []
+                errors = []
+                if min_items is not None and len(value) < min_items:
+                    errors.append(f"{path}: expected at least {min_items} items, got {len(value)}")
+                if max_items is not None and len(value) > max_items:
+                    errors.append(f"{path}: expected at most {max_items} items, got {len(value)}")
+                if item_validator is not None:
+                    for index, item in enumerate(value):
+                        errors.extend(item_validator(item, f"{path}[{index}]"))
+                return errors
+            checks.append(check_array)
+
+        if 'minimum' in schema or 'maximum' in schema:
+            minimum = schema.get('minimum')
+            maximum = schema.get('maximum')
+
+            def check_range(value, path):
+                if not _TYPE_CHECKS['number'](value):
+                    return []
+                if minimum is not None and value < minimum:
+                    return [f"{path}: {value} is less than minimum {minimum}"]
+                if maximum is not None and value > maximum:
+                    return [f"{path}: {value} is greater than maximum {maximum}"]
+                return []
+            checks.append(check_range)
+
+        def validate(value, path):
+            errors = []
+            for check in checks:
+                errors.extend(check(value, path))
+            return errors
+
+        return validate
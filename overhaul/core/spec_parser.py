@@ -0,0 +1,353 @@
+import re
+import sqlite3
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from .connection_pool import list_user_tables
+
+# Bump when parsing rules change so persisted MeterSpecs rows are rebuilt
+SPEC_PARSER_VERSION = 1
+SPEC_TABLE = 'MeterSpecs'
+
+# Normalized field -> unit (also the MeterSpecs column names and filter() keywords)
+SPEC_FIELDS: Dict[str, str] = {
+    'voltage_max': 'V',
+    'current_min': 'A',
+    'current_max': 'A',
+    'frequency_min': 'Hz',
+    'frequency_max': 'Hz',
+    'temp_min': '°C',
+    'temp_max': '°C',
+    'storage_temp_min': '°C',
+    'storage_temp_max': '°C',
+    'humidity_max': '%RH',
+    'altitude_max': 'm',
+    'accuracy_pct': '%',
+    'voltage_accuracy_pct': '%',
+    'current_accuracy_pct': '%',
+    'accuracy_class': 'class',
+    'ip_solids': 'IP digit',
+    'ip_liquids': 'IP digit',
+    'harmonic_order': 'order',
+    'sampling_rate': 'samples/cycle',
+    'memory_bytes': 'B',
+    'width': 'mm',
+    'height': 'mm',
+    'depth': 'mm',
+    'weight': 'g',
+    'digital_inputs': 'count',
+    'digital_outputs': 'count',
+    'io_expandable': 'bool',
+    'pollution_degree': 'level',
+    'overvoltage_category': 'level',
+}
+
+# Main table of the meter catalog schema the parser understands, and the key feature tables' meter_id refers to
+CATALOG_TABLE = 'Meters'
+CATALOG_KEY = 'id'
+
+# Tables whose rows feed the parsed specs (changes there make MeterSpecs rows stale)
+SOURCE_TABLES = [CATALOG_TABLE, 'AccuracyClasses', 'MeasurementAccuracy', 'PowerQualityAnalysis', 'InputsOutputs']
+
+# A leading dash is a sign only when it does not follow a value ('5%–95%' is a range)
+_NUMBER = r'(?:(?<![\w%°.])[-+−–])?\d+(?:\.\d+)?'
+_LENGTH_UNITS = {'mm': 1.0, 'cm': 10.0, 'm': 1000.0}
+_MASS_UNITS = {'kg': 1000.0, 'g': 1.0, 'gms': 1.0, 'gm': 1.0}
+# Memory size unit -> bytes (also used to read sizes written in requirements)
+MEMORY_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4}
+_ROMAN = {'I': 1, 'II': 2, 'III': 3, 'IV': 4}
+# EN 50470-3 (MID) active energy classes expressed as their IEC percentage equivalents
+_MID_CLASSES = {'A': 2.0, 'B': 1.0, 'C': 0.5}
+_VOLTAGE_COLUMNS = ('rated_voltage', 'voltage', 'voltage_range', 'measured_voltage', 'input_voltage')
+
+def _to_float(text: str) -> float:
+    return float(text.replace('−', '-').replace('–', '-').replace('+', ''))
+
+def _quantities(text: Optional[str], units: Dict[str, float]) -> List[float]:
+    """Every '<number> <unit>' in a text, converted to the base unit"""
+    if not text:
+        return []
+    pattern = re.compile(rf'({_NUMBER})\s*({"|".join(sorted(map(re.escape, units), key=len, reverse=True))})(?![A-Za-z])',
+                         re.IGNORECASE)
+    return [_to_float(number) * units[unit.lower()] for number, unit in pattern.findall(text)]
+
+def parse_range(text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """'-25 to 70 °C', '-25…70 °C', '5% to 95% RH' -> (min, max); text after ' at ' is a condition, not the range"""
+    if not text:
+        return None, None
+    head = re.split(r'\bat\b', text, maxsplit=1)[0]
+    values = [_to_float(n) for n in re.findall(_NUMBER, head)]
+    if re.search(r'°\s*F\b', head) and not re.search(r'°\s*C\b', head):
+        values = [(v - 32) * 5 / 9 for v in values]
+    if not values:
+        return None, None
+    return min(values), max(values)
+
+def parse_frequency(text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """'50/60 Hz', '60 Hz / 50 Hz', '50/60 Hz +/- 15%' -> (50, 60)"""
+    if not text:
+        return None, None
+    values = [float(n) for n in re.findall(r'(\d+(?:\.\d+)?)(?=\s*(?:/\s*\d+(?:\.\d+)?\s*)*Hz)', text, re.IGNORECASE)]
+    return (min(values), max(values)) if values else (None, None)
+
+def parse_level(text: Optional[str]) -> Optional[int]:
+    """'2' -> 2, 'III' -> 3, 'CAT III' -> 3"""
+    if not text:
+        return None
+    digits = re.search(r'\d+', text)
+    if digits:
+        return int(digits.group())
+    roman = re.search(r'\b(IV|III|II|I)\b', text.upper())
+    return _ROMAN[roman.group(1)] if roman else None
+
+def parse_accuracy_classes(texts: List[str]) -> Optional[float]:
+    """Best (lowest) active energy class; other quantities only count when no energy class is given"""
+    energy, other = [], []
+    for text in texts:
+        if not text:
+            continue
+        classes = [float(c) for c in re.findall(r'Class\s+(\d+(?:\.\d+)?)\s*S?\b', text, re.IGNORECASE)]
+        classes += [_MID_CLASSES[c.upper()] for c in re.findall(r'Class\s+([ABC])\b', text)]
+        (energy if re.search(r'active\s+energy', text, re.IGNORECASE) else other).extend(classes)
+    values = energy or other
+    return min(values) if values else None
+
+def parse_percent(text: Optional[str]) -> Optional[float]:
+    """'±0.2 %', '+/- 0.5 %' -> 0.2 / 0.5 (values without a % sign are not percentages)"""
+    if not text:
+        return None
+    match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
+    return float(match.group(1)) if match else None
+
+def parse_harmonic_order(texts: List[str]) -> Optional[int]:
+    orders = []
+    for text in texts:
+        if not text:
+            continue
+        orders += [int(n) for n in re.findall(r'(\d+)(?:st|nd|rd|th)\s*(?:order|harmonic)', text, re.IGNORECASE)]
+        orders += [int(n) for n in re.findall(r'harmonics?\s+up\s+to\s+(?:the\s+)?(\d+)', text, re.IGNORECASE)]
+    return max(orders) if orders else None
+
+def parse_io_count(description: Optional[str], output: bool) -> Optional[int]:
+    """'2 digital', '3 digital 30 V AC / 3 digital 60 V DC' -> 2 / 6; LEDs and RCM inputs are not counted"""
+    if not description:
+        return None
+    kinds = r'digital|relay|form|pulse|solid' if output else r'digital|status'
+    total, found = 0, False
+    for part in re.split(r'[/,]', description):
+        part = part.strip()
+        count = re.match(r'(\d+)\b', part)
+        if not count or re.search(r'LED|RCM|analog', part, re.IGNORECASE):
+            continue
+        if re.fullmatch(r'\d+', part) or re.search(kinds, part, re.IGNORECASE):
+            total += int(count.group(1))
+            found = True
+    return total if found else None
+
+def parse_meter_specs(meter: Dict[str, Any], related: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Normalize one meter's free-text specifications into SPEC_FIELDS (None when unknown)"""
+    specs: Dict[str, Any] = {field: None for field in SPEC_FIELDS}
+
+    for column in _VOLTAGE_COLUMNS:
+        volts = _quantities(meter.get(column), {'v': 1.0, 'vac': 1.0, 'vdc': 1.0, 'kv': 1000.0})
+        if volts:
+            specs['voltage_max'] = max(volts)
+            break
+
+    amps = _quantities(meter.get('rated_current'), {'a': 1.0, 'ma': 0.001})
+    if amps:
+        specs['current_min'], specs['current_max'] = min(amps), max(amps)
+
+    specs['frequency_min'], specs['frequency_max'] = parse_frequency(meter.get('network_frequency'))
+    specs['temp_min'], specs['temp_max'] = parse_range(meter.get('operating_temp'))
+    specs['storage_temp_min'], specs['storage_temp_max'] = parse_range(meter.get('storage_temp'))
+    specs['humidity_max'] = parse_range(meter.get('relative_humidity'))[1]
+
+    altitudes = _quantities(meter.get('operating_altitude'), {'m': 1.0, 'km': 1000.0, 'ft': 0.3048})
+    specs['altitude_max'] = max(altitudes) if altitudes else None
+
+    sampling = re.search(r'(\d+)\s*samples', meter.get('sampling_rate') or '', re.IGNORECASE)
+    specs['sampling_rate'] = int(sampling.group(1)) if sampling else None
+
+    memory = _quantities(meter.get('memory_capacity'), MEMORY_UNITS)
+    specs['memory_bytes'] = int(memory[0]) if memory else None
+
+    for field in ('width', 'height', 'depth'):
+        lengths = _quantities(meter.get(field), _LENGTH_UNITS)
+        specs[field] = lengths[0] if lengths else None
+    weights = _quantities(meter.get('weight'), _MASS_UNITS)
+    specs['weight'] = weights[0] if weights else None
+
+    specs['pollution_degree'] = parse_level(meter.get('pollution_degree'))
+    specs['overvoltage_category'] = parse_level(meter.get('overvoltage_category'))
+
+    text_values = [v for v in meter.values() if isinstance(v, str)]
+    ip_code = next((m for m in (re.search(r'\bIP\s?(\d)(\d|X)\b', t, re.IGNORECASE) for t in text_values) if m), None)
+    if ip_code:
+        specs['ip_solids'] = int(ip_code.group(1))
+        specs['ip_liquids'] = int(ip_code.group(2)) if ip_code.group(2).isdigit() else None
+
+    features = [r.get('analysis_feature') for r in related.get('PowerQualityAnalysis', [])]
+    specs['harmonic_order'] = parse_harmonic_order(features + [meter.get('selection_blurb')])
+
+    accuracy_rows = related.get('MeasurementAccuracy', [])
+    class_texts = [r.get('accuracy_class') for r in related.get('AccuracyClasses', [])]
+    class_texts += [f"{r.get('accuracy')} {str(r.get('parameter') or '').replace('_', ' ')}" for r in accuracy_rows]
+    specs['accuracy_class'] = parse_accuracy_classes(class_texts)
+
+    by_parameter = {}
+    for row in accuracy_rows:
+        percent = parse_percent(row.get('accuracy'))
+        if percent is not None:
+            parameter = str(row.get('parameter') or '').lower()
+            by_parameter[parameter] = min(percent, by_parameter.get(parameter, percent))
+    specs['voltage_accuracy_pct'] = by_parameter.get('voltage')
+    specs['current_accuracy_pct'] = by_parameter.get('current')
+    core = [by_parameter[p] for p in ('active_energy', 'active_power', 'voltage', 'current') if p in by_parameter]
+    specs['accuracy_pct'] = min(core) if core else (min(by_parameter.values()) if by_parameter else None)
+
+    inputs, outputs, expandable = [], [], False
+    for row in related.get('InputsOutputs', []):
+        io_type = str(row.get('io_type') or '').lower()
+        description = row.get('description')
+        expandable = expandable or 'expandable' in str(description or '').lower()
+        if io_type.startswith('input'):
+            inputs.append(parse_io_count(description, output=False))
+        elif io_type.startswith('output'):
+            outputs.append(parse_io_count(description, output=True))
+    known_inputs = [n for n in inputs if n is not None]
+    known_outputs = [n for n in outputs if n is not None]
+    specs['digital_inputs'] = sum(known_inputs) if known_inputs else None
+    specs['digital_outputs'] = sum(known_outputs) if known_outputs else None
+    specs['io_expandable'] = int(expandable) if related.get('InputsOutputs') else None
+
+    return specs
+
+_OPERATORS: Dict[str, Tuple[str, Callable[[Any, Any], bool]]] = {
+    'eq': ('=', lambda a, b: a == b),
+    'ne': ('!=', lambda a, b: a != b),
+    'lt': ('<', lambda a, b: a < b),
+    'lte': ('<=', lambda a, b: a <= b),
+    'gt': ('>', lambda a, b: a > b),
+    'gte': ('>=', lambda a, b: a >= b),
+    'in': ('IN', lambda a, b: a in b),
+}
+
+def compare(actual: Any, operator: str, value: Any) -> bool:
+    """Apply a filter operator ('lte', 'gte', 'in', ...) to a known spec value"""
+    return _OPERATORS[operator][1](actual, value)
+
+def parse_conditions(conditions: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+    """Turn filter() keywords like temp_min__lte=-10 into (field, operator, value) triples"""
+    parsed = []
+    for key, value in conditions.items():
+        field, _, operator = key.partition('__')
+        operator = operator or 'eq'
+        if field not in SPEC_FIELDS:
+            raise ValueError(f"Unknown spec field '{field}' (available: {', '.join(SPEC_FIELDS)})")
+        if operator not in _OPERATORS:
+            raise ValueError(f"Unknown operator '__{operator}' (available: {', '.join(_OPERATORS)})")
+        if operator == 'in':
+            value = tuple(value)
+        parsed.append((field, operator, value))
+    return parsed
+
+def matches(specs: Dict[str, Any], conditions: List[Tuple[str, str, Any]]) -> bool:
+    """SQL semantics: an unknown (None) value never satisfies a condition"""
+    for field, operator, value in conditions:
+        actual = specs.get(field)
+        if actual is None or not compare(actual, operator, value):
+            return False
+    return True
+
+def conditions_sql(conditions: List[Tuple[str, str, Any]]) -> Tuple[str, List[Any]]:
+    """WHERE clause over MeterSpecs for parsed conditions (field names are whitelisted)"""
+    clauses, params = [], []
+    for field, operator, value in conditions:
+        if operator == 'in':
+            clauses.append(f"s.{field} IN ({', '.join('?' * len(value))})" if value else "0")
+            params.extend(value)
+        else:
+            clauses.append(f"s.{field} {_OPERATORS[operator][0]} ?")
+            params.append(value)
+    return ' AND '.join(clauses) or '1', params
+
+def parse_catalog(meters: List[Dict[str, Any]],
+                  related_rows: Dict[str, List[Dict[str, Any]]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(meter row, parsed specs) for every meter, given all rows of the related source tables"""
+    grouped: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+    for table in SOURCE_TABLES[1:]:
+        by_meter: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in related_rows.get(table, []):
+            by_meter.setdefault(row.get('meter_id'), []).append(row)
+        grouped[table] = by_meter
+    return [
+        (meter, parse_meter_specs(meter, {table: rows.get(meter.get(CATALOG_KEY), []) for table, rows in grouped.items()}))
+        for meter in meters
+    ]
+
+def _select_all(conn: sqlite3.Connection, table: str) -> List[Dict[str, Any]]:
+    cursor = conn.execute(f'SELECT * FROM "{table}"')
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+def parse_catalog_from(conn: sqlite3.Connection) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Parse every meter straight from the source tables (no side table needed)"""
+    tables = list_user_tables(conn)
+    if CATALOG_TABLE not in tables:
+        return []
+    return parse_catalog(_select_all(conn, CATALOG_TABLE),
+                         {table: _select_all(conn, table) for table in SOURCE_TABLES[1:] if table in tables})
+
+def install_spec_table(conn: sqlite3.Connection) -> int:
+    """(Re)build the MeterSpecs side table with an index per field; returns the number of meters parsed"""
+    tables = list_user_tables(conn)
+    if CATALOG_TABLE not in tables:
+        return 0
+
+    columns = ',\n\t'.join(f"{field} {'INTEGER' if SPEC_FIELDS[field] in ('count', 'bool', 'level', 'order', 'B', 'IP digit', 'samples/cycle') else 'REAL'}"
+                           for field in SPEC_FIELDS)
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS {SPEC_TABLE} (
+\tmeter_id INTEGER PRIMARY KEY REFERENCES {CATALOG_TABLE}({CATALOG_KEY}) ON DELETE CASCADE,
+\tparser_version INTEGER NOT NULL,
+\t{columns}
+)""")
+    for field in SPEC_FIELDS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{SPEC_TABLE.lower()}_{field} ON {SPEC_TABLE}({field})")
+
+    # Edits to the source rows drop the parsed row; filter() then parses that catalog in memory
+    for table in SOURCE_TABLES:
+        if table not in tables:
+            continue
+        key = CATALOG_KEY if table == CATALOG_TABLE else 'meter_id'
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'OLD'), ('DELETE', 'OLD')):
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {SPEC_TABLE.lower()}_{table.lower()}_{event.lower()} "
+                         f"AFTER {event} ON {table} BEGIN "
+                         f"DELETE FROM {SPEC_TABLE} WHERE meter_id = {row}.{key}; END")
+
+    parsed = parse_catalog_from(conn)
+    conn.execute(f"DELETE FROM {SPEC_TABLE}")
+    fields = list(SPEC_FIELDS)
+    placeholders = ', '.join('?' * (len(fields) + 2))
+    conn.executemany(
+        f"INSERT INTO {SPEC_TABLE} (meter_id, parser_version, {', '.join(fields)}) VALUES ({placeholders})",
+        [[meter[CATALOG_KEY], SPEC_PARSER_VERSION] + [specs[f] for f in fields] for meter, specs in parsed]
+    )
+    return len(parsed)
+
+def spec_table_status(conn: sqlite3.Connection) -> Optional[str]:
+    """None when MeterSpecs is complete and current, otherwise why it needs rebuilding"""
+    tables = list_user_tables(conn)
+    if CATALOG_TABLE not in tables:
+        return None
+    if SPEC_TABLE not in tables:
+        return 'missing'
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({SPEC_TABLE})")}
+    if not set(SPEC_FIELDS) <= columns:
+        return 'outdated columns'
+    counts = conn.execute(
+        f"SELECT (SELECT COUNT(*) FROM {CATALOG_TABLE}), COUNT(*), SUM(parser_version = ?) FROM {SPEC_TABLE}",
+        (SPEC_PARSER_VERSION,)
+    ).fetchone()
+    if counts[1] != counts[0] or (counts[2] or 0) != counts[1]:
+        return 'stale'
+    return None
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Callable, Awaitable
+
+@dataclass
+class StepTiming:
+    name: str
+    started_at: float
+    finished_at: float
+    dependencies: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+class StepScheduler:
+    """Run processing steps concurrently as soon as their dependencies have completed"""
+
+    def __init__(self, steps: List[Dict[str, Any]], max_concurrency: int = 4):
+        self.steps = {step['name']: step for step in steps}
+        self.order = [step['name'] for step in steps]
+        self.max_concurrency = max(1, max_concurrency)
+        self.dependencies = {
+            name: list(step.get('dependencies', [])) for name, step in self.steps.items()
+        }
+        self.timings: Dict[str, StepTiming] = {}
+        self.wall_time = 0.0
+
+        if len(self.steps) != len(steps):
+            raise ValueError("Duplicate step names in processing_steps")
+
+        self._validate_graph()
+
+    def _validate_graph(self):
+        """Reject unknown dependencies and dependency cycles before anything runs"""
+
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.steps:
+                    raise ValueError(f"Step '{name}' depends on '{dep}' which is not a defined step")
+
+        # Depth-first search with colouring to find a cycle and report it
+        WHITE, GREY, BLACK = 0, 1, 2
+        colour = {name: WHITE for name in self.order}
+
+        def visit(name: str, path: List[str]):
+            colour[name] = GREY
+            for dep in self.dependencies[name]:
+                if colour[dep] == GREY:
+                    cycle = path[path.index(dep):] + [dep]
+                    raise ValueError(f"Dependency cycle in processing_steps: {' -> '.join(cycle)}")
+                if colour[dep] == WHITE:
+                    visit(dep, path + [dep])
+            colour[name] = BLACK
+
+        for name in self.order:
+            if colour[name] == WHITE:
+                visit(name, [name])
+
+    def ancestors(self, name: str) -> List[str]:
+        """Get all transitive dependencies of a step, in pipeline order"""
+
+        seen = set()
+        stack = list(self.dependencies[name])
+        while stack:
+            dep = stack.pop()
+            if dep not in seen:
+                seen.add(dep)
+                stack.extend(self.dependencies[dep])
+        return [step for step in self.order if step in seen]
+
+    async def run(self, execute: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Execute every step, launching each one as soon as its dependencies are done.
+        - execute: coroutine called as execute(step, results) returning the step result.
+        Returns: Results keyed by step name, in pipeline order.
+        """
+        results: Dict[str, Any] = {}
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        running: Dict[asyncio.Task, str] = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        start = time.perf_counter()
+
+        async def run_step(name: str):
+            async with semaphore:
+                started_at = time.perf_counter()
+                result = await execute(self.steps[name], results)
+                self.timings[name] = StepTiming(
+                    name=name,
+                    started_at=started_at - start,
+                    finished_at=time.perf_counter() - start,
+                    dependencies=self.dependencies[name]
+                )
+                return result
+
+        def launch_ready():
+            for name in self.order:
+                if name in remaining and not remaining[name]:
+                    del remaining[name]
+                    running[asyncio.ensure_future(run_step(name))] = name
+
+        try:
+            launch_ready()
+            while running:
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    results[name] = task.result()
+                    for deps in remaining.values():
+                        deps.discard(name)
+                launch_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            # Wait for cancelled siblings to unwind so none outlives the run or leaks an unretrieved error
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            self.wall_time = time.perf_counter() - start
+
+        return {name: results[name] for name in self.order if name in results}
+
+    def critical_path(self) -> Dict[str, Any]:
+        """Get the chain of dependent steps with the longest total duration"""
+
+        finish: Dict[str, float] = {}
+        previous: Dict[str, str] = {}
+
+        for name in self._topological_order():
+            timing = self.timings.get(name)
+            duration = timing.duration if timing else 0.0
+            best_dep = max(self.dependencies[name], key=lambda d: finish[d], default=None)
+            finish[name] = duration + (finish[best_dep] if best_dep else 0.0)
+            if best_dep:
+                previous[name] = best_dep
+
+        if not finish:
+            return {'path': [], 'duration': 0.0}
+
+        end = max(finish, key=finish.get)
+        path = [end]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+
+        return {'path': list(reversed(path)), 'duration': finish[end]}
+
+    def _topological_order(self) -> List[str]:
+        """Order steps so that every step comes after its dependencies"""
+
+        ordered, seen = [], set()
+
+        def visit(name: str):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.dependencies[name]:
+                visit(dep)
+            ordered.append(name)
+
+        for name in self.order:
+            visit(name)
+        return ordered
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-step timings, wall time and critical path of the last run"""
+
+        critical = self.critical_path()
+        return {
+            'wall_time': self.wall_time,
+            'critical_path': critical['path'],
+            'critical_path_duration': critical['duration'],
+            'steps': {
+                name: {
+                    'started_at': timing.started_at,
+                    'finished_at': timing.finished_at,
+                    'duration': timing.duration
+                }
+                for name, timing in self.timings.items()
+            }
+        }
@@ -3,6 +3,9 @@ import re
 import os
 from typing import Dict, List, Any
 
+from .step_scheduler import StepScheduler
+from .map_reduce import REDUCERS
+
 class TemplateAnalyzer:
     """Analyzes YAML templates and validates database function calls"""
     
@@ -29,6 +32,24 @@ class TemplateAnalyzer:
         steps = yaml_config.get('processing_steps', [])
         if not steps:
             warnings.append("No processing steps defined")
+        else:
+            # Reject unknown dependencies and cycles before any input is requested
+            try:
+                StepScheduler(steps)
+            except (ValueError, KeyError) as e:
+                errors.append(str(e))
+        
+        # Check map/reduce step declarations
+        for step in steps:
+            if 'map_over' in step and 'window_over' in step:
+                errors.append(f"Step '{step.get('name')}' declares both map_over and window_over")
+            if 'map_over' not in step:
+                continue
+            reduce_mode = step.get('reduce', 'concat')
+            if reduce_mode == 'custom' and not step.get('reduce_function'):
+                errors.append(f"Step '{step.get('name')}' uses reduce: custom without a reduce_function")
+            elif reduce_mode != 'custom' and reduce_mode not in REDUCERS:
+                errors.append(f"Step '{step.get('name')}' has unknown reduce mode '{reduce_mode}'")
         
         return {
             'valid': len(errors) == 0,
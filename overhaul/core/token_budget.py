@@ -0,0 +1,125 @@
+import json
+import re
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+# Word runs, number runs and single punctuation marks roughly track BPE token boundaries
+_TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (errs on the high side for long words and numbers)"""
+    if not text:
+        return 0
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_PIECE.findall(text))
+
+def _default_render(item: Any) -> str:
+    """Render an item the way templates usually embed it (pretty JSON)"""
+    return item if isinstance(item, str) else json.dumps(item, indent=2, default=str)
+
+class TokenBudgetBatcher:
+    """Pack list items into batches that fit a prompt token budget"""
+
+    def __init__(self,
+                 budget: int,
+                 overhead_tokens: int = 0,
+                 render: Callable[[Any], str] = _default_render,
+                 text_key: Optional[str] = None):
+        self.budget = budget
+        self.overhead_tokens = overhead_tokens
+        self.render = render
+        self.text_key = text_key
+
+    @property
+    def item_budget(self) -> int:
+        """Tokens left for items once the fixed prompt overhead is paid"""
+        return max(1, self.budget - self.overhead_tokens)
+
+    def batch(self, items: List[Any]) -> List[List[Any]]:
+        """Greedily fill each batch up to the item budget, keeping item order"""
+        batches: List[List[Any]] = []
+        current: List[Any] = []
+        used = 0
+
+        for item in items:
+            for piece, cost in self._fit(item):
+                if current and used + cost > self.item_budget:
+                    batches.append(current)
+                    current, used = [], 0
+                current.append(piece)
+                used += cost
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _fit(self, item: Any) -> List[Tuple[Any, int]]:
+        """Split an item that does not fit the budget on its own into parts that do; (piece, tokens) pairs"""
+        cost = estimate_tokens(self.render(item))
+        if cost <= self.item_budget:
+            return [(item, cost)]
+
+        text_key = self._text_key(item)
+        text = item if isinstance(item, str) else (item.get(text_key) if text_key else None)
+        if not isinstance(text, str):
+            # Nothing we know how to split; send it alone and let the caller see the warning
+            print(f"⚠️ Item exceeds token budget ({self.item_budget}) and cannot be split")
+            return [(item, cost)]
+
+        # Reserve room for the item's other fields when splitting a dict
+        wrapper_cost = 0 if isinstance(item, str) else estimate_tokens(self.render({**item, text_key: ""}))
+        parts = split_text(text, max(1, self.item_budget - wrapper_cost))
+
+        if not isinstance(item, str):
+            parts = [{**item, text_key: part, 'part': f"{i}/{len(parts)}"} for i, part in enumerate(parts, 1)]
+        return [(part, estimate_tokens(self.render(part))) for part in parts]
+
+    def _text_key(self, item: Any) -> Optional[str]:
+        """Pick the field to split: the configured key or the longest string value"""
+        if not isinstance(item, dict):
+            return None
+        if self.text_key:
+            return self.text_key if self.text_key in item else None
+        strings = [(len(v), k) for k, v in item.items() if isinstance(v, str)]
+        return max(strings)[1] if strings else None
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """Split text into parts of at most max_tokens, preferring line then sentence boundaries"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    for separator in ("\n", ". ", " "):
+        units = text.split(separator)
+        if len(units) > 1 and all(estimate_tokens(u) <= max_tokens for u in units):
+            break
+    else:
+        # No boundary is fine-grained enough: cut by characters (4 chars/token is conservative)
+        size = max(1, max_tokens * 4)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    parts: List[str] = []
+    current = ""
+    for unit in units:
+        candidate = f"{current}{separator}{unit}" if current else unit
+        if current and estimate_tokens(candidate) > max_tokens:
+            parts.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+def resolve_token_budget(value: Any, num_ctx: int, num_predict: int) -> int:
+    """Turn a step's token_budget ('auto' or a number) into a prompt token budget"""
+    if value == 'auto' or value is True:
+        # Leave room for the response inside the context window
+        return max(512, num_ctx - num_predict)
+    return int(value)
+
+def budget_report(prompt: str, num_ctx: int, num_predict: int) -> Dict[str, Any]:
+    """Estimate how much of the context window a prompt uses"""
+    prompt_tokens = estimate_tokens(prompt)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'available_tokens': num_ctx - num_predict,
+        'overflow': prompt_tokens > num_ctx - num_predict
+    }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the engine the way main.py does ('from core.x import y'), from the overhaul directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
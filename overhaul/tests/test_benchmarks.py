@@ -0,0 +1,80 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.fake_ollama_server import CannedResponses, FakeOllamaServer
+from benchmarks.run_benchmarks import STAGES, compare, main, summarize
+from core.llm_processor import LLMProcessor
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def server():
+    responses = CannedResponses({'responses': [
+        {'contains': 'rank', 'response': '{"ranked": ["PM8240"]}\n\nPM8240 fits best.'},
+    ]})
+    server = FakeOllamaServer(responses, port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_llm_processor_talks_to_the_fake_server_over_http(server):
+    llm = LLMProcessor(host=server.url, max_connections=2)
+
+    async def main():
+        try:
+            return await asyncio.gather(llm.process_prompt('rank these', 10),
+                                        llm.process_prompt('rank these', 10, stream=True),
+                                        llm.process_prompt('anything else', 10))
+        finally:
+            await llm.aclose()
+
+    plain, streamed, default = asyncio.run(main())
+    assert plain['parsed_result'] == streamed['parsed_result'] == {'ranked': ['PM8240']}
+    assert streamed['streaming']['stopped_early']
+    assert default['parsed_result'] == {'message': 'no canned response'}
+    assert server.stats['requests'] == 3 and server.stats['streamed'] == 1
+    assert server.stats['matches'] == {'contains': 2, 'default': 1}
+
+
+def test_benchmark_runs_end_to_end_over_http(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    output = tmp_path / 'report.json'
+
+    assert main(['--http', '--iterations', '1', '--filter', 'quick_meter_analysis/testing.txt',
+                 '--output', str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report['transport'] == 'http'
+    assert report['cases']['quick_meter_analysis/testing.txt']['success']
+    assert report['server']['requests'] > 0 and report['server']['errors_injected'] == 0
+
+
+def test_reports_from_different_transports_are_not_compared():
+    case = {'stages_s': {'total': 1.0}}
+    assert compare({'transport': 'http', 'cases': {'a': case}}, {'cases': {'a': case}}, 0.25, 0.005) == [
+        'transport differs from baseline (http vs in-process)']
+
+
+def test_warm_runs_gate_on_their_fastest_time():
+    def run(total, peak=None):
+        return {'success': True, 'error': None, 'timings': {stage: total for stage in STAGES},
+                'json_extraction_us': total * 1e6, 'peak_memory_bytes': peak}
+
+    summary = summarize({'input_bytes': 100}, [run(9.0, peak=5000), run(0.3), run(0.1), run(0.2)])
+    assert summary['cold_total_s'] == 9.0
+    assert summary['stages_s']['pipeline'] == 0.1
+    assert summary['stages_median_s']['pipeline'] == 0.2
+    assert summary['peak_memory_bytes'] == 5000
+
+
+def test_small_memory_growth_is_not_a_regression():
+    def report(peak):
+        return {'cases': {'a': {'stages_s': {'total': 1.0}, 'peak_memory_bytes': peak}}}
+
+    assert compare(report(300_000), report(200_000), 0.25, 0.005) == []
+    assert compare(report(900_000), report(400_000), 0.25, 0.005) == ['a [peak memory]: 0.4MB -> 0.9MB']
+
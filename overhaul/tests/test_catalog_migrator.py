@@ -0,0 +1,89 @@
+import sqlite3
+
+from core.catalog_migrator import CatalogMigrator, main
+
+
+def make_catalog(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Meters (id INTEGER, model_name TEXT, series_name TEXT, device_short_name TEXT);
+        CREATE TABLE Measurements (meter_id INTEGER, measurement_type TEXT);
+        CREATE TABLE AuditLog (entry TEXT);
+        INSERT INTO Meters VALUES (1, 'PM5560', 'PM5000', 'PM5560'), (2, 'PM8240', 'PM8000', 'PM8240');
+        INSERT INTO Measurements VALUES (1, 'Voltage'), (2, 'Harmonics');
+        -- Added by someone before the catalog was migrated
+        CREATE INDEX idx_measurements_type ON Measurements(measurement_type);
+        CREATE TRIGGER measurements_audit AFTER INSERT ON Measurements
+        BEGIN INSERT INTO AuditLog SELECT model_name FROM Meters WHERE id = new.meter_id; END;
+        CREATE TRIGGER meters_audit AFTER UPDATE ON Meters
+        BEGIN INSERT INTO AuditLog VALUES (new.model_name); END;
+    """)
+    conn.commit()
+    conn.close()
+
+
+def objects(path, kind):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+    finally:
+        conn.close()
+
+
+def test_rebuild_keeps_indexes_and_triggers(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    make_catalog(path)
+
+    result = CatalogMigrator(path, fulltext=False).migrate(backup=False)
+
+    assert result['migrated']
+    assert result['row_counts']['Meters'] == 2
+    assert {'idx_measurements_type', 'idx_measurements_meter_id'} <= objects(path, 'index')
+    assert {'measurements_audit', 'meters_audit'} <= objects(path, 'trigger')
+
+    conn = sqlite3.connect(path)
+    try:
+        pk = [row[1] for row in conn.execute("PRAGMA table_info(Meters)") if row[5]]
+        fks = conn.execute("PRAGMA foreign_key_list(Measurements)").fetchall()
+        assert pk == ['id']
+        assert fks[0][2] == 'Meters'
+        # The recreated trigger still fires and still resolves the rebuilt Meters table
+        conn.execute("INSERT INTO Measurements VALUES (2, 'Flicker')")
+        assert conn.execute("SELECT entry FROM AuditLog").fetchall() == [('PM8240',)]
+    finally:
+        conn.close()
+
+    assert CatalogMigrator(path, fulltext=False).pending_changes() == []
+
+
+def test_rejects_duplicate_ids(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    make_catalog(path)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO Meters VALUES (1, 'Copy', 'PM5000', 'Copy')")
+    conn.commit()
+    conn.close()
+
+    try:
+        CatalogMigrator(path, fulltext=False).migrate(backup=False)
+    except ValueError as e:
+        assert 'duplicate' in str(e)
+    else:
+        raise AssertionError("migration should refuse duplicate primary keys")
+    assert not (tmp_path / 'catalog.db.migrating').exists()
+
+
+def test_check_does_not_create_a_missing_catalog(tmp_path):
+    path = tmp_path / 'mistyped.db'
+
+    assert main([str(path), '--check']) == 2
+    assert not path.exists()
+
+
+def test_check_lists_pending_changes_without_writing(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    make_catalog(path)
+    before = (tmp_path / 'catalog.db').read_bytes()
+
+    assert main([path, '--check', '--no-fulltext']) == 1
+    assert (tmp_path / 'catalog.db').read_bytes() == before
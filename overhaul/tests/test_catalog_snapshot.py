@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from core.catalog_snapshot import CatalogSnapshot, sql_equals, sql_like
+from core.connection_pool import SQLiteConnectionPool
+
+
+def make_catalog(path, models):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Meters (id INTEGER PRIMARY KEY, model_name TEXT, series_name TEXT)")
+    conn.executemany("INSERT INTO Meters (model_name, series_name) VALUES (?, 'PM')", [(m,) for m in models])
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def catalog_db(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    make_catalog(path, ['PM1', 'PM2'])
+    yield path
+    SQLiteConnectionPool.close_all(path)
+
+
+def shared(path):
+    return CatalogSnapshot.shared(path, 'Meters', 'id', [])
+
+
+def models(snapshot):
+    return sorted(snapshot.specifications())
+
+
+def test_like_and_equals_follow_sqlite():
+    assert sql_like('PM8240', 'pm82%')
+    assert not sql_like(None, '%')
+    assert sql_equals('5', 5)
+    assert not sql_equals(None, None)
+
+
+def test_snapshot_is_shared_until_a_write(catalog_db):
+    snapshot = shared(catalog_db)
+    assert shared(catalog_db) is snapshot
+    assert models(snapshot) == ['PM1', 'PM2']
+
+    conn = sqlite3.connect(catalog_db)
+    conn.execute("UPDATE Meters SET model_name = 'PM3' WHERE model_name = 'PM2'")
+    conn.commit()
+    conn.close()
+
+    assert snapshot.is_stale()
+    fresh = shared(catalog_db)
+    assert fresh is not snapshot
+    assert models(fresh) == ['PM1', 'PM3']
+
+
+def test_replaced_file_is_read_through_new_connections(catalog_db, tmp_path):
+    snapshot = shared(catalog_db)
+    with SQLiteConnectionPool.for_database(catalog_db).connection() as conn:
+        conn.execute("SELECT 1")
+
+    replacement = str(tmp_path / 'migrated.db')
+    make_catalog(replacement, ['ION9000'])
+    os.replace(replacement, catalog_db)
+
+    assert snapshot.file_changed()
+    assert models(shared(catalog_db)) == ['ION9000']
+
+
+def test_derived_objects_are_built_once(catalog_db):
+    snapshot = shared(catalog_db)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return snapshot._index('Meters', 'model_name')
+
+    threads = [threading.Thread(target=snapshot.derived, args=('by_model', build)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert snapshot.derived('by_model', build) is snapshot._index('Meters', 'model_name')
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from core.clause_relevance import ClauseRelevance, build_vocabulary, document_units, tokenize
+from core.clause_segmenter import ClauseTree
+
+
+TENDER = """Tender for switchboard works
+5.0 General Conditions
+5.1 The contractor shall deliver drawings within two weeks.
+5.2 Warranty period shall be two years.
+6.0 Metering
+6.1 Power quality
+6.1.1 The meter shall record harmonics and flicker per IEC 61000-4-30.
+6.1.2 Communication via Modbus TCP and BACnet.
+6.1.3 Frequency range 45 to 65 Hz
+"""
+
+
+@pytest.fixture(scope='module')
+def relevance():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE Meters (id INTEGER PRIMARY KEY, model_name TEXT);
+        CREATE TABLE PowerQualityAnalysis (meter_id INTEGER, analysis_feature TEXT);
+        CREATE TABLE CommunicationProtocols (meter_id INTEGER, protocol TEXT);
+        CREATE TABLE Certifications (meter_id INTEGER, certification TEXT);
+        INSERT INTO PowerQualityAnalysis VALUES (1, 'Harmonics'), (1, 'Flicker'), (1, 'Voltage dips and swells');
+        INSERT INTO CommunicationProtocols VALUES (1, 'Modbus TCP'), (1, 'BACnet');
+        INSERT INTO Certifications VALUES (1, 'IEC 61000-4-30 Class A');
+    """)
+    return ClauseRelevance(build_vocabulary(conn, 'Meters'))
+
+
+def ids(selected):
+    return [clause['clause_id'] for clause in selected]
+
+
+def test_tokenize_splits_identifiers_standards_and_plurals():
+    assert tokenize('IEC62053-22 class 0.2S') == tokenize('IEC 62053-22 Class 0.2s') == ['iec', '62053', '22', 'class', '0.2s']
+    assert tokenize('AccuracyClasses harmonics') == ['accuracy', 'class', 'harmonic']
+
+
+def test_vocabulary_comes_from_feature_rows_and_table_names(relevance):
+    vocabulary = relevance.vocabulary
+    assert {'harmonic', 'flicker', 'swell', 'modbus', 'bacnet', '61000', 'protocol', 'quality'} <= set(vocabulary)
+    assert not {'and', 'id', 'name', '30'} & set(vocabulary)
+
+
+def test_units_follow_the_clause_tree():
+    units = document_units(ClauseTree(TENDER))
+    assert ids(units) == ['preamble 1-1', '5.0', '5.1', '5.2', '6.0', '6.1', '6.1.1', '6.1.2', '6.1.3']
+    assert [unit['parent'] for unit in units] == [None, None, 1, 1, None, 4, 5, 5, 5]
+
+
+def test_select_keeps_relevant_clauses_with_their_parents(relevance):
+    selected = relevance.select(TENDER)
+    assert ids(selected) == ['6.0', '6.1', '6.1.1', '6.1.2', '6.1.3']
+    by_id = {clause['clause_id']: clause for clause in selected}
+    # '6.0 Metering' only comes along as the enclosing clause
+    assert by_id['6.0']['relevance'] == 0
+    assert by_id['6.1.2']['relevance'] == 1.0
+    assert by_id['6.1.1']['terms'] == ['61000', 'flicker', 'harmonic', 'iec', 'meter']
+    # No domain terms of its own, but it sits in a list of matching specs
+    assert by_id['6.1.3']['terms'] == [] and by_id['6.1.3']['relevance'] >= 0.15
+
+
+def test_threshold_and_limit_narrow_the_selection(relevance):
+    assert ids(relevance.select(TENDER, threshold=0.9)) == ['6.0', '6.1', '6.1.1', '6.1.2']
+    assert ids(relevance.select(TENDER, limit=1)) == ['6.0', '6.1', '6.1.2']
+
+
+def test_no_vocabulary_match_selects_nothing(relevance):
+    assert relevance.select("5.1 The contractor shall deliver drawings.\n") == []
+    assert relevance.select("") == []
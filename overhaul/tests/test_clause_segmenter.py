@@ -0,0 +1,83 @@
+from core.clause_segmenter import ClauseTree, normalize_id
+
+
+SPEC = """Technical specification
+6.5 Metering
+6.5.1 The meter shall measure voltage
+and current on all phases.
+0.9 lagging power factor shall be supported.
+6.5.2 Power quality:
+a. Harmonics to the 63rd
+b) Flicker
+(c) Dips and swells
+i. sub item
+ii. another
+6.5.10 Logging
+7.0 COMMUNICATIONS
+7.1 Protocols
+"""
+
+
+def paged(bodies):
+    """Content and page offsets with a running header and footer on every page"""
+    content, offsets = "", []
+    for number, body in enumerate(bodies, 1):
+        offsets.append(len(content))
+        content += "\n".join([f"ACME Tender 2024/17 Page {number} of {len(bodies)}", *body,
+                              f"Confidential rev {number}"]) + "\n"
+    return content, offsets
+
+
+def test_normalize_id():
+    assert normalize_id('Clause 6.6.10(a)') == '6.6.10.a'
+    assert normalize_id(' 7.0. ') == '7.0'
+    assert normalize_id(None) == ''
+
+
+def test_numbered_clauses_nest_by_level():
+    tree = ClauseTree(SPEC)
+    assert tree.ids() == ['6.5', '6.5.1', '6.5.2', '6.5.2.a', '6.5.2.b', '6.5.2.c', '6.5.2.c.i',
+                          '6.5.2.c.ii', '6.5.10', '7.0', '7.1']
+    assert [clause.id for clause in tree.roots] == ['6.5', '7.0']
+    assert tree.preamble == ['Technical specification']
+    assert tree.get('7.0').heading == 'COMMUNICATIONS'
+
+
+def test_continuation_lines_and_numbers_inside_text_stay_with_their_clause():
+    tree = ClauseTree(SPEC)
+    assert tree.text('6.5.1') == ('6.5.1 The meter shall measure voltage\nand current on all phases.\n'
+                                  '0.9 lagging power factor shall be supported.')
+    assert '0.9' not in tree
+
+
+def test_list_items_nest_and_select_subtrees():
+    tree = ClauseTree(SPEC)
+    assert tree.get('6.5.2(c)').heading == 'Dips and swells'
+    assert [child.id for child in tree.get('6.5.2.c').children] == ['6.5.2.c.i', '6.5.2.c.ii']
+    assert tree.select(['6.5.2.c', 'missing']) == [
+        {'clause_id': '6.5.2.c', 'text': '(c) Dips and swells\ni. sub item\nii. another'}]
+
+
+def test_repeated_heading_continues_the_same_clause():
+    tree = ClauseTree("6.5 Metering\n6.5.1 Voltage\nClause 7.0 – Communications\n7.0 COMMUNICATIONS\n7.1 Protocols\n")
+    assert tree.ids() == ['6.5', '6.5.1', '7.0', '7.1']
+    assert tree.get('7.0').lines == ['Clause 7.0 – Communications', '7.0 COMMUNICATIONS']
+
+
+def test_running_headers_and_footers_are_stripped():
+    content, offsets = paged([['6.5 Metering', '6.5.1 Voltage'], ['6.5.2 Current', '6.5.3 Power'],
+                              ['6.5.4 Energy', '6.5.5 Demand'], ['6.5.6 Harmonics', '6.5.7 Flicker']])
+    tree = ClauseTree(content, offsets)
+
+    assert tree.ids() == ['6.5'] + [f'6.5.{i}' for i in range(1, 8)]
+    assert tree.preamble == []
+    assert all(clause.text == f"{clause.id} {clause.heading}" for clause in tree)
+    assert [tree.get(f'6.5.{i}').page for i in (1, 2, 4, 7)] == [1, 2, 3, 4]
+
+
+def test_parsed_on_first_access_only():
+    tree = ClauseTree(SPEC)
+    assert tree._content is not None
+    assert '6.5.10' in tree
+    assert tree._content is None
+    assert not ClauseTree("")
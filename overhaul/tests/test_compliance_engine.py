@@ -0,0 +1,97 @@
+from pathlib import Path
+
+from core.clause_segmenter import ClauseTree
+from core.compliance_engine import ComplianceEngine, MeterProfile, split_requirements
+from core.database_autodiscovery import DatabaseAutoDiscovery, SmartDatabaseWrapper
+
+ROOT = Path(__file__).resolve().parent.parent
+
+METER = {
+    'model_name': 'PM-TEST',
+    'rated_voltage': '35-690 V L-L',
+    'operating_temp': '-25 to 70 °C',
+    'memory_capacity': '512 MB',
+    'accuracyclasses_data': [{'accuracy_class': 'Class 0.2S active energy (IEC 62053-22)'}],
+    'measurementaccuracy_data': [{'parameter': 'voltage', 'accuracy': '±0.1 %'},
+                                 {'parameter': 'current', 'accuracy': '±0.15 %'}],
+    'communicationprotocols_data': [{'protocol': 'Modbus TCP/IP'}, {'protocol': 'Modbus RTU'}],
+    'inputsoutputs_data': [{'io_type': 'Input', 'description': '4 digital'},
+                           {'io_type': 'Output', 'description': '2 relay'}],
+}
+
+
+def verdict(requirement):
+    engine = ComplianceEngine()
+    return engine.evaluate_requirement(requirement, MeterProfile.from_specification(METER))
+
+
+def test_numeric_pass_and_fail():
+    assert verdict('Accuracy class 0.5S to IEC 62053-22')['complies'] is True
+    assert verdict('Accuracy class 0.1S')['complies'] is False
+    assert verdict('Operating temperature -10 °C to 55 °C')['complies'] is True
+    assert verdict('Comes with 8GB internal memory')['complies'] is False
+    assert verdict('8 digital inputs')['complies'] is False
+    assert verdict('Voltage / Current ±0.2%')['complies'] is True
+
+
+def test_exceeding_requirement_is_reported():
+    result = verdict('Accuracy class 0.5S')
+    assert 'exceeds requirement' in result['justification']
+    assert result['evaluated_by'] == 'rules'
+
+
+def test_listed_protocol_passes():
+    assert verdict('Modbus TCP and Modbus RTU communication')['complies'] is True
+
+
+def test_unlisted_protocol_or_standard_is_unknown_not_fail():
+    # The catalog not listing something does not mean the meter lacks it
+    assert verdict('SNTP Time sync available') is None
+    assert verdict('Support BACnet and IEC61850') is None
+    assert verdict('Power quality to IEC 61000-4-30 class A') is None
+
+
+def test_unknown_value_is_left_for_llm():
+    # No IP rating in the catalog record
+    assert verdict('Front panel IP54') is None
+
+
+def test_evaluate_splits_rule_verdicts_and_unresolved():
+    text = "6.5.1 Accuracy class 0.5S\n6.5.2 SNTP time sync\n6.5.3 Display shall be backlit\n6.5.4 8 digital inputs"
+    result = ComplianceEngine().evaluate(text, METER)
+    decided = {item['clause_id']: item['complies'] for item in result['compliance_analysis']}
+    unresolved = {item['clause_id']: item['reason'] for item in result['unresolved']}
+    assert decided == {'6.5.1': True, '6.5.4': False}
+    assert unresolved == {'6.5.2': 'catalog does not specify the value',
+                          '6.5.3': 'not a recognised measurable requirement'}
+
+    merged = ComplianceEngine.merge(result, [{'requirement': '6.5.3 Display shall be backlit', 'complies': True}])
+    # The LLM verdict lands at its requirement's position in the tender
+    assert [item['requirement'][:5] for item in merged['compliance_analysis']] == ['6.5.1', '6.5.3', '6.5.4']
+    assert merged['compliance_analysis'][1]['evaluated_by'] == 'llm'
+    assert merged['potential_issues'] == ['6.5.4 8 digital inputs']
+
+
+def test_split_requirements_keeps_continuation_lines():
+    text = "6.1 Meter shall\nsupport Modbus\n6.2 IP54"
+    assert split_requirements(text) == ['6.1 Meter shall\nsupport Modbus', '6.2 IP54']
+
+
+def test_testing_tender_against_pm8240_catalog_record():
+    # The shipped example tender's general specification against the shipped catalog
+    tender = ClauseTree((ROOT / 'examples' / 'testing.txt').read_text(encoding='utf-8'))
+    requirements = "\n".join(clause.text for clause in tender.get('6.5').children)
+    catalog = SmartDatabaseWrapper(str(ROOT / 'databases' / 'meters.db'), DatabaseAutoDiscovery(persist_cache=False))
+
+    result = ComplianceEngine().evaluate(requirements, catalog.get_specifications('PowerLogic PM8240'))
+    decided = {item['clause_id']: item['complies'] for item in result['compliance_analysis']}
+    unresolved = {item['clause_id']: item['reason'] for item in result['unresolved']}
+    assert decided == {'6.5.2': True, '6.5.3': True, '6.5.5': True, '6.5.6': False,
+                       '6.5.7': True, '6.5.9': False, '6.5.10': True}
+    assert unresolved == {
+        '6.5.1': 'catalog does not specify the value',             # Class A power analyser
+        '6.5.4': 'not a recognised measurable requirement',        # list of instantaneous values
+        '6.5.8': 'catalog does not specify the value',             # SNTP time sync
+        '6.5.11': 'catalog does not specify the value',            # IP52 front / IP30 sides
+        '6.5.12': 'not a recognised measurable requirement',       # breaker status wiring
+    }
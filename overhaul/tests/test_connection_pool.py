@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+
+import pytest
+
+from core.connection_pool import SQLiteConnectionPool, list_user_tables
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Meters (id INTEGER PRIMARY KEY, model_name TEXT)")
+    conn.execute("INSERT INTO Meters (model_name) VALUES ('PM8240')")
+    conn.commit()
+    conn.close()
+    yield path
+    SQLiteConnectionPool.close_all(path)
+
+
+def test_connections_are_reused(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    for _ in range(3):
+        assert pool.execute("SELECT model_name FROM Meters") == [{'model_name': 'PM8240'}]
+    assert pool.created == 1 and pool.reused == 2
+    pool.close()
+
+
+def test_read_only_pool_rejects_writes(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    with pytest.raises(sqlite3.OperationalError, match='readonly|read-only'):
+        pool.execute("INSERT INTO Meters (model_name) VALUES ('ION9000')")
+    assert pool.execute("SELECT COUNT(*) AS n FROM Meters") == [{'n': 1}]
+    pool.close()
+
+
+def test_writable_pool_commits(db_path):
+    pool = SQLiteConnectionPool(db_path, read_only=False)
+    pool.execute("INSERT INTO Meters (model_name) VALUES ('ION9000')")
+    pool.close()
+    assert SQLiteConnectionPool(db_path).execute("SELECT COUNT(*) AS n FROM Meters") == [{'n': 2}]
+
+
+def test_exhausted_pool_times_out_with_a_clear_error(db_path):
+    pool = SQLiteConnectionPool(db_path, max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(TimeoutError, match='All 1 connections to catalog.db'):
+            with pool.connection():
+                pass
+    pool.close()
+
+
+def test_exhausted_pool_hands_back_returned_connections(db_path):
+    pool = SQLiteConnectionPool(db_path, max_size=1, timeout=5)
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            borrowed.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    borrowed.wait()
+    threading.Timer(0.05, release.set).start()
+    assert pool.execute("SELECT 1 AS one") == [{'one': 1}]
+    holder.join()
+    assert pool.created == 1
+    pool.close()
+
+
+def test_shared_pools_are_per_file_and_mode(db_path):
+    pool = SQLiteConnectionPool.for_database(db_path)
+    assert SQLiteConnectionPool.for_database(db_path) is pool
+    assert SQLiteConnectionPool.for_database(db_path, read_only=False) is not pool
+    with pool.connection() as conn:
+        assert list_user_tables(conn) == ['Meters']
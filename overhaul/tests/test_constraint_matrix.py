@@ -0,0 +1,90 @@
+import numpy as np
+
+from core.compliance_engine import ComplianceEngine, MeterProfile
+from core.constraint_matrix import CatalogMatrix, score_clauses
+
+
+def meter(name, inputs, energy_class, protocols=()):
+    return {
+        'model_name': name,
+        'rated_voltage': '35-690 V L-L',
+        'accuracyclasses_data': [{'accuracy_class': f'Class {energy_class} active energy'}],
+        'communicationprotocols_data': [{'protocol': p} for p in protocols],
+        'inputsoutputs_data': [{'io_type': 'Input', 'description': f'{inputs} digital'}],
+    }
+
+
+CATALOG = [
+    meter('SMALL', 2, '1', ['Modbus RTU']),
+    meter('MID', 4, '0.5S', ['Modbus TCP/IP']),
+    meter('BIG', 8, '0.2S', ['Modbus TCP/IP', 'BACnet']),
+]
+
+
+def catalog():
+    return CatalogMatrix.from_specifications(CATALOG)
+
+
+def names(entry, matrix):
+    return [matrix.model_names[c['index']] for c in entry['candidates']]
+
+
+def test_matrix_matches_per_meter_engine():
+    requirements = ['4 digital inputs', 'Accuracy class 0.5S', 'Modbus TCP', 'SNTP time sync']
+    matrix = catalog()
+    scores = score_clauses(requirements, matrix)
+    engine = ComplianceEngine()
+    for row, requirement in enumerate(requirements):
+        for column, record in enumerate(CATALOG):
+            verdict = engine.evaluate_requirement(requirement, MeterProfile.from_specification(record))
+            expected = None if verdict is None else verdict['complies']
+            actual = bool(scores.satisfied[row, column]) if scores.unknown[row, column] == 0 else None
+            assert actual == expected, (requirement, record['model_name'])
+
+
+def test_unlisted_protocol_is_unknown_in_matrix():
+    scores = score_clauses(['SNTP time sync'], catalog())
+    assert np.isnan(scores.outcomes).all()
+    assert scores.failed.sum() == 0
+
+
+def test_shortlist_prunes_hard_failures_and_ranks_survivors():
+    matrix = catalog()
+    entry = score_clauses(['4 digital inputs'], matrix).shortlist(k=2)[0]
+    assert entry['eliminated'] == 1
+    assert names(entry, matrix) == ['MID', 'BIG']
+    assert all(not c['failing'] for c in entry['candidates'])
+
+
+def test_shortlist_tops_up_with_partial_matches():
+    matrix = catalog()
+    entry = score_clauses(['8 digital inputs and accuracy class 0.5S'], matrix).shortlist(k=3)[0]
+    assert names(entry, matrix)[0] == 'BIG'
+    # MID meets the accuracy but not the inputs, so it is the best of the ruled-out meters
+    assert names(entry, matrix)[1:] == ['MID', 'SMALL']
+    assert entry['candidates'][1]['failing'] == ['8 digital inputs']
+
+
+def test_shortlist_when_every_meter_is_eliminated():
+    matrix = catalog()
+    entry = score_clauses(['16 digital inputs'], matrix).shortlist(k=2)[0]
+    assert entry['eliminated'] == 3
+    assert len(entry['candidates']) == 2
+    assert all(c['failing'] == ['16 digital inputs'] for c in entry['candidates'])
+
+
+def test_shortlist_never_prunes_on_protocols():
+    matrix = catalog()
+    entry = score_clauses(['Support BACnet and IEC61850'], matrix).shortlist(k=3)[0]
+    assert entry['eliminated'] == 0
+    # The meter that lists one of the protocols ranks first
+    assert names(entry, matrix)[0] == 'BIG'
+    assert entry['candidates'][0]['unknown'] == ['IEC 61850']
+
+
+def test_clauses_without_checks_follow_relevance():
+    matrix = catalog()
+    relevance = np.array([[0.1, 0.9, 0.5]])
+    entry = score_clauses(['Display shall be backlit'], matrix).shortlist(k=3, relevance=relevance)[0]
+    assert names(entry, matrix) == ['MID', 'BIG', 'SMALL']
+    assert entry['candidates'][0]['score'] is None
@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from core.connection_pool import SQLiteConnectionPool
+from core.database_autodiscovery import DatabaseAutoDiscovery, SmartDatabaseWrapper
+from core.spec_parser import SPEC_TABLE, install_spec_table
+
+
+@pytest.fixture
+def catalog_db(tmp_path):
+    path = tmp_path / 'catalog.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Meters (id INTEGER PRIMARY KEY, model_name TEXT, series_name TEXT, operating_temp TEXT);
+        CREATE TABLE AccuracyClasses (id INTEGER PRIMARY KEY, meter_id INTEGER, accuracy_class TEXT);
+        INSERT INTO Meters VALUES (1, 'PM1', 'PM', '-25 to 70 °C'), (2, 'PM2', 'PM', '0 to 50 °C');
+        INSERT INTO AccuracyClasses VALUES (1, 1, 'Class 0.2S'), (2, 2, 'Class 1');
+    """)
+    install_spec_table(conn)
+    conn.commit()
+    conn.close()
+    yield str(path)
+    SQLiteConnectionPool.close_all(str(path))
+
+
+def wrapper(path, tmp_path, **kwargs):
+    return SmartDatabaseWrapper(path, DatabaseAutoDiscovery(cache_dir=str(tmp_path / 'cache')), **kwargs)
+
+
+@pytest.mark.parametrize('use_snapshot', [True, False])
+def test_derived_tables_are_not_related_records(catalog_db, tmp_path, use_snapshot):
+    db = wrapper(catalog_db, tmp_path, use_snapshot=use_snapshot)
+    assert SPEC_TABLE in db.schema.tables
+    assert [rel['table'] for rel in db._related_tables('Meters')] == ['AccuracyClasses']
+
+    record = db.get_specifications('PM1')
+    assert record['accuracyclasses_data'][0]['accuracy_class'] == 'Class 0.2S'
+    assert f"{SPEC_TABLE.lower()}_data" not in record
+
+
+@pytest.mark.parametrize('use_snapshot', [True, False])
+def test_filter_uses_parsed_specs(catalog_db, tmp_path, use_snapshot):
+    db = wrapper(catalog_db, tmp_path, use_snapshot=use_snapshot)
+    assert [m['model_name'] for m in db.filter(temp_min__lte=-10)] == ['PM1']
+
+
+def discover(path, cache_dir, monkeypatch=None):
+    engine = DatabaseAutoDiscovery(cache_dir=str(cache_dir))
+    if monkeypatch is not None:
+        monkeypatch.setattr(engine, '_analyze_table', lambda *args: pytest.fail('schema was rediscovered'))
+    return engine.discover_database(path)
+
+
+def test_persisted_schema_is_reused_while_the_file_is_unchanged(catalog_db, tmp_path, monkeypatch):
+    first = discover(catalog_db, tmp_path / 'cache')
+    cached = discover(catalog_db, tmp_path / 'cache', monkeypatch)
+    assert cached.tables == first.tables
+    assert cached.relationships == first.relationships
+
+
+def test_schema_change_invalidates_cached_schema(catalog_db, tmp_path):
+    engine = DatabaseAutoDiscovery(cache_dir=str(tmp_path / 'cache'))
+    engine.discover_database(catalog_db)
+
+    conn = sqlite3.connect(catalog_db)
+    conn.execute("ALTER TABLE Meters ADD COLUMN accuracy TEXT")
+    conn.commit()
+    conn.close()
+
+    assert 'accuracy' in engine.discover_database(catalog_db).tables['Meters'].columns
+    fresh = discover(catalog_db, tmp_path / 'cache')
+    assert 'accuracy' in fresh.tables['Meters'].columns
+
+
+def test_unreadable_cache_is_rediscovered(catalog_db, tmp_path):
+    engine = DatabaseAutoDiscovery(cache_dir=str(tmp_path / 'cache'))
+    engine.discover_database(catalog_db)
+    engine._cache_path(catalog_db).write_text('{not json')
+
+    assert 'Meters' in discover(catalog_db, tmp_path / 'cache').tables
@@ -0,0 +1,102 @@
+from core.clause_segmenter import ClauseTree
+from core.document_windows import DocumentWindower, merge_window_items
+from core.token_budget import estimate_tokens
+
+
+def tender(sections=6, items=8):
+    lines = ["Technical specification for metering equipment"]
+    for section in range(1, sections + 1):
+        lines.append(f"{section}.1 Section {section} requirements")
+        for item in range(1, items + 1):
+            lines.append(f"{section}.1.{item} The meter shall provide function {section}-{item} with accuracy class 0.5S")
+    return "\n".join(lines) + "\n"
+
+
+def test_windows_cover_the_document_within_budget():
+    content = tender()
+    windower = DocumentWindower(budget=200, overlap_tokens=40)
+    windows = windower.windows(content)
+
+    assert len(windows) > 1
+    assert windows[0]['start'] == 0
+    assert windows[-1]['end'] == len(content)
+    for window in windows:
+        assert window['tokens'] <= windower.window_budget
+        assert estimate_tokens(window['text']) <= window['tokens']
+    for previous, window in zip(windows, windows[1:]):
+        # Consecutive windows overlap (or touch) and always move forward
+        assert previous['start'] < window['start'] <= previous['end']
+
+
+def test_windows_cut_at_clause_starts():
+    windows = DocumentWindower(budget=200, overlap_tokens=40).windows(tender())
+    for window in windows[1:]:
+        assert window['text'].split(' ', 1)[0] in window['clause_ids']
+
+
+def test_overlap_is_capped_at_a_quarter_window():
+    windower = DocumentWindower(budget=400, overhead_tokens=200, overlap_tokens=300)
+    assert windower.window_budget == 200
+    assert windower.overlap == 50
+
+
+def test_short_document_is_one_window_with_every_clause():
+    content = "1.1 Scope\n1.1.1 Power meter\n1.1.2 Class 0.5S\n"
+    windows = DocumentWindower(budget=1000).windows(content)
+    assert len(windows) == 1
+    assert windows[0]['clause_ids'] == ['1.1', '1.1.1', '1.1.2']
+    assert windows[0]['text'] == content.rstrip('\n')
+
+
+def test_document_exactly_at_the_budget_is_one_window():
+    content = tender(sections=2, items=2)
+    whole = DocumentWindower(budget=100000).windows(content)[0]['tokens']
+
+    assert len(DocumentWindower(budget=whole).windows(content)) == 1
+    split = DocumentWindower(budget=whole - 1, overlap_tokens=0).windows(content)
+    assert len(split) == 2
+    # Without overlap the windows' own counts add up to the one-window count
+    assert sum(window['tokens'] for window in split) == whole
+
+
+def test_empty_document_has_no_windows():
+    assert DocumentWindower(budget=100).windows({'content': '  \n'}) == []
+
+
+def test_processed_file_keeps_pages_and_its_clause_tree():
+    pages = ["1.1 Scope\n" + "General text line\n" * 30, "2.1 Meters\n" + "Meter requirement line\n" * 30]
+    content = "\n".join(pages)
+    page_offsets = [0, len(pages[0]) + 1]
+    document = {'content': content, 'page_offsets': page_offsets, 'clauses': ClauseTree(content, page_offsets)}
+
+    # The page and clause starting on page 2 is the best cut, ahead of any line inside page 1
+    windows = DocumentWindower(budget=200, overlap_tokens=0).windows(document)
+    assert [(w['first_page'], w['last_page'], w['clause_ids']) for w in windows] == [(1, 1, ['1.1']), (2, 2, ['2.1'])]
+    assert windows[1]['start'] == page_offsets[1]
+
+
+def window_result(*items):
+    return {'parsed_result': {'clauses': list(items)}}
+
+
+def test_merge_keeps_each_clause_once_with_the_longest_copy():
+    merged = merge_window_items([
+        window_result({'clause_id': '6.5', 'text': 'Meter shall'},
+                      {'clause_id': '6.6', 'text': 'Display'}),
+        window_result({'clause_id': 'Clause 6.5', 'text': 'Meter shall have class 0.5S'},
+                      {'clause_id': '6.7', 'text': 'Memory'}),
+    ], 'clauses')
+
+    clauses = merged['clauses']
+    assert [c['text'] for c in clauses] == ['Meter shall have class 0.5S', 'Display', 'Memory']
+    assert clauses[0]['clause_id'] == 'Clause 6.5'
+
+
+def test_merge_matches_items_without_id_on_contained_text():
+    merged = merge_window_items([
+        window_result({'text': 'Harmonics up to the 63rd'}),
+        window_result({'text': 'harmonics  up to the 63rd order'}, 'Modbus TCP'),
+        {'error': 'window failed'},
+    ], 'clauses')
+
+    assert merged['clauses'] == [{'text': 'harmonics  up to the 63rd order'}, {'text': 'Modbus TCP'}]
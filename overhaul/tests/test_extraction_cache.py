@@ -0,0 +1,67 @@
+import itertools
+import os
+
+import pytest
+
+from core import extraction_cache, file_processor
+from core.extraction_cache import ExtractionCache
+from core.file_processor import FileProcessor
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache'), max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_hit_and_miss_are_keyed_on_content_and_extractor(cache):
+    cache.set('abc', 'pypdf2/v1', 'Page one\fPage two', [0, 9])
+
+    assert cache.get('abc', 'pypdf2/v1') == {'content': 'Page one\fPage two', 'page_offsets': [0, 9]}
+    assert cache.get('abc', 'pypdf2/v2') is None
+    assert cache.get('def', 'pypdf2/v1') is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 2)
+
+
+def test_evicts_least_recently_used(cache, monkeypatch):
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(extraction_cache.time, 'time', lambda: float(next(ticks)))
+    cache.set('a', 'x', 'A', [0])
+    cache.set('b', 'x', 'B', [0])
+    cache.get('a', 'x')
+    cache.set('c', 'x', 'C', [0])
+
+    assert cache.get('b', 'x') is None
+    assert cache.get('a', 'x')['content'] == 'A' and cache.get('c', 'x')['content'] == 'C'
+
+
+def test_content_hash_follows_file_changes(cache, tmp_path):
+    path = tmp_path / 'tender.pdf'
+    path.write_bytes(b'first')
+    first = cache.content_hash(str(path))
+    assert cache.content_hash(str(path)) == first
+
+    path.write_bytes(b'second!')
+    os.utime(path, ns=(0, 1))
+    assert cache.content_hash(str(path)) != first
+
+
+def test_file_processor_reuses_extracted_pdf_text(cache, tmp_path, monkeypatch):
+    pytest.importorskip('PyPDF2')
+    calls = []
+
+    def extract(pdf_path, max_workers=None):
+        calls.append(pdf_path)
+        return ['Clause 1', 'Clause 2'], 1
+
+    monkeypatch.setattr(file_processor, 'extract_pdf_pages', extract)
+    path = tmp_path / 'tender.pdf'
+    path.write_bytes(b'%PDF-1.4 fake')
+    processor = FileProcessor(cache=cache)
+
+    first = processor._extract_pdf(path)
+    copy = tmp_path / 'copy.pdf'
+    copy.write_bytes(path.read_bytes())
+    assert processor._extract_pdf(copy) == first
+    assert len(calls) == 1
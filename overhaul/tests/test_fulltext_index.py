@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from core.connection_pool import SQLiteConnectionPool
+from core.fulltext_index import FullTextIndex, fts5_available, install_fulltext, missing_fulltext, to_match_query
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+
+@pytest.fixture
+def catalog_db(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE Meters (id INTEGER PRIMARY KEY, model_name TEXT, series_name TEXT, selection_blurb TEXT);
+        CREATE TABLE CommunicationProtocols (id INTEGER PRIMARY KEY, meter_id INTEGER, protocol TEXT, support TEXT);
+        INSERT INTO Meters VALUES
+            (1, 'PM5560', 'PM5000', 'Panel meter for cost management'),
+            (2, 'ION9000', 'ION9000', 'Power quality analyzer with waveform capture');
+        INSERT INTO CommunicationProtocols (meter_id, protocol, support) VALUES
+            (1, 'Modbus TCP', NULL), (2, 'IEC 61850', 'native'), (2, 'Modbus TCP', NULL);
+    """)
+    conn.commit()
+    conn.close()
+    yield path
+    SQLiteConnectionPool.close_all(path)
+
+
+def models(path, query):
+    return [row['model_name'] for row in FullTextIndex(path).search(query)]
+
+
+def test_match_query_ors_unique_words():
+    assert to_match_query('Power quality, power "analyzer"') == '"power" OR "quality" OR "analyzer"'
+    assert to_match_query('  ') == ''
+
+
+def test_in_memory_index_ranks_unmigrated_catalog(catalog_db):
+    assert models(catalog_db, 'power quality waveform') == ['ION9000']
+    assert models(catalog_db, 'Modbus IEC 61850') == ['ION9000', 'PM5560']
+    assert models(catalog_db, '') == []
+
+
+def test_triggers_keep_persistent_index_in_sync(catalog_db):
+    shared = FullTextIndex.for_database(catalog_db)
+    assert shared.search('Modbus') and not shared.persistent
+
+    conn = sqlite3.connect(catalog_db)
+    assert install_fulltext(conn) == 2
+    assert missing_fulltext(conn) == []
+    conn.execute("INSERT INTO Meters VALUES (3, 'PM8240', 'PM8000', 'Revenue meter')")
+    conn.execute("INSERT INTO CommunicationProtocols (meter_id, protocol) VALUES (3, 'BACnet')")
+    conn.execute("UPDATE Meters SET selection_blurb = 'Basic energy meter' WHERE id = 1")
+    conn.execute("DELETE FROM CommunicationProtocols WHERE meter_id = 2 AND protocol = 'IEC 61850'")
+    conn.commit()
+    conn.close()
+
+    assert [row['model_name'] for row in shared.search('BACnet revenue')] == ['PM8240']
+    assert shared.persistent
+    assert models(catalog_db, 'cost management') == []
+    assert models(catalog_db, '61850') == []
+
+
+def test_relevance_matches_search_without_the_rows(catalog_db):
+    index = FullTextIndex(catalog_db)
+    ranked = {row['id']: row['relevance'] for row in index.search('Modbus IEC 61850')}
+    assert index.relevance('Modbus IEC 61850') == pytest.approx(ranked)
+    assert list(index.relevance('Modbus IEC 61850', k=1)) == [2]
+
+    conn = sqlite3.connect(catalog_db)
+    install_fulltext(conn)
+    conn.commit()
+    conn.close()
+    assert index.relevance('Modbus IEC 61850') == pytest.approx(ranked)
+    assert index.relevance('') == {}
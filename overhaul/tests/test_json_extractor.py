@@ -0,0 +1,104 @@
+import time
+
+from core.json_extractor import IncrementalJSONScanner, extract_json, scan_json_candidates
+
+
+def spans(text):
+    return [(c.start, c.end, c.complete) for c in scan_json_candidates(text)]
+
+
+def test_direct_and_fenced():
+    assert extract_json('{"a": 1}').strategy == 'direct'
+    result = extract_json('```json\n{"a": [1, 2]}\n```')
+    assert result.value == {'a': [1, 2]} and result.strategy == 'direct'
+
+
+def test_largest_complete_value_wins():
+    result = extract_json('first {"a": 1} then {"b": {"c": 2}} done')
+    assert result.value == {'b': {'c': 2}} and result.strategy == 'scan'
+
+
+def test_prose_braces_before_json():
+    assert extract_json('{see below} {"a": 1}').value == {'a': 1}
+
+
+def test_json_nested_in_invalid_balanced_span():
+    text = '{outer {"a": 1} junk}'
+    assert spans(text) == [(7, 15, True)]
+    assert extract_json(text).value == {'a': 1}
+
+
+def test_valid_object_kept_when_its_container_turns_invalid():
+    assert extract_json('{"x": {"a": 1} junk}').value == {'a': 1}
+
+
+def test_nested_invalid_braces_scan_in_linear_time():
+    # Rescanning each abandoned opener made this quadratic (seconds at n=4000)
+    n = 20000
+    started = time.perf_counter()
+    assert scan_json_candidates('{a ' * n + '}' * n) == []
+    result = extract_json('{a ' * n + '{"ok": 1}' + '}' * n)
+    assert result.value == {'ok': 1}
+    assert time.perf_counter() - started < 1.0
+
+
+def test_deeply_nested_json_does_not_raise():
+    assert extract_json('{"a": ' * 5000 + '1' + '}' * 5000).strategy == 'none'
+
+
+def test_truncated_json_after_invalid_prefix():
+    result = extract_json('{oops] {"clauses": [{"id": "1"}, {"id":')
+    assert result.strategy == 'repaired'
+    assert result.value == {'clauses': [{'id': '1'}]}
+
+
+def test_stray_quote_abandons_only_its_candidate():
+    text = '{it"s} and then {"b": 2}'
+    assert extract_json(text).value == {'b': 2}
+
+
+def test_mismatched_closer_abandons_candidate():
+    assert extract_json('{oops] {"ok": true}').value == {'ok': True}
+
+
+def test_escaped_quotes_and_braces_in_strings():
+    assert extract_json('x {"a": "say \\"hi\\" {not a brace}"} y').value == {'a': 'say "hi" {not a brace}'}
+
+
+def test_truncated_inside_string_is_repaired():
+    result = extract_json('Here: {"clauses": [{"id": "1", "text": "abc"}, {"id": "2", "text": "de')
+    assert result.strategy == 'repaired'
+    assert result.value['clauses'][0] == {'id': '1', 'text': 'abc'}
+
+
+def test_truncated_after_key_drops_partial_element():
+    result = extract_json('{"clauses": [{"id": "1"}, {"id":')
+    assert result.strategy == 'repaired'
+    assert result.value == {'clauses': [{'id': '1'}]}
+
+
+def test_repair_disabled():
+    assert extract_json('{"a": [1, 2', repair=False).strategy == 'none'
+
+
+def test_accept_predicate():
+    result = extract_json('{"x": 1} {"clauses": []}', accept=lambda value: 'clauses' in value)
+    assert result.value == {'clauses': []}
+
+
+def test_no_json():
+    result = extract_json("Sorry, I can't help with that.")
+    assert not result.found and result.value is None
+
+
+def test_incremental_scanner_stops_when_value_closes():
+    scanner = IncrementalJSONScanner()
+    assert not scanner.feed('```json\n{"a": "}"')
+    assert scanner.feed(', "b": [1]} trailing')
+    assert scanner.text[:scanner.end].endswith('[1]}')
+
+
+def test_incremental_scanner_ignores_prose():
+    scanner = IncrementalJSONScanner()
+    assert not scanner.feed('The answer is {"a": 1}')
+    assert scanner.disabled
@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+
+import pytest
+
+from core import llm_cache
+from core.llm_cache import LLMResponseCache
+from core.llm_processor import LLMProcessor
+
+
+class CountingClient:
+    def __init__(self, content='{"ok": true}'):
+        self.content = content
+        self.calls = 0
+
+    async def chat(self, **kwargs):
+        self.calls += 1
+        return {'message': {'content': self.content}}
+
+
+class FakeLLMProcessor(LLMProcessor):
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_client = client
+
+    def _get_client(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.fake_client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: float(next(ticks)))
+
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path), max_entries=2, max_age_seconds=None)
+    cache.set('a', 'm', {'n': 1})
+    cache.set('b', 'm', {'n': 2})
+    assert cache.get('a') == {'n': 1}
+    cache.set('c', 'm', {'n': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1} and cache.get('c') == {'n': 3}
+    assert cache.stats()['entries'] == 2
+    cache.close()
+
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path), max_age_seconds=1)
+    cache.set('a', 'm', {'n': 1})
+    llm_cache.time.time()  # let a tick of the fake clock pass
+    assert cache.get('a') is None
+    assert cache.stats()['misses'] == 1 and cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_key_depends_on_model_options_and_prompt():
+    key = LLMResponseCache.make_key('m', {'num_ctx': 8192, 'temperature': 0.1}, 'prompt')
+    assert key == LLMResponseCache.make_key('m', {'temperature': 0.1, 'num_ctx': 8192}, 'prompt')
+    assert key != LLMResponseCache.make_key('other', {'num_ctx': 8192, 'temperature': 0.1}, 'prompt')
+    assert key != LLMResponseCache.make_key('m', {'num_ctx': 4096, 'temperature': 0.1}, 'prompt')
+    assert key != LLMResponseCache.make_key('m', {'num_ctx': 8192, 'temperature': 0.1}, 'prompt ')
+
+
+def test_timeout_does_not_split_cache_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    client = CountingClient()
+    processor = FakeLLMProcessor(client, cache=cache)
+
+    first = asyncio.run(processor.process_prompt('same prompt', 30))
+    second = asyncio.run(processor.process_prompt('same prompt', 120))
+    assert client.calls == 1
+    assert second['cached'] and second['parsed_result'] == first['parsed_result'] == {'ok': True}
+
+    asyncio.run(FakeLLMProcessor(client, cache=cache, num_ctx=4096).process_prompt('same prompt', 30))
+    assert client.calls == 2
+    cache.close()
+
+
+def test_unparsed_responses_are_not_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    client = CountingClient(content='no json here')
+    processor = FakeLLMProcessor(client, cache=cache)
+
+    asyncio.run(processor.process_prompt('prompt', 30))
+    asyncio.run(processor.process_prompt('prompt', 30))
+    assert client.calls == 2
+    cache.close()
@@ -0,0 +1,71 @@
+import asyncio
+
+import ollama
+
+from core.llm_processor import LLMProcessor
+
+
+class RecordingClient:
+    """Stands in for ollama.AsyncClient, recording how it was built and how busy it got"""
+
+    created = []
+
+    def __init__(self, host=None, **kwargs):
+        self.kwargs = kwargs
+        self.in_flight = 0
+        self.peak = 0
+        self.closed = False
+        RecordingClient.created.append(self)
+
+    async def chat(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {'message': {'content': '{"ok": true}'}}
+
+    async def close(self):
+        self.closed = True
+
+
+def processor(monkeypatch, **kwargs):
+    RecordingClient.created = []
+    monkeypatch.setattr(ollama, 'AsyncClient', RecordingClient)
+    return LLMProcessor(**kwargs)
+
+
+def test_client_is_shared_within_a_loop_with_pool_limits(monkeypatch):
+    llm = processor(monkeypatch, max_connections=3)
+
+    async def main():
+        first = llm._get_client()
+        assert llm._get_client() is first
+        await llm.aclose()
+        return first
+
+    client = asyncio.run(main())
+    limits = client.kwargs['limits']
+    assert limits.max_connections == 3 and limits.max_keepalive_connections == 3
+    assert client.closed and llm._client is None
+
+
+def test_new_event_loop_gets_a_new_client(monkeypatch):
+    llm = processor(monkeypatch)
+
+    async def get():
+        return llm._get_client()
+
+    assert asyncio.run(get()) is not asyncio.run(get())
+    assert len(RecordingClient.created) == 2
+
+
+def test_requests_in_flight_are_bounded(monkeypatch):
+    llm = processor(monkeypatch, max_concurrency=2)
+
+    async def main():
+        results = await asyncio.gather(*(llm.process_prompt(f"prompt {i}", 10) for i in range(6)))
+        return results, llm._get_client()
+
+    results, client = asyncio.run(main())
+    assert all(result['success'] for result in results)
+    assert client.peak == 2
@@ -0,0 +1,92 @@
+import asyncio
+
+from core.llm_processor import LLMProcessor
+
+
+class FakeStream:
+    """Chunked chat stream like ollama's, recording how far it was read and whether it was closed"""
+
+    def __init__(self, pieces, eval_count=None):
+        self.parts = [{'message': {'content': piece}, 'done': False} for piece in pieces]
+        self.parts.append({'message': {'content': ''}, 'done': True, 'eval_count': eval_count or len(pieces)})
+        self.read = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed or self.read >= len(self.parts):
+            raise StopAsyncIteration
+        self.read += 1
+        return self.parts[self.read - 1]
+
+    async def aclose(self):
+        self.closed = True
+
+
+class StreamingClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.requests = []
+
+    async def chat(self, stream=False, **kwargs):
+        self.requests.append({'stream': stream, **kwargs})
+        return self.stream
+
+
+class FakeLLMProcessor(LLMProcessor):
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_client = client
+
+    def _get_client(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.fake_client
+
+
+def run(pieces, **kwargs):
+    stream = FakeStream(pieces, **kwargs)
+    client = StreamingClient(stream)
+    result = asyncio.run(FakeLLMProcessor(client, num_predict=500).process_prompt('prompt', 30, stream=True))
+    return result, stream, client
+
+
+def test_stream_stops_once_the_json_document_closes():
+    pieces = ['```json\n', '{"results": [', '{"clause": "6.5.1", ', '"status": "compliant"}', ']}',
+              '\n```', '\n\nThe meter', ' meets every', ' requirement', ' because...']
+    result, stream, client = run(pieces)
+
+    assert client.requests[0]['stream'] is True
+    assert stream.closed
+    assert stream.read == 5
+    assert result['success']
+    assert result['parsed_result'] == {'results': [{'clause': '6.5.1', 'status': 'compliant'}]}
+    assert result['raw_response'].endswith(']}')
+    stats = result['streaming']
+    assert stats['stopped_early'] and stats['tokens_generated'] == 5
+    assert stats['max_tokens_saved'] == 495
+
+
+def test_brackets_inside_strings_do_not_end_the_document():
+    result, stream, _ = run(['{"note": "use [', 'a] or }"', ', "ok": true}', ' trailing'])
+    assert stream.read == 3
+    assert result['parsed_result'] == {'note': 'use [a] or }', 'ok': True}
+
+
+def test_prose_before_the_json_is_never_cut_short():
+    result, stream, _ = run(['Here you go: ', '{"ok": true}', ' and {more}', ' prose'])
+    assert stream.read == len(stream.parts)
+    assert not result['streaming']['stopped_early']
+    assert result['parsed_result'] == {'ok': True}
+
+
+def test_stream_without_json_is_read_to_the_end_and_closed():
+    result, stream, _ = run(['No JSON', ' in this', ' answer'], eval_count=42)
+
+    assert stream.closed and stream.read == len(stream.parts)
+    assert result['raw_response'] == 'No JSON in this answer'
+    assert result['parsed_result'] == {'message': 'No JSON in this answer'}
+    assert not result['streaming']['stopped_early']
+    assert result['streaming']['tokens_generated'] == 42
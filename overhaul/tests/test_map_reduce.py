@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from core.map_reduce import chunk_items, reduce_concat, reduce_merge_keys, reduce_results
+from core.prompt_engine import PromptEngine
+
+
+def chunk(parsed):
+    return {'parsed_result': parsed, 'success': True}
+
+
+class FakeLLMProcessor:
+    """Answers each chunk with its items, failing the chunks whose prompt mentions a failing item"""
+
+    num_ctx = 8192
+    num_predict = 1024
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    async def process_prompt(self, prompt, timeout, **kwargs):
+        items = json.loads(prompt)
+        if self.failing & set(items):
+            return {'success': False, 'error': 'timeout'}
+        return {'raw_response': prompt, 'parsed_result': {'items': items}, 'success': True}
+
+
+def run_map_step(tmp_path, failing=()):
+    engine = PromptEngine(outputs_dir=str(tmp_path), enable_llm_cache=False, enable_extraction_cache=False)
+    engine.llm_processor = FakeLLMProcessor(failing)
+    step = {'name': 'rank', 'map_over': 'items', 'chunk_size': 2, 'reduce_key': 'items',
+            'prompt_template': '{{ items | tojson }}'}
+    return asyncio.run(engine._execute_map_step(step, {'items': list(range(6))}))
+
+
+def test_chunk_items():
+    assert list(chunk_items([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    assert list(chunk_items([1, 2], 0)) == [[1], [2]]
+
+
+def test_concat_keeps_chunk_order_and_wraps_scalars():
+    results = [chunk({'items': [1, 2], 'note': 'a'}), {'success': True}, chunk({'items': [3], 'other': [9]})]
+    assert reduce_concat(results) == {'items': [1, 2, 3], 'other': [9]}
+    assert reduce_concat(results, 'note') == {'note': ['a']}
+    assert reduce_concat([], 'items') == {'items': []}
+
+
+def test_merge_keys_extends_lists_updates_dicts_overwrites_scalars():
+    results = [chunk({'list': [1], 'map': {'a': 1}, 'total': 1}),
+               chunk({'list': [2], 'map': {'b': 2}, 'total': 2})]
+    assert reduce_merge_keys(results) == {'list': [1, 2], 'map': {'a': 1, 'b': 2}, 'total': 2}
+    assert reduce_merge_keys([chunk({'summary': {'a': 1}}), chunk({'summary': {'b': 2}})], 'summary') == \
+        {'summary': {'a': 1, 'b': 2}}
+    # The first chunk's payload is copied, not aliased
+    first = {'list': [1]}
+    reduce_merge_keys([chunk(first), chunk({'list': [2]})])
+    assert first == {'list': [1]}
+
+
+def test_reduce_results_rejects_unknown_modes():
+    with pytest.raises(ValueError, match='Unknown reduce mode'):
+        reduce_results('sum', [])
+    with pytest.raises(ValueError, match='reduce_function'):
+        reduce_results('custom', [])
+    assert reduce_results('custom', [chunk({})], reduce_function='builtins:len') == 1
+
+
+def test_map_step_succeeds_when_every_chunk_does(tmp_path):
+    result = run_map_step(tmp_path)
+    assert result['success'] and not result['partial']
+    assert result['parsed_result'] == {'items': [0, 1, 2, 3, 4, 5]}
+    assert result['failed_chunks'] == []
+
+
+def test_map_step_reports_missing_chunks(tmp_path):
+    result = run_map_step(tmp_path, failing={3})
+    assert not result['success'] and result['partial']
+    assert result['failed_chunks'] == [1]
+    assert result['parsed_result'] == {'items': [0, 1, 4, 5]}
+
+    result = run_map_step(tmp_path, failing={0, 2, 4})
+    assert not result['success'] and not result['partial']
+    assert result['failed_chunks'] == [0, 1, 2]
@@ -0,0 +1,67 @@
+import pytest
+
+from core.schema_validator import SchemaValidator
+
+
+COMPLIANCE = {
+    'type': 'object',
+    'required': ['model', 'results'],
+    'additionalProperties': False,
+    'properties': {
+        'model': {'type': 'string'},
+        'score': {'type': 'number', 'minimum': 0, 'maximum': 100},
+        'results': {
+            'type': 'array',
+            'minItems': 1,
+            'items': {
+                'type': 'object',
+                'required': ['status'],
+                'properties': {'status': {'enum': ['compliant', 'non-compliant']},
+                               'note': {'anyOf': [{'type': 'string'}, {'type': 'null'}]}},
+            },
+        },
+    },
+}
+
+
+def test_accepts_matching_value():
+    validator = SchemaValidator(COMPLIANCE)
+    assert validator.fully_enforced
+    assert validator.validate({'model': 'PM8240', 'score': 90, 'results': [{'status': 'compliant', 'note': None}]}) == []
+
+
+def test_reports_each_violation_with_its_path():
+    errors = SchemaValidator(COMPLIANCE).validate(
+        {'score': 101, 'extra': 1, 'results': [{'status': 'maybe', 'note': 3}, {}]})
+    assert errors == [
+        "$: missing required property 'model'",
+        '$.score: 101 is greater than maximum 100',
+        "$: unexpected property 'extra'",
+        "$.results[0].status: 'maybe' is not one of ['compliant', 'non-compliant']",
+        '$.results[0].note: does not match any allowed schema',
+        "$.results[1]: missing required property 'status'",
+    ]
+
+
+def test_booleans_are_not_numbers():
+    validator = SchemaValidator({'type': 'integer'})
+    assert not validator.is_valid(True)
+    assert validator.is_valid(3)
+
+
+def test_unknown_type_names_the_type():
+    with pytest.raises(ValueError, match="'decimal'"):
+        SchemaValidator({'properties': {'score': {'type': 'decimal'}}})
+
+
+def test_unsupported_keywords_mark_schema_not_fully_enforced():
+    validator = SchemaValidator({'type': 'object', 'title': 'Result',
+                                 'properties': {'model': {'type': 'string', 'pattern': '^PM'},
+                                                'ref': {'$ref': '#/definitions/x'}}})
+    assert validator.unchecked == ['$.properties.model.pattern', '$.properties.ref.$ref']
+    assert not validator.fully_enforced
+    assert validator.is_valid({'model': 'ION9000'})
+
+
+def test_compiled_validators_are_shared():
+    assert SchemaValidator.for_schema({'type': 'string'}) is SchemaValidator.for_schema({'type': 'string'})
@@ -0,0 +1,85 @@
+import pytest
+
+from core.spec_parser import (MEMORY_UNITS, compare, conditions_sql, matches, parse_accuracy_classes,
+                              parse_conditions, parse_frequency, parse_io_count, parse_level, parse_meter_specs,
+                              parse_percent, parse_range)
+
+
+def test_parse_range():
+    assert parse_range('-25 to 70 °C') == (-25.0, 70.0)
+    assert parse_range('-25…70 °C') == (-25.0, 70.0)
+    assert parse_range('5% to 95% RH at 50 °C') == (5.0, 95.0)
+    assert parse_range('32 to 140 °F') == pytest.approx((0.0, 60.0))
+    assert parse_range(None) == (None, None)
+
+
+def test_parse_frequency_level_percent():
+    assert parse_frequency('50/60 Hz +/- 15%') == (50.0, 60.0)
+    assert parse_level('CAT III') == 3
+    assert parse_level('2') == 2
+    assert parse_percent('±0.2 %') == 0.2
+    assert parse_percent('0.2') is None
+
+
+def test_accuracy_classes_prefer_active_energy():
+    texts = ['Class 0.5S active energy (IEC 62053-22)', 'Class 0.2 voltage', 'Class B (EN 50470-3)']
+    assert parse_accuracy_classes(texts) == 0.5
+    assert parse_accuracy_classes(['Class C']) == 0.5
+    assert parse_accuracy_classes([]) is None
+
+
+def test_io_count_skips_leds_and_analog():
+    assert parse_io_count('3 digital 30 V AC / 3 digital 60 V DC', output=True) == 6
+    assert parse_io_count('2 LED, 1 analog', output=False) is None
+
+
+def test_parse_meter_specs():
+    meter = {
+        'rated_voltage': '20-400 V L-N / 35-690 V L-L',
+        'rated_current': '5 mA to 10 A',
+        'network_frequency': '50/60 Hz',
+        'operating_temp': '-25 to 70 °C',
+        'memory_capacity': '512 MB',
+        'ip_rating': 'IP52 front',
+        'overvoltage_category': 'III',
+    }
+    related = {
+        'AccuracyClasses': [{'accuracy_class': 'Class 0.2S active energy'}],
+        'MeasurementAccuracy': [{'parameter': 'voltage', 'accuracy': '±0.1 %'}],
+        'PowerQualityAnalysis': [{'analysis_feature': 'Harmonics up to 63rd order'}],
+        'InputsOutputs': [{'io_type': 'Input', 'description': '4 digital'},
+                          {'io_type': 'Output', 'description': '2 relay'}],
+    }
+    specs = parse_meter_specs(meter, related)
+    assert specs['voltage_max'] == 690.0
+    assert specs['current_min'] == 0.005 and specs['current_max'] == 10.0
+    assert (specs['temp_min'], specs['temp_max']) == (-25.0, 70.0)
+    assert specs['memory_bytes'] == 512 * MEMORY_UNITS['mb']
+    assert (specs['ip_solids'], specs['ip_liquids']) == (5, 2)
+    assert specs['overvoltage_category'] == 3
+    assert specs['harmonic_order'] == 63
+    assert specs['accuracy_class'] == 0.2
+    assert specs['voltage_accuracy_pct'] == 0.1
+    assert (specs['digital_inputs'], specs['digital_outputs']) == (4, 2)
+    assert specs['humidity_max'] is None
+
+
+def test_conditions_match_with_sql_semantics():
+    conditions = parse_conditions({'temp_min__lte': -10, 'digital_inputs__gte': 4, 'ip_solids__in': [5, 6]})
+    assert matches({'temp_min': -25, 'digital_inputs': 4, 'ip_solids': 5}, conditions)
+    assert not matches({'temp_min': -5, 'digital_inputs': 4, 'ip_solids': 5}, conditions)
+    # An unknown value never satisfies a condition
+    assert not matches({'temp_min': None, 'digital_inputs': 4, 'ip_solids': 5}, conditions)
+
+    sql, params = conditions_sql(conditions)
+    assert sql == 's.temp_min <= ? AND s.digital_inputs >= ? AND s.ip_solids IN (?, ?)'
+    assert params == [-10, 4, 5, 6]
+
+
+def test_compare_and_invalid_conditions():
+    assert compare(0.2, 'lte', 0.5)
+    assert not compare(3, 'gt', 3)
+    with pytest.raises(ValueError):
+        parse_conditions({'colour': 'red'})
+    with pytest.raises(ValueError):
+        parse_conditions({'temp_min__about': 0})
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from core.step_scheduler import StepScheduler
+
+
+def step(name, *dependencies):
+    return {'name': name, 'dependencies': list(dependencies)}
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError, match='a -> c -> b -> a'):
+        StepScheduler([step('a', 'c'), step('b', 'a'), step('c', 'b')])
+    with pytest.raises(ValueError, match="'missing'"):
+        StepScheduler([step('a', 'missing')])
+    with pytest.raises(ValueError, match='Duplicate'):
+        StepScheduler([step('a'), step('a')])
+
+
+def test_ancestors_are_transitive_and_in_pipeline_order():
+    scheduler = StepScheduler([step('load'), step('other'), step('extract', 'load'), step('rank', 'extract')])
+    assert scheduler.ancestors('rank') == ['load', 'extract']
+    assert scheduler.ancestors('other') == []
+
+
+def test_independent_steps_overlap_and_dependents_wait():
+    scheduler = StepScheduler([step('a'), step('b'), step('report', 'a', 'b')])
+    seen = {}
+
+    async def execute(current, results):
+        seen[current['name']] = sorted(results)
+        await asyncio.sleep(0.05)
+        return current['name'].upper()
+
+    results = asyncio.run(scheduler.run(execute))
+    assert results == {'a': 'A', 'b': 'B', 'report': 'REPORT'}
+    assert seen == {'a': [], 'b': [], 'report': ['a', 'b']}
+    timings = scheduler.timings
+    assert timings['b'].started_at < timings['a'].finished_at
+    assert timings['report'].started_at >= max(timings['a'].finished_at, timings['b'].finished_at)
+    assert scheduler.stats()['critical_path'][-1] == 'report'
+
+
+def test_failure_cancels_and_awaits_running_siblings():
+    scheduler = StepScheduler([step('fails'), step('slow'), step('after', 'fails')])
+    events = []
+
+    async def execute(current, results):
+        if current['name'] == 'fails':
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0)
+            events.append('slow cleaned up')
+            raise
+
+    async def main():
+        with pytest.raises(RuntimeError, match='boom'):
+            await scheduler.run(execute)
+        # Cleanup already happened by the time run() raised
+        return list(events)
+
+    assert asyncio.run(main()) == ['slow cleaned up']
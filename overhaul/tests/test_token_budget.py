@@ -0,0 +1,59 @@
+from core.token_budget import (TokenBudgetBatcher, budget_report, estimate_tokens,
+                               resolve_token_budget, split_text)
+
+
+def clause(number, words):
+    return {'clause_id': f'6.5.{number}', 'text': ' '.join(['measure'] * words)}
+
+
+def test_estimate_counts_words_numbers_and_punctuation():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('Class 0.2S, 400 V') == 8
+    assert estimate_tokens('interharmonics') == 3
+
+
+def test_resolve_auto_leaves_room_for_the_response():
+    assert resolve_token_budget('auto', 8192, 4096) == 4096
+    assert resolve_token_budget(True, 8192, 1024) == 7168
+    assert resolve_token_budget('auto', 1024, 1000) == 512
+    assert resolve_token_budget('1500', 8192, 4096) == 1500
+
+
+def test_budget_report_flags_overflow():
+    assert not budget_report('word ' * 100, 8192, 4096)['overflow']
+    assert budget_report('word ' * 5000, 8192, 4096)['overflow']
+
+
+def test_batches_fit_the_budget_and_keep_order():
+    items = [clause(i, 20) for i in range(1, 11)]
+    batcher = TokenBudgetBatcher(200, overhead_tokens=50)
+    batches = batcher.batch(items)
+
+    assert len(batches) > 1
+    assert [item for batch in batches for item in batch] == items
+    for batch in batches:
+        assert sum(estimate_tokens(batcher.render(item)) for item in batch) <= batcher.item_budget
+
+
+def test_oversized_item_is_split_on_its_longest_field():
+    item = {'clause_id': '6.5.1', 'text': '\n'.join(' '.join(['measure'] * 30) for _ in range(6))}
+    batcher = TokenBudgetBatcher(100)
+    parts = [piece for batch in batcher.batch([item]) for piece in batch]
+
+    assert len(parts) > 1
+    assert all(part['clause_id'] == '6.5.1' for part in parts)
+    assert [part['part'] for part in parts] == [f'{i}/{len(parts)}' for i in range(1, len(parts) + 1)]
+    assert '\n'.join(part['text'] for part in parts) == item['text']
+    assert all(estimate_tokens(batcher.render(part)) <= batcher.item_budget for part in parts)
+
+
+def test_unsplittable_item_is_sent_alone():
+    item = {'values': list(range(200))}
+    assert TokenBudgetBatcher(50).batch([item, {'values': [1]}]) == [[item], [{'values': [1]}]]
+
+
+def test_split_text_prefers_line_then_sentence_boundaries():
+    assert split_text('one two. three four', 3) == ['one two', 'three four']
+    lines = 'alpha beta gamma\ndelta epsilon zeta'
+    assert split_text(lines, 4) == ['alpha beta gamma', 'delta epsilon zeta']
+    assert ''.join(split_text('x' * 100, 5)) == 'x' * 100